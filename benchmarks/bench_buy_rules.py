@@ -0,0 +1,128 @@
+"""Compare the columnar BUY rules in SignalAnalyzer / ConsolidateAnalyzer with the
+old row-by-row loops on synthetic sheet tabs.
+
+Run from the repo root:  python -m benchmarks.bench_buy_rules
+"""
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from core.analyzers import SignalAnalyzer, ConsolidateAnalyzer
+from core.columns import col
+
+SIZES = [500, 2_000, 10_000]
+REPEAT = 3
+
+
+def make_buy_tab(n: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic buy tab shaped like DataFetcher.fetch output (prices numeric, dates/PEG as sheet strings)."""
+    rng = np.random.default_rng(seed)
+    price = rng.uniform(50, 5000, n)
+    df = pd.DataFrame({
+        col("ticker"): [f"NSE:SYM{i:05d}" for i in range(n)],
+        col("current_price"): price,
+        col("last_close"): price * rng.uniform(0.9, 1.1, n),
+        col("min_6m"): price * rng.uniform(0.7, 1.1, n),
+    })
+    for d in [5, 20, 50, 100, 200]:
+        df[col(f"dma_{d}")] = price * rng.uniform(0.93, 1.07, n)
+
+    high = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, n), unit="D")
+    low = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, n), unit="D")
+    df[col("high_52w_date")] = high.strftime("%d/%m/%Y")
+    df[col("low_52w_date")] = low.strftime("%d/%m/%Y")
+
+    peg = rng.uniform(0.2, 6, n).round(3).astype(str)
+    peg[rng.random(n) < 0.1] = "#N/A"
+    df[col("PEG")] = peg
+
+    # sprinkle the gaps the sheet really has
+    df.loc[rng.random(n) < 0.02, col("dma_100")] = np.nan
+    return df
+
+
+def _legacy_peg(row, signal):
+    peg_raw = row.get(col("PEG"), None)
+    try:
+        signal["PEG"] = round(float(peg_raw), 2)
+    except (ValueError, TypeError):
+        signal["PEG"] = "NA"
+
+
+def legacy_signal_buy(df):
+    log = []
+    df = df.dropna(subset=[col("current_price"), col("dma_100"), col("min_6m"), col("last_close")])
+    for _, row in df.iterrows():
+        if row[col("current_price")] > row[col("dma_100")] and \
+           row[col("current_price")] > row[col("min_6m")] and \
+           row[col("last_close")] < row[col("dma_100")]:
+            signal = {
+                "Date": datetime.today().date(),
+                "Ticker": row[col("ticker")],
+                "Signal": "BUY",
+                "Price": round(float(row[col("current_price")]), 2)
+            }
+            _legacy_peg(row, signal)
+            log.append(signal)
+    return log
+
+
+def legacy_consolidate_buy(df):
+    log = []
+    df = df.dropna(subset=[
+        col("ticker"), col("current_price"), col("high_52w_date"), col("low_52w_date"),
+        col("dma_5"), col("dma_20"), col("dma_50"), col("dma_100"), col("dma_200")
+    ])
+    for _, row in df.iterrows():
+        price = row[col("current_price")]
+        dma_vals = [row[col(f"dma_{d}")] for d in [5, 20, 50, 100, 200]]
+        high_date = pd.to_datetime(row[col("high_52w_date")], errors="coerce", dayfirst=True)
+        low_date = pd.to_datetime(row[col("low_52w_date")], errors="coerce", dayfirst=True)
+        if pd.notna(high_date) and pd.notna(low_date) and high_date < low_date:
+            if all(0.95 * price < val < 1.05 * price for val in dma_vals):
+                signal = {
+                    "Date": datetime.today().date(),
+                    "Ticker": row[col("ticker")],
+                    "Signal": "BUY",
+                    "Price": round(float(price), 2)
+                }
+                _legacy_peg(row, signal)
+                log.append(signal)
+    return log
+
+
+def _best_of(fn, *args):
+    best, out = float("inf"), None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        out = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def _vectorized(analyzer_class):
+    def run(df):
+        analyzer = analyzer_class()
+        analyzer.analyze_buy(df)
+        return analyzer.signal_log
+    return run
+
+
+def main():
+    print(f"{'analyzer':<22}{'rows':>8}{'legacy s':>12}{'columnar s':>12}{'speedup':>10}{'signals':>9}")
+    for name, legacy, analyzer_class in [
+        ("SignalAnalyzer", legacy_signal_buy, SignalAnalyzer),
+        ("ConsolidateAnalyzer", legacy_consolidate_buy, ConsolidateAnalyzer),
+    ]:
+        for n in SIZES:
+            df = make_buy_tab(n)
+            t_old, old = _best_of(legacy, df)
+            t_new, new = _best_of(_vectorized(analyzer_class), df)
+            assert old == new, f"{name} output differs at {n} rows"
+            print(f"{name:<22}{n:>8}{t_old:>12.4f}{t_new:>12.4f}{t_old / t_new:>9.1f}x{len(new):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Compare the one-pass EarningsGap screen with the old per-ticker loop on
+synthetic 60-session OHLC for a Nifty 500-sized and an all-NSE-sized universe.
+
+Run from the repo root:  python -m benchmarks.bench_earnings_gap
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.analyzers import earnings_gap_screen
+from core.indicators import segment_starts, wilder_rsi_segments
+from core.rules import GAP_RULE
+
+SIZES = [500, 2_000]
+N_BARS = 60
+REPEAT = 3
+
+
+def make_ohlc(n_tickers: int, n_bars: int = N_BARS, seed: int = 0):
+    """Synthetic OHLC (about half the tickers gap up on their last bar) and a sheet PEG per ticker."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2025-01-01", periods=n_bars)
+    tickers = [f"SYM{i:04d}.NS" for i in range(n_tickers)]
+    close = 100 * np.cumprod(1 + rng.normal(0.002, 0.02, (n_tickers, n_bars)), axis=1)
+    open_ = close * (1 + rng.normal(0, 0.01, close.shape))
+    volume = rng.integers(400_000, 900_000, close.shape).astype(float)
+
+    gappers = rng.random(n_tickers) < 0.5
+    open_[gappers, -1] = close[gappers, -2] * rng.uniform(1.0, 1.06, gappers.sum())
+    close[gappers, -1] = open_[gappers, -1] * rng.uniform(0.99, 1.03, gappers.sum())
+    volume[gappers, -1] *= rng.uniform(1, 2, gappers.sum())
+
+    ohlc = pd.DataFrame({
+        "ticker": np.repeat(tickers, n_bars),
+        "trade_date": np.tile(dates, n_tickers),
+        "open": open_.ravel(),
+        "high": np.maximum(open_, close).ravel() * 1.01,
+        "low": np.minimum(open_, close).ravel() * 0.99,
+        "close": close.ravel(),
+        "volume": volume.ravel(),
+    })
+    peg = pd.Series(rng.uniform(0.5, 6, n_tickers).round(2), index=tickers)
+    return ohlc, peg
+
+
+def legacy_screen(ohlc: pd.DataFrame, peg: pd.Series, rule: dict = GAP_RULE) -> list:
+    """The per-ticker loop analyze_buy used to run, kept as the reference."""
+    ohlc = ohlc.merge(peg.rename("peg_ratio"), left_on="ticker", right_index=True, how="left")
+    ohlc = ohlc.sort_values(["ticker", "trade_date"], kind="stable", ignore_index=True)
+    ohlc["rsi14"] = wilder_rsi_segments(ohlc["close"], segment_starts(ohlc["ticker"]), rule["rsi_period"])
+    ohlc["avg_vol_20"] = (
+        ohlc.groupby("ticker", group_keys=False)["volume"]
+        .rolling(rule["volume_window"]).mean().reset_index(level=0, drop=True)
+    )
+    ohlc["ret_20"] = ohlc.groupby("ticker", group_keys=False)["close"].pct_change(rule["return_window"])
+
+    hits = []
+    for ticker in sorted(ohlc["ticker"].dropna().unique()):
+        sub = ohlc[ohlc["ticker"] == ticker].sort_values("trade_date")
+        if len(sub) < 2:
+            continue
+        row, prev = sub.iloc[-1], sub.iloc[-2]
+        if (row["open"] >= (1 + rule["gap_pct"] / 100) * prev["close"]
+                and row["avg_vol_20"] >= rule["min_avg_volume"]
+                and pd.notna(row["peg_ratio"]) and row["peg_ratio"] < rule["max_peg"]
+                and row["volume"] >= rule["volume_mult"] * row["avg_vol_20"]
+                and row["close"] > min(row["open"], row["low"])
+                and row["rsi14"] >= rule["min_rsi"] and row["ret_20"] >= 0):
+            hits.append(ticker)
+    return hits
+
+
+def _best_of(fn, *args):
+    best, out = float("inf"), None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        out = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def main():
+    print(f"{'tickers':>8}{'rows':>10}{'loop s':>10}{'one-pass s':>12}{'speedup':>10}{'signals':>9}")
+    for n in SIZES:
+        ohlc, peg = make_ohlc(n)
+        t_old, old = _best_of(legacy_screen, ohlc, peg)
+        t_new, screen = _best_of(earnings_gap_screen, ohlc, peg)
+        new = screen.index[screen["signal"]].tolist()
+        assert old == new, f"signals differ at {n} tickers"
+        print(f"{n:>8}{len(ohlc):>10}{t_old:>10.3f}{t_new:>12.4f}{t_old / t_new:>9.0f}x{len(new):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Cost of one FD benchmark slider move: the per-rate recomputation page 3 used
+to run on every rerun versus a column of the precomputed FD grid, over a
+synthetic ledger of sold lots.
+
+Run from the repo root:  python -m benchmarks.bench_fd_grid
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.columns import col
+from core.fd_benchmark import FD_RATES
+from core.portfolio import SELL_PRICE, PortfolioLedger
+
+SIZES = [1_000, 20_000]
+N_TICKERS = 300
+N_STRATEGIES = 3
+
+
+def make_portfolios(n_lots: int, seed: int = 0) -> dict:
+    """Sheet-like portfolio frames, about two thirds of the lots sold."""
+    rng = np.random.default_rng(seed)
+    buy = pd.Timestamp("2023-01-02") + pd.to_timedelta(rng.integers(0, 700, n_lots), unit="D")
+    held = pd.to_timedelta(rng.integers(0, 400, n_lots), unit="D")
+    price = rng.uniform(50, 3000, n_lots).round(2)
+    sold = rng.random(n_lots) < 0.67
+    df = pd.DataFrame({
+        col("ticker"): [f"NSE:SYM{i:03d}" for i in rng.integers(0, N_TICKERS, n_lots)],
+        col("buy_date"): buy.date,
+        col("sell_date"): np.where(sold, (buy + held).date, None),
+        col("buy_price"): price,
+        col("buy_qty"): rng.integers(1, 50, n_lots),
+        SELL_PRICE: np.where(sold, (price * rng.uniform(0.85, 1.4, n_lots)).round(2), np.nan),
+        col("current_price"): (price * rng.uniform(0.8, 1.3, n_lots)).round(2),
+    })
+    strategy = rng.integers(0, N_STRATEGIES, n_lots)
+    return {f"S{i}": df[strategy == i].reset_index(drop=True) for i in range(N_STRATEGIES)}
+
+
+def legacy_benchmark(portfolios: dict, fd_rate: float) -> pd.DataFrame:
+    """The calculation page 3 ran on every slider move, kept as the reference."""
+    portfolio_df = pd.concat([df.assign(Strategy=name) for name, df in portfolios.items()], ignore_index=True)
+    sold_df = portfolio_df[portfolio_df[col("sell_date")].notna()].copy()
+    sold_df["Investment"] = sold_df[col("buy_price")] * sold_df[col("buy_qty")]
+    sold_df["RealizedValue"] = sold_df[SELL_PRICE] * sold_df[col("buy_qty")]
+    sold_df[col("buy_date")] = pd.to_datetime(sold_df[col("buy_date")], errors="coerce")
+    sold_df[col("sell_date")] = pd.to_datetime(sold_df[col("sell_date")], errors="coerce")
+    sold_df = sold_df[sold_df[col("buy_date")].notna() & sold_df[col("sell_date")].notna()]
+    sold_df["Days Held"] = (sold_df[col("sell_date")] - sold_df[col("buy_date")]).dt.days.clip(lower=1)
+    sold_df["FD Return"] = sold_df["Investment"] * (1 + (fd_rate / 100) * sold_df["Days Held"] / 365)
+    sold_df["Strategy Profit"] = sold_df["RealizedValue"] - sold_df["Investment"]
+    sold_df["FD Profit"] = sold_df["FD Return"] - sold_df["Investment"]
+    sold_df["Excess Profit"] = sold_df["Strategy Profit"] - sold_df["FD Profit"]
+    benchmark = (
+        sold_df.groupby(col("ticker"), as_index=False)
+        .agg({c: "sum" for c in ["Investment", "RealizedValue", "FD Return", "Strategy Profit", "FD Profit", "Excess Profit"]})
+        .rename(columns={col("ticker"): "Ticker"})
+    )
+    benchmark["Strategy %"] = (benchmark["Strategy Profit"] / benchmark["Investment"]) * 100
+    benchmark["FD %"] = (benchmark["FD Profit"] / benchmark["Investment"]) * 100
+    benchmark["Excess %"] = benchmark["Strategy %"] - benchmark["FD %"]
+    return benchmark
+
+
+def main():
+    print(f"{'lots':>8}{'grid build s':>14}{'legacy ms/move':>16}{'grid ms/move':>14}")
+    for n in SIZES:
+        portfolios = make_portfolios(n)
+        ledger = PortfolioLedger(portfolios)
+
+        start = time.perf_counter()
+        ledger.fd_grid
+        t_build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for rate in FD_RATES:
+            old = legacy_benchmark(portfolios, rate)
+        t_old = (time.perf_counter() - start) / len(FD_RATES)
+
+        start = time.perf_counter()
+        for rate in FD_RATES:
+            new = ledger.fd_benchmark(rate)
+        t_new = (time.perf_counter() - start) / len(FD_RATES)
+
+        pd.testing.assert_frame_equal(old, new[old.columns], check_dtype=False)
+        print(f"{n:>8}{t_build:>14.3f}{t_old * 1000:>16.1f}{t_new * 1000:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
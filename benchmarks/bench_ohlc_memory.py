@@ -0,0 +1,69 @@
+"""Memory of 500 tickers x 5 years of OHLC as the long frames the analyzers
+used to get from OHLCStore.read() versus OHLCBars from OHLCStore.read_bars().
+
+Bars are written to a throwaway local store first, so both sides read the same
+Parquet files. Run from the repo root:  python -m benchmarks.bench_ohlc_memory
+"""
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.ohlc_store import OHLCStore
+from core.trading_calendar import get_trading_calendar
+
+N_TICKERS = 500
+YEARS = 5
+
+
+def make_ohlc(n_tickers: int = N_TICKERS, years: int = YEARS, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp("2025-12-31")
+    dates = pd.DatetimeIndex(get_trading_calendar().sessions(end - pd.DateOffset(years=years), end))
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.02, (n_tickers, len(dates))), axis=1)
+    return pd.DataFrame({
+        "ticker": np.repeat([f"SYM{i:04d}.NS" for i in range(n_tickers)], len(dates)),
+        "trade_date": np.tile(dates, n_tickers),
+        "open": close.ravel() * 0.995,
+        "high": close.ravel() * 1.01,
+        "low": close.ravel() * 0.99,
+        "close": close.ravel(),
+        "volume": rng.integers(10_000, 5_000_000, close.size).astype(float),
+    })
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return time.perf_counter() - start, out
+
+
+def main():
+    ohlc = make_ohlc()
+    store = OHLCStore(tempfile.mkdtemp())
+    store.write_many((ticker, rows, True, None) for ticker, rows in ohlc.groupby("ticker", sort=False))
+    tickers = sorted(ohlc["ticker"].unique())
+
+    t_frame, frame = _timed(store.read, tickers)
+    # what the old EarningsGap path held at once: the read, its calendar-filtered copy and the sorted copy
+    held = [frame, get_trading_calendar().filter(frame)]
+    held.append(held[-1].sort_values(["ticker", "trade_date"], ignore_index=True))
+    frame_bytes = frame.memory_usage(deep=True).sum()
+    held_bytes = sum(df.memory_usage(deep=True).sum() for df in held)
+
+    t32, bars32 = _timed(store.read_bars, tickers)
+    t64, bars64 = _timed(store.read_bars, tickers, dtype=np.float64)
+    assert len(bars32) == len(frame) and np.array_equal(bars64.close, held[-1]["close"].to_numpy())
+
+    mb = 1024 ** 2
+    print(f"{N_TICKERS} tickers x {YEARS} years: {len(frame)} bars")
+    print(f"{'representation':<34}{'MB':>8}{'bytes/bar':>11}{'read s':>9}")
+    print(f"{'long frame (read)':<34}{frame_bytes / mb:>8.1f}{frame_bytes / len(frame):>11.1f}{t_frame:>9.2f}")
+    print(f"{'  + filter and sort copies':<34}{held_bytes / mb:>8.1f}{held_bytes / len(frame):>11.1f}")
+    for name, bars, t in [("OHLCBars float32", bars32, t32), ("OHLCBars float64", bars64, t64)]:
+        print(f"{name:<34}{bars.nbytes / mb:>8.1f}{bars.nbytes / len(bars):>11.1f}{t:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Read a synthetic ohlc_data table through a local PostgREST stand-in with the
+old sequential pager and with OHLCReader, checking every read is complete.
+
+Each request waits LATENCY seconds to stand in for the Supabase round trip.
+The second server caps responses below the reader's page size, where the old
+pager stopped after the first short page.
+
+Run from the repo root:  python -m benchmarks.bench_ohlc_reader
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.ohlc_reader import LocalPostgREST, OHLCReader
+from core.ohlc_store import OHLC_COLUMNS
+
+N_TICKERS = 500
+N_BARS = 250  # ~1 year of sessions
+LATENCY = 0.02
+WORKERS = [1, 4, 8]
+
+
+def make_table(n_tickers: int = N_TICKERS, n_bars: int = N_BARS, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-01", periods=n_bars)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.02, (n_tickers, n_bars)), axis=1)
+    df = pd.DataFrame({
+        "ticker": np.repeat([f"SYM{i:04d}.NS" for i in range(n_tickers)], n_bars),
+        "trade_date": np.tile(dates, n_tickers),
+        "open": close.ravel() * 0.995,
+        "high": close.ravel() * 1.01,
+        "low": close.ravel() * 0.99,
+        "close": close.ravel(),
+        "volume": rng.integers(10_000, 5_000_000, n_tickers * n_bars).astype(float),
+    })
+    df.loc[rng.random(len(df)) < 0.001, "volume"] = np.nan
+    return df
+
+
+def legacy_read(client, tickers: list, since: str, page_size: int = 1000, chunk: int = 100) -> pd.DataFrame:
+    """The sequential pager OHLCStore._fetch_remote used to run, kept as the reference."""
+    frames = []
+    for i in range(0, len(tickers), chunk):
+        batch = tickers[i:i + chunk]
+        start = 0
+        while True:
+            resp = (
+                client.table("ohlc_data")
+                .select(",".join(OHLC_COLUMNS))
+                .in_("ticker", batch)
+                .gte("trade_date", since)
+                .order("ticker")
+                .order("trade_date")
+                .range(start, start + page_size - 1)
+                .execute()
+            )
+            data = getattr(resp, "data", [])
+            if data:
+                frames.append(pd.DataFrame(data, columns=OHLC_COLUMNS))
+            if len(data) < page_size:
+                break
+            start += page_size
+    if not frames:
+        return pd.DataFrame(columns=OHLC_COLUMNS)
+    df = pd.concat(frames, ignore_index=True)
+    df["trade_date"] = pd.to_datetime(df["trade_date"])
+    for c in ["open", "high", "low", "close", "volume"]:
+        df[c] = pd.to_numeric(df[c], errors="coerce")
+    return df
+
+
+def _timed(fn, server, *args, **kwargs):
+    server.requests = 0
+    start = time.perf_counter()
+    out = fn(server, *args, **kwargs)
+    return time.perf_counter() - start, server.requests, out
+
+
+def main():
+    table = make_table()
+    tickers = sorted(table["ticker"].unique())
+    since = table["trade_date"].min().strftime("%Y-%m-%d")
+    expected = table.sort_values(["ticker", "trade_date"], ignore_index=True)
+
+    print(f"{N_TICKERS} tickers x {N_BARS} bars ({len(table)} rows), {LATENCY * 1000:.0f}ms per request")
+    print(f"{'server cap':>10}  {'reader':<14}{'s':>8}{'requests':>10}{'rows/s':>10}  complete")
+    for max_rows in [1000, 500]:
+        server = LocalPostgREST({"ohlc_data": table}, max_rows=max_rows, latency=LATENCY)
+
+        t, n, out = _timed(legacy_read, server, tickers, since)
+        print(f"{max_rows:>10}  {'sequential':<14}{t:>8.2f}{n:>10}{len(out) / t:>10.0f}  {len(out) == len(table)}")
+
+        for workers in WORKERS:
+            reader = OHLCReader(max_workers=workers)
+            t, n, out = _timed(reader.read, server, tickers, since=since, columns=OHLC_COLUMNS)
+            pd.testing.assert_frame_equal(out, expected, check_dtype=False)
+            print(f"{max_rows:>10}  {f'{workers} worker(s)':<14}{t:>8.2f}{n:>10}{len(out) / t:>10.0f}  True")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Time the batched Wilder RSI kernel against the old per-ticker loop.
+
+Run from the repo root:  python -m benchmarks.bench_rsi
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.indicators import segment_starts, wilder_rsi_segments
+
+N_TICKERS = 200
+N_BARS = 500  # ~2 years of sessions
+
+
+def legacy_rsi(series: pd.Series, period: int = 14) -> pd.Series:
+    """The loop compute_rsi_wilder used to run, kept as the reference."""
+    if series is None or series.empty or series.shape[0] < period + 1:
+        return pd.Series([None] * series.shape[0], index=series.index)
+    delta = series.diff()
+    gain = delta.clip(lower=0)
+    loss = -delta.clip(upper=0)
+    avg_gain = gain.iloc[1:period+1].mean()
+    avg_loss = loss.iloc[1:period+1].mean()
+    rsi_values = [None] * len(series)
+    for i in range(period+1, len(series)):
+        avg_gain = (avg_gain * (period - 1) + gain.iloc[i]) / period
+        avg_loss = (avg_loss * (period - 1) + loss.iloc[i]) / period
+        if avg_loss == 0:
+            rsi = 100
+        else:
+            rs = avg_gain / avg_loss
+            rsi = 100 - (100 / (1 + rs))
+        rsi_values[i] = rsi
+    return pd.Series(rsi_values, index=series.index)
+
+
+def make_closes(n_tickers: int, n_bars: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(n_bars // 2, n_bars + 1, n_tickers)
+    tickers = np.repeat([f"SYM{i:04d}.NS" for i in range(n_tickers)], lengths)
+    steps = rng.normal(0, 0.02, lengths.sum())
+    close = 100 * np.exp(np.cumsum(steps))
+    return pd.DataFrame({"ticker": tickers, "close": close})
+
+
+def main():
+    ohlc = make_closes(N_TICKERS, N_BARS)
+
+    start = time.perf_counter()
+    old = ohlc.groupby("ticker", group_keys=False)["close"].apply(legacy_rsi)
+    t_old = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new = wilder_rsi_segments(ohlc["close"], segment_starts(ohlc["ticker"]), 14)
+    t_new = time.perf_counter() - start
+
+    np.testing.assert_allclose(pd.to_numeric(old).to_numpy(), new, rtol=1e-10, equal_nan=True)
+    print(f"{N_TICKERS} tickers x up to {N_BARS} bars ({len(ohlc)} rows)")
+    print(f"per-ticker loop: {t_old:.3f}s   batched kernel: {t_new * 1000:.1f}ms   speedup: {t_old / t_new:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
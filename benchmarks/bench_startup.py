@@ -0,0 +1,126 @@
+"""
+Cold-start cost of the app: import time and peak RSS of what each page (and
+config, core.runner, core.precompute) imports, every run in a fresh
+interpreter, and which heavy dependencies those imports load.
+
+Two budgets are checked. Dependencies in LAZY must be loaded only on first use,
+so no page may import them (except as listed in ALLOWED), and a target
+must never import what FORBIDDEN lists for it (streamlit for core.precompute). The import time and
+peak RSS of each target must stay within ``--tolerance`` of the baseline in
+.cache/benchmarks/startup-baseline.json; ``--save-baseline`` writes that file.
+The exit status is 1 if either budget is broken.
+
+Run from the repo root:  python -m benchmarks.bench_startup
+"""
+import ast
+import glob
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from core.paths import CACHE_DIR, ROOT_DIR
+
+RESULTS_DIR = os.path.join(CACHE_DIR, "benchmarks")
+MODULES = ["config", "core.runner", "core.precompute"]
+HEAVY = ["streamlit", "pandas", "pyarrow", "gspread", "supabase", "yfinance", "plotly", "matplotlib", "bs4"]
+# imported on first use (a fetch, a sync, a PEG lookup), never by a page's imports
+LAZY = ["gspread", "supabase", "yfinance", "bs4"]
+# page -> LAZY modules it may still import
+ALLOWED = {}
+# target -> modules it must not import at all (the headless precompute job runs without the app)
+FORBIDDEN = {"core.precompute": ["streamlit"]}
+
+_CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+exec(compile({source!r}, {target!r}, "exec"), {{"__name__": "__startup__"}})
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": seconds,
+    "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "modules": len(sys.modules),
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def page_imports(path: str) -> str:
+    """The module-level import statements of a page script."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def targets() -> dict:
+    """{name: import source} for every page, main.py and MODULES."""
+    pages = [os.path.join(ROOT_DIR, "main.py")] + sorted(glob.glob(os.path.join(ROOT_DIR, "pages", "[0-9]*.py")))
+    found = {os.path.relpath(p, ROOT_DIR): page_imports(p) for p in pages}
+    found.update({m: f"import {m}" for m in MODULES})
+    return found
+
+
+def measure(name: str, source: str, repeat: int) -> dict:
+    """Best import time and peak RSS of ``source`` over ``repeat`` fresh interpreters."""
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _CHILD.format(source=source, target=name, heavy=HEAVY)],
+            cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+            env={**os.environ, "PYTHONPATH": ROOT_DIR},
+        )
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "seconds": min(r["seconds"] for r in runs),
+        "median": float(np.median([r["seconds"] for r in runs])),
+        "peak_mb": min(r["peak_mb"] for r in runs),
+        "modules": runs[-1]["modules"],
+        "heavy": runs[-1]["heavy"],
+    }
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import time and peak RSS of each page, in fresh interpreters.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", default=os.path.join(RESULTS_DIR, "startup-baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed growth before a target is flagged")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results, broken = {}, []
+    print(f"{'target':<36}{'import s':>10}{'peak MB':>10}{'modules':>9}  heavy deps")
+    for name, source in targets().items():
+        r = results[name] = measure(name, source, args.repeat)
+        eager = [m for m in r["heavy"] if m in LAZY and m not in ALLOWED.get(name, [])]
+        eager += [m for m in r["heavy"] if m in FORBIDDEN.get(name, []) and m not in eager]
+        base = baseline.get(name)
+        slower = base is not None and (r["seconds"] > base["seconds"] * (1 + args.tolerance) + 0.02
+                                       or r["peak_mb"] > base["peak_mb"] * (1 + args.tolerance))
+        flags = (["eager: " + ",".join(eager)] if eager else []) + (["over baseline"] if slower else [])
+        if flags:
+            broken.append(name)
+        print(f"{name:<36}{r['seconds']:>10.3f}{r['peak_mb']:>10.1f}{r['modules']:>9}  "
+              f"{','.join(r['heavy'])}{'  ⚠️ ' + '; '.join(flags) if flags else ''}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=1)
+        print(f"Baseline saved to {args.baseline}")
+    if broken:
+        print(f"\n⚠️ Startup budget broken by: {', '.join(broken)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
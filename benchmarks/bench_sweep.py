@@ -0,0 +1,57 @@
+"""Time a threshold sweep on 1..N worker processes and check they rank identically.
+
+Run from the repo root:  python -m benchmarks.bench_sweep
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.sweep import run_sweep
+
+N_TICKERS = 200
+N_BARS = 500  # ~2 years of sessions
+SPACE = {
+    "dip": [30, 33, 35],
+    "cross": [38, 40, 42],
+    "block": [45, 48],
+    "sell_threshold_pct": [8, 10, 12, 15],
+}
+
+
+def make_ohlc(n_tickers: int, n_bars: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2025-12-31", periods=n_bars)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_tickers, n_bars)), axis=1))
+    opens = close * rng.uniform(0.97, 1.04, close.shape)
+    return pd.DataFrame({
+        "ticker": np.repeat([f"SYM{i:04d}.NS" for i in range(n_tickers)], n_bars),
+        "trade_date": np.tile(dates, n_tickers),
+        "open": opens.ravel(),
+        "high": np.maximum(opens, close).ravel() * 1.01,
+        "low": np.minimum(opens, close).ravel() * 0.99,
+        "close": close.ravel(),
+        "volume": rng.integers(300_000, 3_000_000, close.size).astype(float),
+    })
+
+
+def main():
+    ohlc = make_ohlc(N_TICKERS, N_BARS)
+    n_sets = int(np.prod([len(v) for v in SPACE.values()]))
+    print(f"{N_TICKERS} tickers x {N_BARS} bars, {n_sets} parameter sets, {os.cpu_count()} CPUs")
+
+    baseline, t_one = None, None
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        start = time.perf_counter()
+        ranked = run_sweep(ohlc, "Nifty200_RSI", SPACE, workers=workers)
+        seconds = time.perf_counter() - start
+        if baseline is None:
+            baseline, t_one = ranked, seconds
+        pd.testing.assert_frame_equal(ranked, baseline)
+        print(f"workers={workers}: {seconds:.2f}s   speedup: {t_one / seconds:.2f}x")
+    print(baseline.head(5).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Offline benchmark suite over synthetic universes (see benchmarks.synthetic).
+
+Times every analyzer in core.analyzers, the trading-calendar filter, the
+portfolio aggregation behind pages 2-4 (PortfolioLedger), and the
+fetch-to-frame parsing of DataFetcher, PortfolioManager and OHLCReader, for
+200/500/2000/5000 tickers. Each case reports the best of ``--repeat`` runs.
+
+Results go to .cache/benchmarks/latest.json and are compared with
+.cache/benchmarks/baseline.json (``--save-baseline`` makes the current run the
+baseline). A case is flagged when it is more than ``--tolerance`` slower than
+the baseline and by more than 5ms; the exit status is 1 if any case is.
+
+Run from the repo root:
+    python -m benchmarks.suite
+    python -m benchmarks.suite --sizes 200,500 --years 3 --save-baseline
+"""
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import SHEET, Universe, offline
+from config import STRATEGY_CONFIG
+from core.analyzers import (ConsolidateAnalyzer, EarningsGapAnalyzer, GARPAnalyzer, Nifty200RSIAnalyzer,
+                            SignalAnalyzer, TrendingValueAnalyzer)
+from core.fetcher import DataFetcher
+from core.fundamentals import PEGCache, StaticPEGSource
+from core.ohlc_bars import OHLCBars
+from core.ohlc_reader import OHLCReader
+from core.ohlc_store import OHLC_COLUMNS
+from core.paths import CACHE_DIR
+from core.portfolio import PortfolioLedger, PortfolioManager
+from core.rsi_state import RSIStateStore
+from core.signal_state import SignalStateStore
+from core.trading_calendar import get_trading_calendar
+
+SIZES = [200, 500, 2_000, 5_000]
+RESULTS_DIR = os.path.join(CACHE_DIR, "benchmarks")
+NOISE_FLOOR = 0.005
+
+
+class Case:
+    """A timed callable; ``setup`` (untimed, run before every repeat) returns its arguments."""
+
+    def __init__(self, name: str, run, setup=None):
+        self.name = name
+        self.run = run
+        self.setup = setup or (lambda: ())
+
+    def measure(self, repeat: int) -> dict:
+        times = []
+        rows = None
+        for _ in range(repeat):
+            args = self.setup()
+            start = time.perf_counter()
+            rows = self.run(*args)
+            times.append(time.perf_counter() - start)
+        return {"best": min(times), "median": float(np.median(times)), "rows": rows}
+
+
+def cases(universe: Universe, root: str, server) -> list:
+    """Every case of the suite, for ``universe`` served by offline()."""
+    fetcher = DataFetcher(SHEET)
+    manager = PortfolioManager(SHEET)
+    tabs = {t: fetcher.fetch(t) for c in STRATEGY_CONFIG.values() for t in c["buy_tabs"]}
+    portfolios = {name: manager.load(c["portfolio_tab"]) for name, c in STRATEGY_CONFIG.items()}
+    surcharges = manager.load_surcharges()
+    dma_buy = pd.concat([tabs[t] for t in STRATEGY_CONFIG["DMA"]["buy_tabs"]], ignore_index=True)
+    all_lots = pd.concat(portfolios.values(), ignore_index=True)
+    pegs = dict(zip(universe.tickers, universe.peg.tolist()))
+    calendar = get_trading_calendar()
+    bars = OHLCBars.from_frame(universe.ohlc)
+    since = str(universe.remote_window()["trade_date"].min().date())
+    counter = iter(range(1_000_000))
+
+    def fresh(name):
+        return os.path.join(root, f"{name}-{next(counter)}")
+
+    def rsi_analyzer():
+        signals = SignalStateStore(fresh("rsi") + ".sqlite")
+        peg_cache = PEGCache(StaticPEGSource(pegs), path=None)
+        return Nifty200RSIAnalyzer(peg_cache=peg_cache, rsi_state=RSIStateStore(signals=signals)),
+
+    def gap_analyzer():
+        return EarningsGapAnalyzer(signals=SignalStateStore(fresh("gap") + ".sqlite")),
+
+    # the warm cases run on analyzers whose state already covers the latest bar
+    warm_rsi = rsi_analyzer()[0]
+    warm_gap = gap_analyzer()[0]
+    warm_rsi.analyze_buy(tabs["Nifty_200"])
+    warm_gap.analyze_buy(tabs["Nifty_200"])
+
+    def buy_and_sell(analyzer, buy, lots=all_lots):
+        analyzer.analyze_buy(buy)
+        analyzer.analyze_sell(lots)
+        return len(analyzer.signal_log)
+
+    def summary(analyzer_class, buy):
+        analyzer = analyzer_class()
+        analyzer.analyze_buy(buy)
+        return len(analyzer.get_sheet_summary())
+
+    def analyze(analyzer, buy):
+        analyzer.analyze_buy(buy)
+        return len(analyzer.analysis_df)
+
+    def ledger():
+        ledger = PortfolioLedger(portfolios, surcharges)
+        ledger.open_positions()
+        ledger.totals
+        ledger.strategy_summary
+        ledger.fd_comparison(8.0)
+        return len(ledger.fd_benchmark(8.0))
+
+    return [
+        # 📑 sheet values -> typed frames (snapshot already cached)
+        Case("loader.DataFetcher.fetch", lambda: len(fetcher.fetch("Top_500_Stocks"))),
+        Case("loader.PortfolioManager.load", lambda: sum(len(manager.load(c["portfolio_tab"]))
+                                                         for c in STRATEGY_CONFIG.values())),
+        Case("loader.OHLCReader.read", lambda: len(OHLCReader().read(server, universe.tickers, since=since,
+                                                                     columns=OHLC_COLUMNS))),
+        # 🔎 NSE session filter
+        Case("calendar.filter.frame", lambda: len(calendar.filter(universe.ohlc))),
+        Case("calendar.filter.bars", lambda: len(calendar.filter(bars))),
+        # ✅ analyzers
+        Case("analyzer.SignalAnalyzer", lambda: buy_and_sell(SignalAnalyzer(), dma_buy)),
+        Case("analyzer.ConsolidateAnalyzer", lambda: buy_and_sell(ConsolidateAnalyzer(), tabs["Top_500_Stocks"])),
+        Case("analyzer.TrendingValueAnalyzer", lambda: summary(TrendingValueAnalyzer, tabs["TrendingValueStocks"])),
+        Case("analyzer.GARPAnalyzer", lambda: summary(GARPAnalyzer, tabs["GARPStocks"])),
+        Case("analyzer.Nifty200RSIAnalyzer.cold", lambda a: analyze(a, tabs["Nifty_200"]), rsi_analyzer),
+        Case("analyzer.Nifty200RSIAnalyzer.warm", lambda: analyze(warm_rsi, tabs["Nifty_200"])),
+        Case("analyzer.EarningsGapAnalyzer.cold", lambda a: analyze(a, tabs["Nifty_200"]), gap_analyzer),
+        Case("analyzer.EarningsGapAnalyzer.warm", lambda: analyze(warm_gap, tabs["Nifty_200"])),
+        # 💰 pages 2-4
+        Case("portfolio.ledger", ledger),
+    ]
+
+
+def run_suite(sizes=SIZES, years: int = 1, repeat: int = 3, only: str = None) -> dict:
+    """{"<case>@<tickers>x<years>y": {"best", "median", "rows"}} for every size."""
+    results = {}
+    for n in sizes:
+        began = time.perf_counter()
+        universe = Universe(n, years)
+        with offline(universe, tempfile.mkdtemp(prefix="stockstrategies-bench-")) as (root, server):
+            print(f"▶ {n} tickers x {years}y ({len(universe.ohlc)} bars), setup {time.perf_counter() - began:.1f}s")
+            for case in cases(universe, root, server):
+                if only and only not in case.name:
+                    continue
+                result = case.measure(repeat)
+                results[f"{case.name}@{n}x{years}y"] = result
+                print(f"  {case.name:<40}{result['best'] * 1000:>10.1f}ms  rows={result['rows']}")
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> pd.DataFrame:
+    """Per-case ratio to ``baseline``; ``slower`` when beyond ``tolerance`` and the noise floor."""
+    rows = []
+    for key, r in results.items():
+        base = baseline.get(key)
+        ratio = r["best"] / base["best"] if base and base["best"] > 0 else np.nan
+        slower = bool(base) and ratio > 1 + tolerance and r["best"] - base["best"] > NOISE_FLOOR
+        rows.append({"case": key, "ms": r["best"] * 1000, "baseline ms": base["best"] * 1000 if base else np.nan,
+                     "ratio": ratio, "slower": slower})
+    return pd.DataFrame(rows)
+
+
+def _meta() -> dict:
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+    }
+
+
+def _write(path: str, payload: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f, indent=1)
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Offline benchmark suite over synthetic universes.")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="tickers per universe, comma-separated")
+    parser.add_argument("--years", type=int, default=1, choices=range(1, 6), help="years of daily bars")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", default=None, help="run only cases whose name contains this")
+    parser.add_argument("--baseline", default=os.path.join(RESULTS_DIR, "baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before a case is flagged")
+    args = parser.parse_args(argv)
+
+    results = run_suite([int(s) for s in args.sizes.split(",")], args.years, args.repeat, args.only)
+    payload = {"meta": _meta(), "results": results}
+    _write(os.path.join(RESULTS_DIR, "latest.json"), payload)
+    if args.save_baseline:
+        _write(args.baseline, payload)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    report = compare(results, baseline["results"], args.tolerance)
+    print(f"\nvs baseline of {baseline['meta']['timestamp']} (tolerance {args.tolerance:.0%}):")
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    slower = report[report["slower"]]
+    if len(slower):
+        print(f"\n⚠️ {len(slower)} case(s) slower than the baseline: {', '.join(slower['case'])}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Deterministic synthetic universes for the benchmark suite: daily OHLC for N
+tickers over a number of years of NSE sessions, and the DMA_Data spreadsheet
+tabs (buy tabs, portfolios, surcharges) the strategies read, derived from it.
+
+offline() serves a universe through the local stand-ins (LocalGSpread,
+LocalPostgREST) with every store in a scratch directory, so nothing touches
+the network, secrets or the real .cache.
+"""
+import contextlib
+import os
+import tempfile
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import core.ohlc_store
+import core.telemetry
+from config import STRATEGY_CONFIG
+from core.clients import install_clients, uninstall_clients
+from core.ohlc_reader import LocalPostgREST
+from core.ohlc_store import OHLCStore
+from core.portfolio import SELL_PRICE
+from core.runner import clear_result_cache, latest_ohlc_date
+from core.sheets import LocalGSpread, clear_snapshots
+from core.trading_calendar import get_trading_calendar
+
+SHEET = "DMA_Data"
+BUY_HEADER = ["Ticker", "Current Price", "Yest. Closing", "6 Months Minimum*1.2", "5 DMA", "20 DMA", "50 DMA",
+              "100 DMA", "200 DMA", "52 Week High Date", "52 Week Low Date", "PEG", "Final Rank"]
+PORTFOLIO_HEADER = ["Ticker", "Buy Date", "Buy Price", "Buy Qty", "Current Price", "Sell Date", SELL_PRICE]
+
+
+def _dmy(days: np.ndarray) -> list:
+    return pd.DatetimeIndex(days).strftime("%d/%m/%Y").tolist()
+
+
+class Universe:
+    """
+    ``n_tickers`` random-walk tickers with ``years`` of sessions up to the last
+    session before today (so the analyzers' windows land on it). About a
+    quarter of the tickers gap up on their last bar.
+    """
+
+    def __init__(self, n_tickers: int, years: int = 1, seed: int = 0):
+        self.n_tickers = n_tickers
+        self.years = years
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        calendar = get_trading_calendar()
+        end = calendar.last_session(pd.Timestamp.today() - pd.Timedelta(days=1))
+        self.dates = calendar.sessions(pd.Timestamp(end) - pd.DateOffset(years=years), end)
+        self.symbols = [f"SYM{i:04d}" for i in range(n_tickers)]
+        self.tickers = [f"{s}.NS" for s in self.symbols]
+
+        n_bars = len(self.dates)
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.02, (n_tickers, n_bars)), axis=1))
+        open_ = close * (1 + rng.normal(0, 0.01, close.shape))
+        volume = rng.integers(300_000, 2_000_000, close.shape).astype(float)
+        gappers = rng.random(n_tickers) < 0.25
+        open_[gappers, -1] = close[gappers, -2] * rng.uniform(1.0, 1.06, gappers.sum())
+        close[gappers, -1] = open_[gappers, -1] * rng.uniform(0.99, 1.03, gappers.sum())
+        volume[gappers, -1] *= rng.uniform(1, 2, gappers.sum())
+        self.close = close
+        self.ohlc = pd.DataFrame({
+            "ticker": np.repeat(self.tickers, n_bars),
+            "trade_date": np.tile(self.dates.astype("datetime64[ns]"), n_tickers),
+            "open": open_.ravel(),
+            "high": np.maximum(open_, close).ravel() * 1.01,
+            "low": np.minimum(open_, close).ravel() * 0.99,
+            "close": close.ravel(),
+            "volume": volume.ravel(),
+        })
+        self.peg = rng.uniform(0.3, 6, n_tickers).round(2)
+        self.tabs = self._tabs(rng)
+
+    # -------------------------------
+    # Spreadsheet tabs (rows of cell strings, as Sheets returns them)
+    # -------------------------------
+    def _buy_rows(self) -> list:
+        close = self.close
+        last = close[:, -1]
+
+        def dma(n):
+            return close[:, -n:].mean(axis=1)
+
+        year = close[:, -min(250, close.shape[1]):]
+        high_date = self.dates[close.shape[1] - year.shape[1] + year.argmax(axis=1)]
+        low_date = self.dates[close.shape[1] - year.shape[1] + year.argmin(axis=1)]
+        min_6m = close[:, -min(125, close.shape[1]):].min(axis=1) * 1.2
+        columns = [
+            [f"NSE:{s}" for s in self.symbols], last, close[:, -2], min_6m,
+            dma(5), dma(20), dma(50), dma(100), dma(200),
+            _dmy(high_date), _dmy(low_date), self.peg, np.arange(1, self.n_tickers + 1),
+        ]
+        cells = [c if isinstance(c, list) else [f"{v:.2f}" if isinstance(v, float) else str(v) for v in c.tolist()]
+                 for c in columns]
+        return [list(row) for row in zip(*cells)]
+
+    def _portfolio_rows(self, rng, n_lots: int) -> list:
+        i = rng.integers(0, self.n_tickers, n_lots)
+        n_bars = len(self.dates)
+        buy = rng.integers(0, max(n_bars - 1, 1), n_lots)
+        sell = np.minimum(buy + rng.integers(1, 120, n_lots), n_bars - 1)
+        sold = rng.random(n_lots) < 0.6
+        buy_price = self.close[i, buy]
+        rows = zip(
+            [f"NSE:{self.symbols[k]}" for k in i], _dmy(self.dates[buy]), buy_price.round(2).tolist(),
+            rng.integers(1, 50, n_lots).tolist(), self.close[i, -1].round(2).tolist(),
+            _dmy(self.dates[sell]), self.close[i, sell].round(2).tolist(), sold.tolist(),
+        )
+        return [[t, b, str(p), str(q), str(c), s if is_sold else "", str(sp) if is_sold else ""]
+                for t, b, p, q, c, s, sp, is_sold in rows]
+
+    def _tabs(self, rng) -> dict:
+        buy = self._buy_rows()
+        n = self.n_tickers
+        # index tabs cut from the universe; the broad ones (RSI, gap, consolidation) take all of it
+        cuts = {
+            "Nifty_50": buy[:50], "Nifty_200": buy, "NiftyMidSmallCap_400": buy[50:], "Bank_Nifty": buy[:12],
+            "Top_500_Stocks": buy, "TrendingValueStocks": buy[:50], "GARPStocks": buy[50:100],
+        }
+        tabs = {tab: [BUY_HEADER] + rows for tab, rows in cuts.items()}
+        for config in STRATEGY_CONFIG.values():
+            tabs[config["portfolio_tab"]] = [PORTFOLIO_HEADER] + self._portfolio_rows(rng, max(n // 4, 20))
+        tabs["Surcharges"] = [["Date", "Type", "Charges", "Strategy"]] + [
+            [_dmy(self.dates[[k]])[0], "Brokerage", f"{v:.2f}", name]
+            for k, v, name in zip(rng.integers(0, len(self.dates), 40), rng.uniform(5, 200, 40),
+                                  np.resize(list(STRATEGY_CONFIG), 40))
+        ]
+        return tabs
+
+    def remote_window(self, sessions: int = 90) -> pd.DataFrame:
+        """The recent bars Supabase would serve to a sync."""
+        return self.ohlc[self.ohlc["trade_date"] >= np.datetime64(self.dates[-sessions], "ns")]
+
+
+@contextlib.contextmanager
+def offline(universe: Universe, root: str = None, preload: bool = True):
+    """
+    Serve ``universe`` through local clients, with the process-wide OHLC store
+    in ``root`` (a fresh temp dir by default) and telemetry files off. With
+    ``preload`` the store already holds the full history, as after a sync.
+    Yields (root, LocalPostgREST).
+    """
+    root = root or tempfile.mkdtemp(prefix="stockstrategies-bench-")
+    server = LocalPostgREST({"ohlc_data": universe.remote_window()})
+    store = OHLCStore(os.path.join(root, "ohlc"))
+    if preload:
+        store.write_many((ticker, rows, True, str(universe.dates[0]))
+                         for ticker, rows in universe.ohlc.groupby("ticker", sort=False))
+
+    install_clients(gspread=LocalGSpread({SHEET: universe.tabs}), supabase=server)
+    patches = [
+        mock.patch.object(core.ohlc_store, "_default_store", store),
+        mock.patch.object(core.telemetry, "_default_telemetry", core.telemetry.Telemetry(log_path=None, prom_path=None)),
+    ]
+    for p in patches:
+        p.start()
+    clear_snapshots()
+    clear_result_cache()
+    latest_ohlc_date.clear()
+    try:
+        yield root, server
+    finally:
+        for p in patches:
+            p.stop()
+        uninstall_clients()
+        clear_snapshots()
+        clear_result_cache()
+        latest_ohlc_date.clear()
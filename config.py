@@ -1,47 +1,55 @@
-from core.analyzers import SignalAnalyzer, ConsolidateAnalyzer, TrendingValueAnalyzer, GARPAnalyzer, Nifty200RSIAnalyzer, EarningsGapAnalyzer
-
+from core.rules import CONSOLIDATE_RULE, GAP_RULE, RSI_RULE
+from core.sheets import register_tabs
 
+# Analyzers are named, and imported on first use (core.registry)
 STRATEGY_CONFIG = {
     "DMA": {
         "sheet_name": "DMA_Data",
         "portfolio_tab": "Portfolio_DMA",
         "buy_tabs": ["Nifty_50", "Nifty_200", "NiftyMidSmallCap_400", "Bank_Nifty"],
-        "analyzer_class": SignalAnalyzer,
+        "analyzer": "SignalAnalyzer",
         "sell_threshold_pct": 12
     },
     "Consolidate_500_Stocks": {
         "sheet_name": "DMA_Data",
         "portfolio_tab": "Portfolio_500",
         "buy_tabs": ["Top_500_Stocks"],
-        "analyzer_class": ConsolidateAnalyzer,
+        "analyzer": "ConsolidateAnalyzer",
+        "rule": CONSOLIDATE_RULE,
         "sell_threshold_pct": 12
     },
     "TrendingValue": {
         "sheet_name": "DMA_Data",
         "portfolio_tab": "Portfolio_TrendingValue",
         "buy_tabs": ["TrendingValueStocks"],
-        "analyzer_class": TrendingValueAnalyzer,
+        "analyzer": "TrendingValueAnalyzer",
         "sell_threshold_pct": 12
     },
     "GARP": {
         "sheet_name": "DMA_Data",
         "portfolio_tab": "Portfolio_GARP",
         "buy_tabs": ["GARPStocks"],
-        "analyzer_class": GARPAnalyzer,
+        "analyzer": "GARPAnalyzer",
         "sell_threshold_pct": 12
     },
     "Nifty200_RSI": {
         "sheet_name": "DMA_Data",
         "portfolio_tab": "Portfolio_RSI",
         "buy_tabs": ["Nifty_200"],
-        "analyzer_class": Nifty200RSIAnalyzer,
+        "analyzer": "Nifty200RSIAnalyzer",
+        "rule": RSI_RULE,
         "sell_threshold_pct": 12
     },
     "EarningsGap": {
         "sheet_name": "DMA_Data",
         "portfolio_tab": "Portfolio_GapUp",
         "buy_tabs": ["Nifty_200"],
-        "analyzer_class": EarningsGapAnalyzer,
+        "analyzer": "EarningsGapAnalyzer",
+        "rule": GAP_RULE,
         "sell_threshold_pct": 12
     }
-}
\ No newline at end of file
+}
+
+# 📑 Every tab the strategies read, so one batched request snapshots them all
+for _strategy in STRATEGY_CONFIG.values():
+    register_tabs(_strategy["sheet_name"], _strategy["buy_tabs"] + [_strategy["portfolio_tab"], "Surcharges"])
@@ -1,70 +1,134 @@
+import json
+import logging
+import numpy as np
 import pandas as pd
 from datetime import datetime
-import time
-from core.columns import col
-import yfinance as yf
-import requests
-from bs4 import BeautifulSoup
-from concurrent.futures import ThreadPoolExecutor
-from supabase import create_client
-import os
-import json
-
-
-# 🔎 Load holiday JSON once at module level
-HOLIDAY_FILE = os.path.join(os.path.dirname(__file__), "..", "pages", "nse_holidays.json")
-try:
-    with open(HOLIDAY_FILE, "r") as f:
-        NSE_HOLIDAYS = json.load(f)
-except FileNotFoundError:
-    NSE_HOLIDAYS = {}  # fallback if file missing
-
-def filter_trading_days(df: pd.DataFrame) -> pd.DataFrame:
-    """Drop weekends and NSE holidays automatically."""
-    df["trade_date"] = pd.to_datetime(df["trade_date"])
-    # Drop weekends
-    df = df[df["trade_date"].dt.dayofweek < 5]
-    # Drop NSE holidays
-    years = df["trade_date"].dt.year.unique()
-    all_holidays = []
-    for y in years:
-        all_holidays.extend(NSE_HOLIDAYS.get(str(y), []))
-    if all_holidays:
-        holidays = pd.to_datetime(all_holidays)
-        df = df[~df["trade_date"].isin(holidays)]
-    return df
+from core.clients import get_supabase_client
+from core.columns import col, normalize_ticker
+from core.indicators import wilder_rsi_segments
+from core.fundamentals import get_peg_cache
+from core.rules import CONSOLIDATE_RULE, GAP_RULE, RSI_RULE, gap_entries_2d
+from core.rsi_state import get_rsi_state
+from core.signal_state import get_signal_store
+from core.trading_calendar import get_trading_calendar
+from core.ohlc_bars import PRICE_DTYPE, OHLCBars, as_bars
+from core.ohlc_store import get_ohlc_store
+from core.telemetry import span
+
+log = logging.getLogger(__name__)
+
+
+def fetch_ohlc_window(client, tickers: list, sessions: int = 60) -> pd.DataFrame:
+    """Last ``sessions`` NSE sessions of OHLC for ``tickers``: syncs new bars into the local store, then reads it."""
+    start = get_trading_calendar().window_start(sessions)
+    store = get_ohlc_store()
+    store.sync(client, tickers, start=start)
+    return store.read(tickers, start=start)
+
+def fetch_ohlc_bars(client, tickers: list, sessions: int = 60, dtype=PRICE_DTYPE) -> OHLCBars:
+    """fetch_ohlc_window() as compact OHLCBars (float32 prices unless ``dtype`` says otherwise)."""
+    with span("ohlc.fetch_bars", tickers=len(tickers), sessions=sessions) as s:
+        start = get_trading_calendar().window_start(sessions)
+        store = get_ohlc_store()
+        store.sync(client, tickers, start=start)
+        bars = store.read_bars(tickers, start=start, dtype=dtype)
+        s.set(rows=len(bars), bytes=bars.nbytes)
+        return bars
+
+def slice_ohlc_window(ohlc, tickers: list, sessions: int = 60):
+    """The ``tickers`` / last ``sessions`` sessions part of already-fetched OHLC (frame or OHLCBars)."""
+    cutoff = pd.Timestamp(get_trading_calendar().window_start(sessions))
+    if isinstance(ohlc, OHLCBars):
+        return ohlc.select(tickers, start=cutoff)
+    return ohlc[ohlc["ticker"].isin(tickers) & (ohlc["trade_date"] >= cutoff)].copy()
+
+def earnings_gap_screen(ohlc, peg: pd.Series, rule: dict = None) -> pd.DataFrame:
+    """
+    The EarningsGap conditions on every ticker's latest bar at once.
+
+    ``ohlc`` is OHLCBars (a long frame is converted once). Each ticker's bars
+    are contiguous, so its last and previous bar, trailing volume mean and
+    return are read at offsets from its last row; the conditions themselves
+    are gap_entries_2d, the backtest's kernel. ``peg`` is indexed by ticker.
+    Returns one row per ticker: trade_date, rsi, peg, signal.
+    """
+    rule = {**GAP_RULE, **(rule or {})}
+    bars = as_bars(ohlc)
+    if not len(bars):
+        return pd.DataFrame({"trade_date": pd.Series(dtype="datetime64[ns]"), "rsi": pd.Series(dtype=float),
+                             "peg": pd.Series(dtype=float), "signal": pd.Series(dtype=bool)},
+                            index=pd.Index([], name="ticker"))
+    last, lengths = bars.offsets[1:] - 1, bars.lengths
+
+    def at(values, lag=0):
+        """``values`` ``lag`` bars before each ticker's last bar (NaN past its history)."""
+        return np.where(lengths > lag, values[np.maximum(last - lag, 0)], np.nan)
+
+    close = bars.close.astype(np.float64)
+    volume = bars.float_volume()
+    window = rule["volume_window"]
+    tail = np.maximum(last[:, None] - np.arange(window)[None, :], 0)
+    with span("rsi.segments", rows=len(close), tickers=len(bars.symbols)):
+        rsi = wilder_rsi_segments(close, bars.starts, rule["rsi_period"])[last]
+    features = {
+        "open": at(bars.open.astype(np.float64)),
+        "low": at(bars.low.astype(np.float64)),
+        "close": at(close),
+        "volume": at(volume),
+        "prev_close": at(close, 1),
+        # pandas rolling(window).mean(): NaN unless ``window`` valid bars
+        "avg_volume": np.where(lengths >= window, volume[tail].mean(axis=1), np.nan),
+        "ret": at(close) / at(close, rule["return_window"]) - 1,
+        "rsi": rsi,
+    }
+    peg = peg.reindex(bars.symbols).to_numpy(dtype=np.float64)
+    signal = gap_entries_2d({k: v[:, None] for k, v in features.items()}, rule, peg)[:, 0]
+    return pd.DataFrame({
+        "trade_date": bars.dates[bars.session[last]].astype("datetime64[ns]"),
+        "rsi": features["rsi"],
+        "peg": peg,
+        "signal": signal,
+    }, index=pd.Index(bars.symbols, name="ticker"))
+
+def _parse_peg(df: pd.DataFrame) -> list:
+    """Sheet PEG values rounded to 2 dp, or "NA" where missing or unparseable."""
+    if col("PEG") not in df.columns:
+        return ["NA"] * len(df)
+    peg = pd.to_numeric(df[col("PEG")], errors="coerce")
+    return [round(v, 2) if pd.notna(v) else "NA" for v in peg.tolist()]
 
 class SignalAnalyzer:
-    def __init__(self, sell_threshold_pct=12):
+    def __init__(self, sell_threshold_pct=12, **kwargs):
         self.signal_log = []
         self.sell_threshold_pct = sell_threshold_pct
 
     def analyze_buy(self, df):
         df = df.dropna(subset=[col("current_price"), col("dma_100"), col("min_6m"), col("last_close")])
 
-        for _, row in df.iterrows():
-            if row[col("current_price")] > row[col("dma_100")] and \
-               row[col("current_price")] > row[col("min_6m")] and \
-               row[col("last_close")] < row[col("dma_100")]:
-
-                signal = {
-                    "Date": datetime.today().date(),
-                    "Ticker": row[col("ticker")],
-                    "Signal": "BUY",
-                    "Price": round(float(row[col("current_price")]), 2)
-                }
-
-                # ✅ Add PEG with fallback for #NA, N/A, etc.
-                peg_raw = row.get(col("PEG"), None)
-                try:
-                    peg_val = float(peg_raw)
-                    signal["PEG"] = round(peg_val, 2)
-                except (ValueError, TypeError):
-                    signal["PEG"] = "NA"
+        price = df[col("current_price")]
+        dma_100 = df[col("dma_100")]
+        mask = (price > dma_100) & (price > df[col("min_6m")]) & (df[col("last_close")] < dma_100)
 
-                self.signal_log.append(signal)
+        self._log_buy_signals(df[mask])
 
+    def _log_buy_signals(self, hits):
+        """Append one BUY signal per row of ``hits`` to the signal log in a single pass."""
+        if hits.empty:
+            return
 
+        today = datetime.today().date()
+        # ✅ PEG parsed once per column, with fallback for #NA, N/A, etc.
+        pegs = _parse_peg(hits)
+        self.signal_log.extend(
+            {
+                "Date": today,
+                "Ticker": ticker,
+                "Signal": "BUY",
+                "Price": round(float(price), 2),
+                "PEG": peg
+            }
+            for ticker, price, peg in zip(hits[col("ticker")], hits[col("current_price")], pegs)
+        )
 
     def analyze_sell(self, df):
         if df.empty or col("sell_date") not in df.columns:
@@ -92,34 +156,28 @@ class SignalAnalyzer:
                 })
 
 class ConsolidateAnalyzer(SignalAnalyzer):
+    def __init__(self, sell_threshold_pct=12, rule=None, **kwargs):
+        super().__init__(sell_threshold_pct)
+        # thresholds: CONSOLIDATE_RULE, with per-strategy overrides from config
+        self.rule = {**CONSOLIDATE_RULE, **(rule or {})}
+
     def analyze_buy(self, df):
+        dma_cols = [col(f"dma_{d}") for d in self.rule["dma_periods"]]
         df = df.dropna(subset=[
-            col("ticker"), col("current_price"), col("high_52w_date"), col("low_52w_date"),
-            col("dma_5"), col("dma_20"), col("dma_50"), col("dma_100"), col("dma_200")
+            col("ticker"), col("current_price"), col("high_52w_date"), col("low_52w_date"), *dma_cols
         ])
-        for _, row in df.iterrows():
-            price = row[col("current_price")]
-            dma_vals = [row[col(f"dma_{d}")] for d in [5, 20, 50, 100, 200]]
-            high_date = pd.to_datetime(row[col("high_52w_date")], errors="coerce", dayfirst=True)
-            low_date = pd.to_datetime(row[col("low_52w_date")], errors="coerce", dayfirst=True)
-
-            if pd.notna(high_date) and pd.notna(low_date) and high_date < low_date:
-                if all(0.95 * price < val < 1.05 * price for val in dma_vals):
-                    signal={
-                        "Date": datetime.today().date(),
-                        "Ticker": row[col("ticker")],
-                        "Signal": "BUY",
-                        "Price": round(float(price), 2)
-                    }
-                    # ✅ Add PEG with fallback for #NA, N/A, etc.
-                    peg_raw = row.get(col("PEG"), None)
-                    try:
-                        peg_val = float(peg_raw)
-                        signal["PEG"] = round(peg_val, 2)
-                    except (ValueError, TypeError):
-                        signal["PEG"] = "NA"
-
-                    self.signal_log.append(signal)
+        price = df[col("current_price")]
+        # format="mixed" parses each cell on its own, like the per-row to_datetime it replaces
+        high_date = pd.to_datetime(df[col("high_52w_date")], errors="coerce", dayfirst=True, format="mixed")
+        low_date = pd.to_datetime(df[col("low_52w_date")], errors="coerce", dayfirst=True, format="mixed")
+
+        band = self.rule["band_pct"] / 100
+        mask = high_date.notna() & low_date.notna() & (high_date < low_date)
+        for c in dma_cols:
+            dma = df[c]
+            mask &= ((1 - band) * price < dma) & (dma < (1 + band) * price)
+
+        self._log_buy_signals(df[mask])
 
 class TrendingValueAnalyzer:
     def __init__(self, **kwargs):
@@ -187,17 +245,27 @@ class GARPAnalyzer:
 
 
 class Nifty200RSIAnalyzer:
-    def __init__(self, sell_threshold_pct=12, **kwargs):
+    uses_ohlc = True
+    ohlc_sessions = 60
+
+    def __init__(self, sell_threshold_pct=12, peg_cache=None, rule=None, rsi_state=None, client=None, **kwargs):
         self.sell_threshold_pct = sell_threshold_pct
+        # thresholds: RSI_RULE, with per-strategy overrides from config
+        self.rule = {**RSI_RULE, **(rule or {})}
+        # Persisted per-ticker RSI/cycle state, advanced bar by bar
+        self.rsi_state = rsi_state or get_rsi_state(self.rule)
         self.signal_log = []
         self.analysis_df = pd.DataFrame()
         self.active_signals = {}
-        # Supabase client created only here, not in runner
-        import streamlit as st
-        from supabase import create_client
-        url = st.secrets["supabase"]["url"]
-        key = st.secrets["supabase"]["key"]
-        self.supabase = create_client(url, key)
+        self.peg_cache = peg_cache or get_peg_cache()
+        # Pre-fetched OHLC shared between strategies (see run_all); None reads the store
+        self.ohlc = None
+        # OHLC client; None uses the shared, process-wide one of the data source
+        self.client = client
+
+    @property
+    def supabase(self):
+        return self.client if self.client is not None else get_supabase_client()
 
     def _detect_ticker_column(self, df: pd.DataFrame) -> str:
         for c in ["Ticker","ticker","Symbol","symbol","Instrument","instrument"]:
@@ -208,75 +276,57 @@ class Nifty200RSIAnalyzer:
                 return c
         raise KeyError("No ticker column found in buy_df")
 
-    def _fetch_ohlc_for_tickers(self, tickers: list, days: int = 90) -> pd.DataFrame:
-        from datetime import timedelta
-        cutoff = (datetime.today() - timedelta(days=days)).date().isoformat()
-        frames = []
-        CHUNK = 100
-        for i in range(0, len(tickers), CHUNK):
-            batch = tickers[i:i+CHUNK]
-            resp = (
-                self.supabase.table("ohlc_data")
-                .select("*")
-                .in_("ticker", batch)
-                .gte("trade_date", cutoff)
-                .execute()
-            )
-            data = getattr(resp, "data", [])
-            if data:
-                frames.append(pd.DataFrame(data))
-        if not frames:
-            return pd.DataFrame(columns=["ticker","trade_date","open","high","low","close","volume"])
-        df = pd.concat(frames, ignore_index=True)
-        df["trade_date"] = pd.to_datetime(df["trade_date"], errors="coerce")
-        for c in ["open","high","low","close","volume"]:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
-        return df
-
-    def compute_rsi_wilder(self, series: pd.Series, period: int = 14) -> pd.Series:
-        """Compute RSI using Wilder's smoothing method."""
-        if series is None or series.empty or series.shape[0] < period + 1:
-            return pd.Series([None] * series.shape[0], index=series.index)
-
-        delta = series.diff()
-        gain = delta.clip(lower=0)
-        loss = -delta.clip(upper=0)
-
-        avg_gain = gain.iloc[1:period+1].mean()
-        avg_loss = loss.iloc[1:period+1].mean()
-
-        rsi_values = [None] * len(series)
-
-        for i in range(period+1, len(series)):
-            avg_gain = (avg_gain * (period - 1) + gain.iloc[i]) / period
-            avg_loss = (avg_loss * (period - 1) + loss.iloc[i]) / period
-
-            if avg_loss == 0:
-                rsi = 100
-            else:
-                rs = avg_gain / avg_loss
-                rsi = 100 - (100 / (1 + rs))
-
-            rsi_values[i] = rsi
-
-        return pd.Series(rsi_values, index=series.index)
+    def ohlc_tickers(self, buy_df: pd.DataFrame) -> list:
+        """Normalized (Yahoo/Supabase) symbols of the buy tab, in sheet order."""
+        ticker_col = self._detect_ticker_column(buy_df)
+        raw_tickers = buy_df[ticker_col].astype(str).str.strip().dropna().unique().tolist()
+        return list(dict.fromkeys(normalize_ticker(t) for t in raw_tickers))
 
+    def _update_rsi_states(self, tickers: list) -> dict:
+        """
+        Bring the persisted RSI state of ``tickers`` up to their newest stored bar:
+        one O(1) step per new bar, a full recompute only for changed histories.
+        """
+        store = get_ohlc_store()
+        calendar = get_trading_calendar()
+        window = calendar.window_start(self.ohlc_sessions)
+        if self.ohlc is None:
+            # run_all has already synced the store for its shared window
+            store.sync(self.supabase, tickers, start=window)
+        with span("rsi.update", tickers=len(tickers)) as s:
+            sources = store.meta(tickers)
+            recompute, extend = self.rsi_state.plan(sources)
+            s.set(recomputed=len(recompute), extended=len(extend),
+                  cache="miss" if recompute or extend else "hit")
+            columns = ["close"]
+            if recompute:
+                # 🔎 Only NSE sessions, from each ticker's seed (new tickers: this window's start)
+                since = min(map(pd.Timestamp, [window, *self.rsi_state.seeds(recompute).values()]))
+                self.rsi_state.recompute(
+                    calendar.filter(store.read_bars(recompute, start=since, columns=columns)), sources, start=window)
+            if extend:
+                since = pd.Timestamp(min(extend.values())) + pd.Timedelta(days=1)
+                self.rsi_state.extend(calendar.filter(store.read_bars(list(extend), start=since, columns=columns)))
+            if recompute or extend:
+                self.rsi_state.save()
+            return self.rsi_state.get_many(tickers)
 
     def identify_buy_signals(self, df: pd.DataFrame) -> list:
         """Identify BUY signals based on RSI cycle rules."""
         buy_points = []
         dipped = False
+        dip, cross, clear = self.rule["dip"], self.rule["cross"], self.rule["clear"]
 
         for i in range(1, len(df)):
             rsi_prev, rsi_now = df["rsi"].iloc[i-1], df["rsi"].iloc[i]
             if pd.isna(rsi_prev) or pd.isna(rsi_now):
                 continue
 
-            if rsi_now <= 35:
+            if rsi_now <= dip:
                 dipped = True
-            if rsi_now >= 55:
+            if rsi_now >= clear:
                 dipped = False
-            if dipped and rsi_prev < 40 and rsi_now >= 40:
+            if dipped and rsi_prev < cross and rsi_now >= cross:
                 buy_points.append((df["trade_date"].iloc[i], rsi_now))
 
         return buy_points
@@ -286,22 +336,11 @@ class Nifty200RSIAnalyzer:
     # -------------------------------
     def fetch_peg_ratio(self, ticker: str):
         """
-        Fetch PEG ratio using yFinance.
+        PEG ratio for one ticker from the shared PEG cache.
         PEG = PE / Earnings Growth
         Returns None if data unavailable.
         """
-        try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            pe = info.get("trailingPE")
-            growth = info.get("earningsGrowth")
-
-            if pe is None or growth is None or growth == 0:
-                return None
-
-            return round(pe / growth, 2)
-        except Exception:
-            return None
+        return self.peg_cache.get(ticker)
 
 
     def highlight_peg(self, val):
@@ -318,69 +357,31 @@ class Nifty200RSIAnalyzer:
             self.analysis_df = pd.DataFrame(columns=["Ticker","RSI","Signal","PEG","Status","Last date"])
             return
 
-        ticker_col = self._detect_ticker_column(buy_df)
-        raw_tickers = buy_df[ticker_col].astype(str).str.strip().dropna().unique().tolist()
-
-        normalized = []
-        for t in raw_tickers:
-            tt = t.upper()
-            if tt.startswith("NSE:"):
-                tt = tt.split("NSE:")[1] + ".NS"
-            elif not tt.endswith(".NS"):
-                tt = tt + ".NS"
-            normalized.append(tt)
-
-        ohlc = self._fetch_ohlc_for_tickers(normalized, days=90)
-        if ohlc.empty:
+        normalized = self.ohlc_tickers(buy_df)
+        states = self._update_rsi_states(normalized)
+        # tickers with a warmed-up RSI, in ticker order
+        keep = sorted(t for t, st in states.items() if st["rsi"] is not None)
+        if not keep:
             self.analysis_df = pd.DataFrame(columns=["Ticker","RSI","Signal","Status","Last date"])
             return
 
-        # 🔎 Filter trading days automatically
-        ohlc = filter_trading_days(ohlc)
+        # ✅ PEG for every kept ticker in one cached bulk lookup
+        pegs = self.peg_cache.get_many(keep)
 
         results = []
-        for ticker in sorted(ohlc["ticker"].dropna().unique()):
-            sub = ohlc[ohlc["ticker"] == ticker].dropna(subset=["trade_date","close"]).sort_values("trade_date")
-            sub["rsi"] = self.compute_rsi_wilder(sub["close"], period=14)
-            buy_points = self.identify_buy_signals(sub)
-
-            recent = sub.tail(30)
+        for ticker in keep:
+            state = states[ticker]
+            # Active latches on a trigger and holds until RSI reaches the clear level
+            active = state["active"]
+            self.active_signals[ticker] = active
 
-            if recent.empty or recent["rsi"].isna().all():
-                continue
-
-            latest_rsi = recent["rsi"].iloc[-1]
-            status = "Active" if self.active_signals.get(ticker, False) else "Inactive"
-
-            # --- Clear condition ---
-            if latest_rsi >= 55:
-                self.active_signals[ticker] = False
-                status = "Inactive"
-
-            # --- Trigger condition ---
-            dipped_points = recent[recent["rsi"] <= 35]
-            if not dipped_points.empty:
-                dip_index = dipped_points.index[-1]  # last dip
-                after_dip = recent.loc[dip_index:]
-
-                crossed_40 = (after_dip["rsi"] >= 40).any()
-                blocked = (after_dip["rsi"] >= 45).any()
-
-                if crossed_40 and not blocked:
-                    if not self.active_signals.get(ticker, False):
-                        self.active_signals[ticker] = True
-                        status = "Active"
-
-            # ✅ Append PEG here
-            peg_val = self.fetch_peg_ratio(ticker)
-            
             results.append({
                 "Ticker": ticker,
-                "RSI": round(latest_rsi, 2) if pd.notna(latest_rsi) else None,
-                "PEG": peg_val,
-                "Signal": "BUY" if self.active_signals.get(ticker, False) else "",
-                "Status": status,
-                "Last date": recent["trade_date"].iloc[-1].date().isoformat()
+                "RSI": round(state["rsi"], 2),
+                "PEG": pegs[ticker],
+                "Signal": "BUY" if active else "",
+                "Status": "Active" if active else "Inactive",
+                "Last date": state["last_date"]
             })
 
         self.analysis_df = pd.DataFrame(results)
@@ -396,17 +397,27 @@ class Nifty200RSIAnalyzer:
         return self.analysis_df.copy().sort_values(["Status","Ticker"], ascending=[False,True])
 
 class EarningsGapAnalyzer:
-    def __init__(self, **kwargs):
+    uses_ohlc = True
+    ohlc_sessions = 60
+
+    strategy = "EarningsGap"
+
+    def __init__(self, rule=None, signals=None, client=None, **kwargs):
         self.signal_log = []
         self.analysis_df = pd.DataFrame()
         self.active_signals = {}
-
-        # Supabase client (same as Nifty200RSIAnalyzer)
-        import streamlit as st
-        from supabase import create_client
-        url = st.secrets["supabase"]["url"]
-        key = st.secrets["supabase"]["key"]
-        self.supabase = create_client(url, key)
+        # thresholds: GAP_RULE, with per-strategy overrides from config
+        self.rule = {**GAP_RULE, **(rule or {})}
+        # Durable per-ticker signal state: last evaluated bar and result
+        self.signals = signals or get_signal_store()
+        # Pre-fetched OHLC shared between strategies (see run_all); None reads the store
+        self.ohlc = None
+        # OHLC client; None uses the shared, process-wide one of the data source
+        self.client = client
+
+    @property
+    def supabase(self):
+        return self.client if self.client is not None else get_supabase_client()
 
     # --- Detect ticker column ---
     def _detect_ticker_column(self, df: pd.DataFrame) -> str:
@@ -419,61 +430,38 @@ class EarningsGapAnalyzer:
                 return c
         raise KeyError("No ticker column found in DataFrame")
 
-    # --- Fetch OHLC from Supabase ---
-    def _fetch_ohlc_for_tickers(self, tickers: list, days: int = 90) -> pd.DataFrame:
-        from datetime import datetime, timedelta
-        cutoff = (datetime.today() - timedelta(days=days)).date().isoformat()
-        frames = []
-        CHUNK = 100
-        for i in range(0, len(tickers), CHUNK):
-            batch = tickers[i:i+CHUNK]
-            start = 0
-            page_size = 1000
-            while True:
-                resp = (
-                    self.supabase.table("ohlc_data")
-                    .select("*")
-                    .in_("ticker", batch)
-                    .gte("trade_date", cutoff)
-                    .range(start, start + page_size - 1)
-                    .execute()
-                )
-                data = getattr(resp, "data", [])
-                if not data:
-                    break
-                frames.append(pd.DataFrame(data))
-                # If fewer than page_size rows returned, we’re done
-                if len(data) < page_size:
-                    break
-                start += page_size
-        if not frames:
-            return pd.DataFrame(columns=["ticker","trade_date","open","high","low","close","volume"])
-        df = pd.concat(frames, ignore_index=True)
-        df["trade_date"] = pd.to_datetime(df["trade_date"], errors="coerce")
-        for c in ["open","high","low","close","volume"]:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
-        return df
-
-    # --- RSI helper ---
-    def compute_rsi_wilder(self, series: pd.Series, period: int = 14) -> pd.Series:
-        if series is None or series.empty or series.shape[0] < period + 1:
-            return pd.Series([None] * series.shape[0], index=series.index)
-        delta = series.diff()
-        gain = delta.clip(lower=0)
-        loss = -delta.clip(upper=0)
-        avg_gain = gain.iloc[1:period+1].mean()
-        avg_loss = loss.iloc[1:period+1].mean()
-        rsi_values = [None] * len(series)
-        for i in range(period+1, len(series)):
-            avg_gain = (avg_gain * (period - 1) + gain.iloc[i]) / period
-            avg_loss = (avg_loss * (period - 1) + loss.iloc[i]) / period
-            if avg_loss == 0:
-                rsi = 100
+    def ohlc_tickers(self, buy_df: pd.DataFrame) -> list:
+        """Normalized (Yahoo/Supabase) symbols of the buy tab, in sheet order."""
+        ticker_col = self._detect_ticker_column(buy_df)
+        raw_tickers = buy_df[ticker_col].astype(str).str.strip().dropna().unique().tolist()
+        return list(dict.fromkeys(normalize_ticker(t) for t in raw_tickers))
+
+    # --- Fetch OHLC (local store, synced from Supabase) ---
+    def _sync_ohlc(self, tickers: list, sessions: int = 60) -> dict:
+        """Bring the store up to date for ``tickers``; returns their OHLCStore.meta()."""
+        store = get_ohlc_store()
+        if self.ohlc is None:
+            # run_all has already synced the store for its shared window
+            store.sync(self.supabase, tickers, start=get_trading_calendar().window_start(sessions))
+        return store.meta(tickers)
+
+    def _fetch_ohlc_for_tickers(self, tickers: list, sessions: int = 60) -> OHLCBars:
+        """The window's bars of ``tickers`` from the store (synced by _sync_ohlc)."""
+        # cache hit: a slice of the window run_all already fetched
+        with span("analyzer.fetch_ohlc", tickers=len(tickers), cache="hit" if self.ohlc is not None else "miss") as s:
+            if self.ohlc is not None:
+                bars = as_bars(slice_ohlc_window(self.ohlc, tickers, sessions))
             else:
-                rs = avg_gain / avg_loss
-                rsi = 100 - (100 / (1 + rs))
-            rsi_values[i] = rsi
-        return pd.Series(rsi_values, index=series.index)
+                bars = get_ohlc_store().read_bars(tickers, start=get_trading_calendar().window_start(sessions))
+            s.set(rows=len(bars))
+            return bars
+
+    def _peg_index(self, buy_df: pd.DataFrame) -> pd.Series:
+        """Sheet PEG by normalized ticker (first parseable value per ticker)."""
+        if "PEG" not in buy_df.columns:
+            return pd.Series(dtype=float)
+        tickers = buy_df[self._detect_ticker_column(buy_df)].map(normalize_ticker).to_numpy()
+        return pd.to_numeric(buy_df["PEG"], errors="coerce").groupby(tickers).first()
 
     def highlight_peg(self, val):
         try:
@@ -491,79 +479,75 @@ class EarningsGapAnalyzer:
             ])
             return
 
-        ticker_col = self._detect_ticker_column(buy_df)
-        raw_tickers = buy_df[ticker_col].astype(str).str.strip().dropna().unique().tolist()
-
-        # Normalize tickers
-        normalized = []
-        for t in raw_tickers:
-            tt = t.upper()
-            if tt.startswith("NSE:"):
-                tt = tt.split("NSE:")[1] + ".NS"
-            elif not tt.endswith(".NS"):
-                tt = tt + ".NS"
-            normalized.append(tt)
-
-        # Fetch OHLC
-        ohlc = self._fetch_ohlc_for_tickers(normalized, days=90)
-        if ohlc.empty:
-            print("DEBUG: No OHLC data fetched from Supabase")
+        normalized = self.ohlc_tickers(buy_df)
+
+        # 📑 Sheet PEG indexed by ticker once; looked up by reindex, not merged into the bars
+        peg_by_ticker = self._peg_index(buy_df)
+
+        # 📦 Tickers whose last stored bar, stored history and PEG are unchanged since
+        # the last run keep their stored result, decided from the store's manifest
+        # before any bars are read; only the rest are read and evaluated
+        sources = self._sync_ohlc(normalized, sessions=self.ohlc_sessions)
+        window = get_trading_calendar().window_start(self.ohlc_sessions).isoformat()
+        last_bars = pd.Series({t: m["last"] for t, m in sources.items() if m["last"] >= window}, dtype=object)
+        states = self.signals.load(self.strategy, normalized)
+        rule_key = json.dumps(self.rule, sort_keys=True)
+
+        def state_key(ticker):
+            peg = peg_by_ticker.get(ticker)
+            return {"rule": rule_key, "revision": sources.get(ticker, {}).get("revision"),
+                    "peg": None if peg is None or pd.isna(peg) else float(peg)}
+
+        fresh = {
+            t: st["payload"].get("result") for t, st in states.items()
+            if t in last_bars.index and st["last_bar"] == last_bars[t] and st["payload"].get("key") == state_key(t)
+        }
+        stale = [t for t in normalized if t in last_bars.index and t not in fresh]
+        ohlc = self._fetch_ohlc_for_tickers(stale, sessions=self.ohlc_sessions)
+        if not fresh and not len(ohlc):
+            log.warning("EarningsGap: no stored OHLC bars in the last %d sessions for %d tickers",
+                        self.ohlc_sessions, len(normalized))
             self.analysis_df = pd.DataFrame(columns=[
                 "Ticker","RSI","PEG","Signal","Entry Date","Exit Date","Status","Reason"
             ])
             return
-        
-        # Merge PEG from buy_df (sheet) into OHLC
-        if "PEG" in buy_df.columns:
-            peg_map = buy_df[[ticker_col, "PEG"]].copy()
-            peg_map["ticker"] = peg_map[ticker_col].str.upper().str.replace("NSE:", "") + ".NS"
-            ohlc = ohlc.merge(peg_map[["ticker","PEG"]], on="ticker", how="left")
-            ohlc.rename(columns={"PEG": "peg_ratio"}, inplace=True)
-            ohlc["peg_ratio"] = pd.to_numeric(ohlc["peg_ratio"], errors="coerce")
-
-        # Compute indicators
-        ohlc["rsi14"] = ohlc.groupby("ticker", group_keys=False)["close"].apply(lambda s: self.compute_rsi_wilder(s, 14))
-        ohlc["avg_vol_20"] = ohlc.groupby("ticker", group_keys=False)["volume"].rolling(20).mean().reset_index(level=0, drop=True)
-        ohlc["ret_20"] = ohlc.groupby("ticker", group_keys=False)["close"].pct_change(20)
-
-        results = []
-        for ticker in sorted(ohlc["ticker"].dropna().unique()):
-            sub = ohlc[ohlc["ticker"] == ticker].sort_values("trade_date")
-            if len(sub) < 2:
-                continue
-
-            # Latest vs previous day
-            row = sub.iloc[-1]
-            prev = sub.iloc[-2]
-
-            gap_cond = row["open"] >= 1.02 * prev["close"]
-            vol_cond = row["avg_vol_20"] >= 600_000
-            peg_cond = pd.notna(row["peg_ratio"]) and row["peg_ratio"] < 4.5
 
-            gap_low = min(row["open"], row["low"])
-            vol_ok = row["volume"] >= 1.1 * row["avg_vol_20"]
-            price_ok = row["close"] > gap_low
-            momentum_ok = (row["rsi14"] >= 40) and (row["ret_20"] >= 0)
-
-            #print("DEBUG: tickers processed =", len(ohlc["ticker"].unique()))
-            
-            if not (gap_cond and vol_cond and peg_cond and vol_ok and price_ok and momentum_ok):
-                continue
-
-            results.append({
+        # Every pending ticker's latest vs previous bar in one pass
+        screen = earnings_gap_screen(ohlc, peg_by_ticker, self.rule)
+        evaluated = dict.fromkeys(screen.index)
+        for ticker, row in screen[screen["signal"]].iterrows():
+            evaluated[ticker] = {
                 "Ticker": ticker,
-                "RSI": round(row["rsi14"], 2),
-                "PEG": row.get("peg_ratio"),
+                "RSI": round(float(row["rsi"]), 2),
+                "PEG": float(row["peg"]),
                 "Signal": "BUY",
                 "Entry Date": row["trade_date"].date().isoformat(),
                 "Exit Date": None,
                 "Status": "Active",
                 "Reason": "Earnings Gap Continuation"
-            })
+            }
+
+        self._record_states(evaluated, states, last_bars, state_key)
+        merged = {**fresh, **evaluated}
+        self.active_signals = {t: r is not None for t, r in merged.items()}
+        results = [merged[t] for t in sorted(merged) if merged[t] is not None]
 
         self.analysis_df = pd.DataFrame(results)
         self.signal_log.extend(results)
 
+    def _record_states(self, evaluated: dict, states: dict, last_bars, state_key):
+        """Persist each evaluated ticker's position, logging Active/Inactive flips."""
+        updates, transitions = {}, []
+        for ticker, result in evaluated.items():
+            label = "Active" if result else "Inactive"
+            before = states.get(ticker, {}).get("state")
+            if before != label and (before is not None or result):
+                detail = {"rsi": result["RSI"]} if result else None
+                transitions.append((ticker, last_bars[ticker], before, label, detail))
+            updates[ticker] = (label, last_bars[ticker], {"key": state_key(ticker), "result": result})
+        if updates:
+            self.signals.record(self.strategy, updates, transitions)
+
     def analyze_sell(self, portfolio_df: pd.DataFrame):
         pass
 
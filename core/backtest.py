@@ -0,0 +1,262 @@
+"""
+Vectorized backtests of the strategy entry rules (RSI cycle, earnings gap,
+DMA consolidation) with the ``sell_threshold_pct`` take-profit exit, over
+stored OHLC for a whole universe.
+
+Headless use (reads OHLC through the local store):
+    python -m core.backtest --sessions 500 --workers 4
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from core.indicators import segment_ids, segment_starts, wilder_rsi_2d
+from core.ohlc_bars import OHLCBars
+from core.rules import (
+    RULES, consolidate_entries_2d, consolidate_features_2d, gap_entries_2d, gap_features_2d, rsi_entries_2d
+)
+
+STRATEGIES = tuple(RULES)
+TRADE_COLUMNS = ["Strategy", "Ticker", "Entry Date", "Entry Price", "Exit Date", "Exit Price",
+                 "Holding Days", "Return %", "Status"]
+
+
+def pad_ohlc(ohlc, columns=("open", "high", "low", "close", "volume")) -> dict:
+    """
+    Long OHLC frame (or OHLCBars) -> left-aligned (n_tickers, max_bars) arrays, one row
+    per ticker in date order, NaN-padded. Also returns tickers, dates (datetime64[D]) and lengths.
+    """
+    if isinstance(ohlc, OHLCBars):
+        return ohlc.padded(columns)
+    ohlc = (
+        ohlc.dropna(subset=["ticker", "trade_date", "close"])
+        .sort_values(["ticker", "trade_date"], kind="stable", ignore_index=True)
+    )
+    n_rows = len(ohlc)
+    starts = segment_starts(ohlc["ticker"].to_numpy())
+    lengths = np.diff(np.r_[starts, n_rows]).astype(np.int64)
+    seg = segment_ids(starts, n_rows)
+    pos = np.arange(n_rows) - starts[seg]
+    width = int(lengths.max()) if len(lengths) else 0
+
+    arrays = {}
+    for c in columns:
+        grid = np.full((len(starts), width), np.nan)
+        grid[seg, pos] = pd.to_numeric(ohlc[c], errors="coerce").to_numpy(dtype=np.float64)
+        arrays[c] = grid
+    dates = np.full((len(starts), width), np.datetime64("NaT"), dtype="datetime64[D]")
+    dates[seg, pos] = pd.to_datetime(ohlc["trade_date"]).to_numpy().astype("datetime64[D]")
+
+    arrays["dates"] = dates
+    arrays["lengths"] = lengths
+    arrays["tickers"] = ohlc["ticker"].to_numpy()[starts] if n_rows else np.array([], dtype=object)
+    return arrays
+
+
+def simulate_exits(entries: np.ndarray, close: np.ndarray, lengths: np.ndarray, sell_threshold_pct: float = 12):
+    """
+    Walk time forward for every ticker at once: open at the close of an entry bar
+    when flat, close at the first close >= entry * (1 + sell_threshold_pct / 100).
+    Returns (ticker_idx, entry_bar, exit_bar) arrays; exit_bar is -1 while still open.
+    """
+    n, width = close.shape
+    target = 1 + sell_threshold_pct / 100
+    in_pos = np.zeros(n, dtype=bool)
+    entry_bar = np.full(n, -1)
+    entry_price = np.full(n, np.nan)
+    rows, opened, closed = [], [], []
+    for t in range(width):
+        c = close[:, t]
+        with np.errstate(invalid="ignore"):
+            hit = in_pos & (c >= entry_price * target)
+        if hit.any():
+            idx = np.flatnonzero(hit)
+            rows.append(idx)
+            opened.append(entry_bar[idx])
+            closed.append(np.full(idx.size, t))
+            in_pos[idx] = False
+        new = ~in_pos & ~hit & entries[:, t] & ~np.isnan(c)
+        if new.any():
+            in_pos[new] = True
+            entry_bar[new] = t
+            entry_price[new] = c[new]
+    idx = np.flatnonzero(in_pos)
+    rows.append(idx)
+    opened.append(entry_bar[idx])
+    closed.append(np.full(idx.size, -1))
+    return np.concatenate(rows), np.concatenate(opened), np.concatenate(closed)
+
+
+def trade_log(strategy, arrays, ticker_idx, entry_bar, exit_bar) -> pd.DataFrame:
+    """Trade log frame for the (ticker_idx, entry_bar, exit_bar) arrays of simulate_exits."""
+    close, dates, lengths = arrays["close"], arrays["dates"], arrays["lengths"]
+    still_open = exit_bar < 0
+    # open trades are marked to the last available close
+    mark_bar = np.where(still_open, lengths[ticker_idx] - 1, exit_bar)
+    entry_px = close[ticker_idx, entry_bar]
+    exit_px = close[ticker_idx, mark_bar]
+    entry_dt = dates[ticker_idx, entry_bar]
+    exit_dt = dates[ticker_idx, mark_bar]
+    return pd.DataFrame({
+        "Strategy": strategy,
+        "Ticker": arrays["tickers"][ticker_idx],
+        "Entry Date": pd.to_datetime(entry_dt),
+        "Entry Price": entry_px,
+        "Exit Date": pd.to_datetime(np.where(still_open, np.datetime64("NaT"), exit_dt)),
+        "Exit Price": exit_px,
+        "Holding Days": (exit_dt - entry_dt).astype(np.int64),
+        "Return %": (exit_px / entry_px - 1) * 100,
+        "Status": np.where(still_open, "Open", "Closed"),
+    }, columns=TRADE_COLUMNS)
+
+
+def _memo(cache, key, compute):
+    if cache is None:
+        return compute()
+    if key not in cache:
+        cache[key] = compute()
+    return cache[key]
+
+
+def strategy_entries(strategy: str, arrays: dict, rule: dict = None, peg: dict = None, cache: dict = None) -> np.ndarray:
+    """
+    Entry bars of ``strategy`` over padded arrays (see pad_ohlc), with ``rule``
+    overriding its defaults in core.rules. ``cache`` keeps the indicators that do
+    not depend on the thresholds (RSI, gap features, DMAs) between calls.
+    """
+    rule = {**RULES[strategy], **(rule or {})}
+    close, lengths = arrays["close"], arrays["lengths"]
+
+    def rsi(period):
+        return _memo(cache, ("rsi", period), lambda: wilder_rsi_2d(close, lengths, period))
+
+    if strategy == "Nifty200_RSI":
+        return rsi_entries_2d(close, lengths, rule, rsi=rsi(rule["period"]))
+    if strategy == "EarningsGap":
+        features = _memo(
+            cache, ("gap", rule["rsi_period"], rule["volume_window"], rule["return_window"]),
+            lambda: gap_features_2d(arrays["open"], arrays["low"], close, arrays["volume"], lengths,
+                                    rule, rsi=rsi(rule["rsi_period"]))
+        )
+        peg_values = None if peg is None else np.array([peg.get(t, np.nan) for t in arrays["tickers"]], dtype=float)
+        return gap_entries_2d(features, rule, peg_values)
+    features = _memo(
+        cache, ("consolidate", tuple(rule["dma_periods"]), rule["range_window"]),
+        lambda: consolidate_features_2d(arrays["high"], arrays["low"], close, lengths, rule)
+    )
+    return consolidate_entries_2d(features, rule)
+
+
+def backtest_arrays(arrays: dict, strategies=STRATEGIES, rules: dict = None,
+                    sell_threshold_pct: float = 12, peg: dict = None) -> pd.DataFrame:
+    """Trade log for padded arrays (see pad_ohlc); the unit of work for one shard."""
+    if not len(arrays["tickers"]):
+        return pd.DataFrame(columns=TRADE_COLUMNS)
+    rules = rules or {}
+    cache = {}
+    logs = []
+    for strategy in strategies:
+        entries = strategy_entries(strategy, arrays, rules.get(strategy), peg, cache)
+        exits = simulate_exits(entries, arrays["close"], arrays["lengths"], sell_threshold_pct)
+        logs.append(trade_log(strategy, arrays, *exits))
+    return pd.concat(logs, ignore_index=True) if logs else pd.DataFrame(columns=TRADE_COLUMNS)
+
+
+def _run_shard(args):
+    shard, kwargs = args
+    return backtest_arrays(pad_ohlc(shard), **kwargs)
+
+
+def trade_stats(trades: pd.DataFrame, start=None, end=None) -> pd.DataFrame:
+    """
+    Per-strategy statistics of a trade log.
+
+    Hit rate is the share of all trades that reached the take-profit. CAGR treats
+    every trade as one equal stake and measures total P&L against the peak number
+    of stakes open at once (the capital needed to take every signal), annualised
+    over ``start``..``end`` (default: first entry to last exit/mark).
+    """
+    rows = []
+    for strategy, t in trades.groupby("Strategy", sort=False):
+        closed = t[t["Status"] == "Closed"]
+        span_start = pd.Timestamp(start) if start is not None else t["Entry Date"].min()
+        exit_or_mark = t["Entry Date"] + pd.to_timedelta(t["Holding Days"], unit="D")
+        span_end = pd.Timestamp(end) if end is not None else exit_or_mark.max()
+        years = max((span_end - span_start).days, 1) / 365.25
+
+        events = pd.concat([
+            pd.Series(1, index=t["Entry Date"]),
+            pd.Series(-1, index=exit_or_mark[t["Status"] == "Closed"]),
+        ]).sort_index(kind="stable")
+        peak = max(int(events.groupby(level=0).sum().cumsum().max()), 1)
+        total = (t["Return %"] / 100).sum()
+
+        rows.append({
+            "Strategy": strategy,
+            "Trades": len(t),
+            "Closed": len(closed),
+            "Open": len(t) - len(closed),
+            "Hit Rate %": len(closed) / len(t) * 100,
+            "Avg Holding Days": closed["Holding Days"].mean() if len(closed) else np.nan,
+            "Avg Return %": t["Return %"].mean(),
+            "Peak Open Trades": peak,
+            "CAGR %": ((1 + total / peak) ** (1 / years) - 1) * 100 if total / peak > -1 else -100.0,
+        })
+    return pd.DataFrame(rows)
+
+
+def run_backtest(ohlc: pd.DataFrame, strategies=STRATEGIES, rules: dict = None, sell_threshold_pct: float = 12,
+                 peg: dict = None, workers: int = None, shards: int = None):
+    """
+    Backtest ``strategies`` over a long OHLC frame (ticker, trade_date, open, high,
+    low, close, volume). Tickers are split into shards that run on a process pool;
+    ``workers=1`` runs in-process. ``rules`` maps strategy name to threshold
+    overrides. Returns (trades, stats).
+    """
+    kwargs = {"strategies": strategies, "rules": rules, "sell_threshold_pct": sell_threshold_pct, "peg": peg}
+    workers = workers or os.cpu_count() or 1
+    tickers = pd.unique(ohlc["ticker"].dropna())
+    shards = min(shards or workers, max(len(tickers), 1))
+
+    if workers == 1 or shards == 1:
+        trades = backtest_arrays(pad_ohlc(ohlc), **kwargs)
+    else:
+        groups = np.array_split(np.sort(tickers), shards)
+        jobs = [(ohlc[ohlc["ticker"].isin(g)], kwargs) for g in groups]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            trades = pd.concat(list(pool.map(_run_shard, jobs)), ignore_index=True)
+
+    trades = trades.sort_values(["Strategy", "Entry Date", "Ticker"], ignore_index=True)
+    dates = pd.to_datetime(ohlc["trade_date"])
+    return trades, trade_stats(trades, dates.min(), dates.max())
+
+
+def main(argv=None):
+    import argparse
+    from core.analyzers import fetch_ohlc_window
+    from core.clients import get_supabase_client
+    from core.fundamentals import get_peg_cache
+    from core.ohlc_store import get_ohlc_store
+
+    parser = argparse.ArgumentParser(description="Backtest the RSI and earnings-gap entry rules.")
+    parser.add_argument("tickers", nargs="*", help="tickers to test (default: every ticker in the local store)")
+    parser.add_argument("--sessions", type=int, default=500, help="history window in NSE sessions")
+    parser.add_argument("--sell-threshold-pct", type=float, default=12)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--trades", help="write the trade log to this CSV")
+    args = parser.parse_args(argv)
+
+    tickers = args.tickers or list(get_ohlc_store().last_dates())
+    ohlc = fetch_ohlc_window(get_supabase_client(), tickers, sessions=args.sessions)
+    # the earnings-gap rule's PEG ceiling, as the live analyzer applies it
+    peg = get_peg_cache().get_many(tickers)
+    trades, stats = run_backtest(ohlc, sell_threshold_pct=args.sell_threshold_pct, workers=args.workers, peg=peg)
+    if args.trades:
+        trades.to_csv(args.trades, index=False)
+    print(stats.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Process-wide registry of authenticated clients (Google Sheets, Supabase).
+
+Each client is created once per process and shared by every page, session
+and thread. gspread keeps one authorized HTTP session whose token refreshes
+lazily on the first request after expiry; the Supabase client keeps its own
+pooled HTTP connection. created_counts() reports how many handshakes the
+process has paid for. The default clients come from the configured data
+source (core.sources): built from secrets for the live source, local
+stand-ins (core.sheets.LocalGSpread, core.ohlc_reader.LocalPostgREST) for
+local and recorded ones. install_clients() overrides both.
+"""
+import json
+import threading
+from collections import Counter
+
+_lock = threading.Lock()
+_clients = {}
+_created = Counter()
+_reused = Counter()
+_installed = {}
+
+
+def _secrets():
+    from core.ui import secrets
+    return secrets()
+
+
+def _get_or_create(kind: str, key, factory):
+    client = _clients.get((kind, key))
+    if client is None:
+        with _lock:
+            client = _clients.get((kind, key))
+            if client is None:
+                client = factory()
+                _clients[(kind, key)] = client
+                _created[kind] += 1
+                return client
+    with _lock:
+        _reused[kind] += 1
+    return client
+
+
+def _default_client(kind: str):
+    """Installed client of ``kind``, else the data source's (None: build it from secrets)."""
+    if kind in _installed:
+        return _installed[kind]
+    from core.sources import get_data_source
+    return get_data_source().client(kind)
+
+
+def get_gspread_client(creds_dict: dict = None):
+    """Authorized gspread client for the service account (default: GOOGLE_CREDS_JSON secret)."""
+    if creds_dict is None:
+        client = _default_client("gspread")
+        if client is not None:
+            return client
+    import gspread
+    if creds_dict is None:
+        creds_dict = json.loads(_secrets()["GOOGLE_CREDS_JSON"])
+    key = creds_dict.get("client_email")
+    return _get_or_create("gspread", key, lambda: gspread.service_account_from_dict(creds_dict))
+
+
+def open_spreadsheet(sheet_name: str, creds_dict: dict = None):
+    """Spreadsheet handle by name, opened once per process (saves a Drive lookup per worksheet)."""
+    client = get_gspread_client(creds_dict)
+    key = (id(client), sheet_name)
+    return _get_or_create("spreadsheet", key, lambda: client.open(sheet_name))
+
+
+def get_supabase_client(url: str = None, key: str = None):
+    """Supabase client for ``url``/``key`` (default: the [supabase] secrets)."""
+    if url is None and key is None:
+        client = _default_client("supabase")
+        if client is not None:
+            return client
+    if url is None or key is None:
+        secrets = _secrets()["supabase"]
+        url, key = secrets["url"], secrets["key"]
+
+    def factory():
+        from supabase import create_client
+        return create_client(url, key)
+
+    return _get_or_create("supabase", (url, key), factory)
+
+
+def install_clients(gspread=None, supabase=None):
+    """
+    Serve the default (secrets-based) clients from ``gspread`` / ``supabase``
+    instead, e.g. local stand-ins, until uninstall_clients(). Cached
+    spreadsheet handles are dropped so they are reopened through the new client.
+    """
+    with _lock:
+        for kind, client in (("gspread", gspread), ("supabase", supabase)):
+            if client is not None:
+                _installed[kind] = client
+        for k in [k for k in _clients if k[0] == "spreadsheet"]:
+            del _clients[k]
+
+
+def uninstall_clients():
+    with _lock:
+        _installed.clear()
+        for k in [k for k in _clients if k[0] == "spreadsheet"]:
+            del _clients[k]
+
+
+def created_counts() -> dict:
+    """How many clients of each kind were created, and how many lookups reused one."""
+    with _lock:
+        return {"created": dict(_created), "reused": dict(_reused)}
+
+
+def reset_clients():
+    """Drop every cached client (e.g. after rotating credentials)."""
+    with _lock:
+        _clients.clear()
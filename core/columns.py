@@ -17,4 +17,13 @@ COLUMN_NAMES = {
 }
 
 def col(name):
-    return COLUMN_NAMES.get(name, name)
\ No newline at end of file
+    return COLUMN_NAMES.get(name, name)
+
+def normalize_ticker(ticker):
+    """Sheet ticker ("NSE:ABC", "abc", "ABC.NS") to the Yahoo/Supabase symbol "ABC.NS"."""
+    symbol = str(ticker).strip().upper()
+    if symbol.startswith("NSE:"):
+        return symbol.split("NSE:")[1] + ".NS"
+    if not symbol.endswith(".NS"):
+        return symbol + ".NS"
+    return symbol
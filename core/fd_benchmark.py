@@ -0,0 +1,149 @@
+"""
+Fixed-deposit benchmark of sold lots over the whole FD rate grid.
+
+FD returns are computed once for every rate the pages offer (FD_RATES) as one
+(lots x rates) array per method, and summed per ticker the same way, so moving
+the rate slider only picks a column:
+
+    simple     Investment * (1 + r * days / 365)
+    compound   compounded quarterly, as bank FDs are: Investment * (1 + r / 4) ** (4 * days / 365)
+    xirr       compounded annually on an actual/365 basis, the convention XIRR uses,
+               so an FD "beats" a lot exactly when the lot's XIRR is below r
+"""
+import numpy as np
+import pandas as pd
+
+FD_RATES = np.round(np.arange(5.0, 12.0 + 0.25, 0.5), 2)
+FD_METHODS = {
+    "simple": "Simple interest",
+    "compound": "Compounded quarterly",
+    "xirr": "XIRR (annual compounding)",
+}
+
+
+def fd_growth(days: np.ndarray, rates: np.ndarray, method: str = "simple") -> np.ndarray:
+    """(len(days), len(rates)) growth factors of an FD held ``days`` at ``rates`` % a year."""
+    years = np.asarray(days, dtype=np.float64)[:, None] / 365
+    r = np.asarray(rates, dtype=np.float64)[None, :] / 100
+    if method == "simple":
+        return 1 + r * years
+    if method == "compound":
+        return (1 + r / 4) ** (4 * years)
+    if method == "xirr":
+        return (1 + r) ** years
+    raise ValueError(f"Unknown FD method: {method}")
+
+
+def group_xirr(code: np.ndarray, n_groups: int, buy_years: np.ndarray, sell_years: np.ndarray,
+               invested: np.ndarray, realized: np.ndarray, iterations: int = 100) -> np.ndarray:
+    """
+    XIRR of each group's lots (invested at ``buy_years``, realized at
+    ``sell_years``), solved for all groups at once by bisection on the NPV.
+    NaN where the NPV does not change sign between -99.99% and 10000%.
+    """
+    lo = np.full(n_groups, -0.9999)
+    hi = np.full(n_groups, 100.0)
+
+    def npv(rate):
+        r = rate[code]
+        flows = realized * (1 + r) ** -sell_years - invested * (1 + r) ** -buy_years
+        return np.bincount(code, weights=flows, minlength=n_groups)
+
+    f_lo = npv(lo)
+    solvable = np.sign(f_lo) * np.sign(npv(hi)) < 0
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        f_mid = npv(mid)
+        left = np.sign(f_mid) == np.sign(f_lo)
+        lo = np.where(left, mid, lo)
+        f_lo = np.where(left, f_mid, f_lo)
+        hi = np.where(left, hi, mid)
+    return np.where(solvable, (lo + hi) / 2, np.nan)
+
+
+class FDGrid:
+    """
+    FD returns of dated sold lots at every rate of ``rates`` for every method,
+    per lot (``lot_fd``) and summed per ticker (``ticker_fd``), plus the
+    strategy's own XIRR per lot and per ticker.
+    """
+
+    def __init__(self, ticker, buy_date, sell_date, invested, realized, rates=FD_RATES):
+        self.rates = np.asarray(rates, dtype=np.float64)
+        self.invested = np.asarray(invested, dtype=np.float64)
+        self.realized = np.asarray(realized, dtype=np.float64)
+        self.days = np.clip((sell_date - buy_date).astype("timedelta64[D]").astype(np.float64), 1, None)
+        self.lot_fd = {m: self.invested[:, None] * fd_growth(self.days, self.rates, m) for m in FD_METHODS}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.lot_xirr = (self.realized / self.invested) ** (365 / self.days) - 1
+
+        # per ticker, in the sorted order groupby(ticker) gives; lots of a ticker are summed in row order
+        self.code, self.tickers = pd.factorize(pd.Series(ticker, dtype=object), sort=True)
+        self._order = np.argsort(self.code, kind="stable")
+        self._order = self._order[self.code[self._order] >= 0]
+        code = self.code[self._order]
+        n = len(self.tickers)
+        self._starts = np.searchsorted(code, np.arange(n))
+
+        self.ticker_invested = self._per_ticker(self.invested)
+        self.ticker_realized = self._per_ticker(self.realized)
+        self.ticker_fd = {m: self._per_ticker(fd) for m, fd in self.lot_fd.items()}
+
+        buy, sell = buy_date[self._order], sell_date[self._order]
+        first_buy = np.minimum.reduceat(buy, self._starts) if n else buy[:0]
+
+        def years(dates):
+            return (dates - first_buy[code]).astype("timedelta64[D]").astype(np.float64) / 365
+
+        self.ticker_xirr = group_xirr(code, n, years(buy), years(sell),
+                                      self.invested[self._order], self.realized[self._order])
+
+    def _per_ticker(self, values: np.ndarray) -> np.ndarray:
+        """Sum of ``values`` (per lot, 1-D or lots x rates) per ticker, skipping NaN like groupby().sum()."""
+        values = np.nan_to_num(values[self._order], nan=0.0)
+        if not len(self._starts):
+            return np.zeros((0,) + values.shape[1:])
+        return np.add.reduceat(values, self._starts, axis=0)
+
+    def rate_index(self, fd_rate: float):
+        """Column of ``fd_rate`` in the grid, or None when it is not a grid rate."""
+        hits = np.flatnonzero(np.isclose(self.rates, fd_rate))
+        return int(hits[0]) if len(hits) else None
+
+    def lot_return(self, fd_rate: float, method: str = "simple") -> np.ndarray:
+        j = self.rate_index(fd_rate)
+        if j is None:
+            return self.invested * fd_growth(self.days, [fd_rate], method)[:, 0]
+        return self.lot_fd[method][:, j]
+
+    def ticker_return(self, fd_rate: float, method: str = "simple") -> np.ndarray:
+        j = self.rate_index(fd_rate)
+        if j is None:
+            return self._per_ticker(self.lot_return(fd_rate, method))
+        return self.ticker_fd[method][:, j]
+
+
+def profit_chart_spec(benchmark: pd.DataFrame, title: str = "Strategy vs FD Profit by Ticker") -> dict:
+    """Plotly figure (as a plain dict) of Strategy vs FD profit per ticker, values labelled on the bars."""
+    def bars(name, column, color):
+        return {
+            "type": "bar",
+            "name": name,
+            "x": benchmark["Ticker"].tolist(),
+            "y": benchmark[column].round(2).tolist(),
+            "marker": {"color": color},
+            "texttemplate": "₹%{y:,.0f}",
+            "textposition": "outside",
+            "textfont": {"size": 10},
+        }
+
+    return {
+        "data": [bars("Strategy", "Strategy Profit", "green"), bars("FD", "FD Profit", "gray")],
+        "layout": {
+            "title": {"text": title},
+            "barmode": "group",
+            "yaxis": {"title": {"text": "Profit (₹)"}},
+            "xaxis": {"tickangle": -45},
+            "height": 600,
+        },
+    }
@@ -1,37 +1,35 @@
 import pandas as pd
-import gspread
-import streamlit as st
-from oauth2client.service_account import ServiceAccountCredentials
+from core.clients import get_gspread_client
 from core.columns import col
-import json
+from core.sheets import get_snapshot
+from core.telemetry import span
 
 class DataFetcher:
-    def __init__(self, sheet_name, creds_dict):
-        scope = [
-            "https://spreadsheets.google.com/feeds",
-            "https://www.googleapis.com/auth/drive"
-        ]
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-        self.client = gspread.authorize(creds)
+    def __init__(self, sheet_name, creds_dict=None):
+        self.creds_dict = creds_dict
         self.sheet_name = sheet_name
 
-    def fetch(self, tab_name):
-        raw = _fetch_raw_data(self.sheet_name, tab_name)
-        if not raw or len(raw) < 2:
-            return pd.DataFrame()
+    @property
+    def client(self):
+        # 🔐 resolved on first use, from the configured data source (no handshake when it is local)
+        return get_gspread_client(self.creds_dict)
 
-        headers = [h.strip() for h in raw[0]]
-        df = pd.DataFrame(raw[1:], columns=headers)
-        df[col("ticker")] = df[col("ticker")].astype(str).str.upper()
+    def fetch(self, tab_name):
+        with span("fetcher.fetch", sheet=self.sheet_name, tab=tab_name) as s:
+            # 📑 Served from the batched spreadsheet snapshot (one request for all tabs)
+            raw = get_snapshot(self.sheet_name, tab_name).values(tab_name)
+            if not raw or len(raw) < 2:
+                s.set(rows=0)
+                return pd.DataFrame()
 
-        for c in df.columns:
-            if any(k in c for k in ["Price", "DMA", "Closing", "Minimum"]):
-                df[c] = pd.to_numeric(df[c], errors="coerce")
+            headers = [h.strip() for h in raw[0]]
+            df = pd.DataFrame(raw[1:], columns=headers)
+            df[col("ticker")] = df[col("ticker")].astype(str).str.upper()
 
-        return df.dropna(subset=[col("ticker"), col("current_price")])
+            for c in df.columns:
+                if any(k in c for k in ["Price", "DMA", "Closing", "Minimum"]):
+                    df[c] = pd.to_numeric(df[c], errors="coerce")
 
-@st.cache_data(ttl=300, show_spinner=True)
-def _fetch_raw_data(sheet_name, tab_name):
-    client = gspread.service_account_from_dict(json.loads(st.secrets["GOOGLE_CREDS_JSON"]))
-    sheet = client.open(sheet_name).worksheet(tab_name)
-    return sheet.get_all_values()
\ No newline at end of file
+            df = df.dropna(subset=[col("ticker"), col("current_price")])
+            s.set(rows=len(df))
+            return df
\ No newline at end of file
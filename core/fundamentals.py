@@ -0,0 +1,187 @@
+"""
+PEG ratios for the strategy filters, cached on disk with a TTL.
+
+A PEG changes at most once a quarter, so each ticker is looked up at the source
+(yfinance, or a local stand-in) once per PEG_TTL_DAYS, and tickers with no PEG
+are retried after PEG_MISSING_TTL_DAYS. The JSON file is shared by the app and
+the precompute job: every save merges with what is on disk, newest fetch winning.
+"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from core.paths import CACHE_DIR, file_lock
+from core.telemetry import span
+
+PEG_CACHE_FILE = os.path.join(CACHE_DIR, "peg_cache.json")
+PEG_TTL_DAYS = 90          # fundamentals move at most once a quarter
+PEG_MISSING_TTL_DAYS = 1   # retry tickers yfinance had no PEG for after a day
+
+
+class YFinancePEGSource:
+    """PEG lookups through yfinance: PEG = trailing PE / earnings growth."""
+
+    def fetch_peg(self, ticker: str):
+        """Return the PEG ratio for ``ticker``, or None if yfinance lacks the inputs."""
+        import yfinance as yf
+        info = yf.Ticker(ticker).info
+        pe = info.get("trailingPE")
+        growth = info.get("earningsGrowth")
+
+        if pe is None or growth is None or growth == 0:
+            return None
+
+        return round(pe / growth, 2)
+
+
+class StaticPEGSource:
+    """Local stand-in for YFinancePEGSource, serving PEG values from a dict."""
+
+    def __init__(self, pegs: dict):
+        self.pegs = dict(pegs)
+        self.calls = 0
+
+    def fetch_peg(self, ticker: str):
+        self.calls += 1
+        return self.pegs.get(ticker)
+
+
+class PEGCache:
+    """
+    TTL cache of PEG ratios, persisted as JSON so it survives restarts.
+
+    get_many() serves fresh entries from the cache and fetches only missing or
+    stale tickers, on a bounded thread pool. A ticker whose lookup raised is
+    left uncached and returns None.
+    """
+
+    def __init__(self, source=None, path: str = PEG_CACHE_FILE, ttl_days: float = PEG_TTL_DAYS,
+                 missing_ttl_days: float = PEG_MISSING_TTL_DAYS, max_workers: int = 8):
+        self.source = source or YFinancePEGSource()
+        self.path = path
+        self.ttl = timedelta(days=ttl_days)
+        self.missing_ttl = timedelta(days=missing_ttl_days)
+        self.max_workers = max_workers
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._entries = self._read()
+
+    def _read(self) -> dict:
+        if not self.path:
+            return {}
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _merge(self, entries: dict):
+        """Take every entry of ``entries`` fetched later than ours (caller holds the lock)."""
+        for t, entry in entries.items():
+            mine = self._entries.get(t)
+            if mine is None or entry["fetched_at"] > mine["fetched_at"]:
+                self._entries[t] = entry
+
+    def _write(self, merge: bool = True):
+        """Save the entries, merged (unless clearing) with the ones another process saved meanwhile."""
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with file_lock(f"{self.path}.lock"):
+            if merge:
+                self._merge(self._read())
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp, self.path)
+
+    def _is_fresh(self, entry: dict, now: datetime) -> bool:
+        ttl = self.ttl if entry["peg"] is not None else self.missing_ttl
+        return now - datetime.fromisoformat(entry["fetched_at"]) < ttl
+
+    def _fetch_one(self, ticker: str):
+        try:
+            return ticker, True, self.source.fetch_peg(ticker)
+        except Exception:
+            return ticker, False, None
+
+    def get(self, ticker: str):
+        return self.get_many([ticker])[ticker]
+
+    def get_many(self, tickers) -> dict:
+        """PEG ratio (or None) for every ticker, fetching only what is missing or stale."""
+        tickers = list(dict.fromkeys(tickers))
+        with span("peg.get_many", tickers=len(tickers)) as s:
+            result, fetched = self._get_many(tickers)
+            s.set(rows=len(result), fetched=fetched, cache="miss" if fetched else "hit")
+            return result
+
+    def _get_many(self, tickers: list):
+        """(PEG per ticker, number of tickers looked up at the source)."""
+        now = datetime.now()
+        result, stale = {}, []
+        with self._lock:
+            for t in tickers:
+                entry = self._entries.get(t)
+                if entry is not None and self._is_fresh(entry, now):
+                    result[t] = entry["peg"]
+                else:
+                    stale.append(t)
+            if stale and self.path:
+                # another process may have fetched them since we loaded the file
+                self._merge(self._read())
+                fresh = {t: self._entries[t]["peg"] for t in stale
+                         if t in self._entries and self._is_fresh(self._entries[t], now)}
+                result.update(fresh)
+                stale = [t for t in stale if t not in fresh]
+            self.hits += len(result)
+            self.misses += len(stale)
+
+        if not stale:
+            return result, 0
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(stale))) as pool:
+            fetched = list(pool.map(self._fetch_one, stale))
+
+        with self._lock:
+            for t, ok, peg in fetched:
+                result[t] = peg
+                if ok:
+                    self._entries[t] = {"peg": peg, "fetched_at": now.isoformat()}
+                else:
+                    self.errors += 1
+            self._write()
+        return result, len(stale)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "errors": self.errors, "entries": len(self._entries)}
+
+    def snapshot(self) -> dict:
+        """{ticker: PEG} of every cached entry, fresh or not."""
+        with self._lock:
+            return {t: entry["peg"] for t, entry in self._entries.items()}
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._write(merge=False)
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_peg_cache() -> PEGCache:
+    """Process-wide PEG cache of the data source, shared by every analyzer and page."""
+    from core.sources import get_data_source
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            source = get_data_source()
+            _default_cache = PEGCache(source.peg_source(), path=source.cache_path("peg_cache.json"))
+        return _default_cache
@@ -0,0 +1,85 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+def segment_starts(keys) -> np.ndarray:
+    """Start offsets of each run of equal values in an already-sorted key array."""
+    keys = np.asarray(keys)
+    if keys.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+
+def segment_ids(starts: np.ndarray, n: int) -> np.ndarray:
+    """Segment number of every row, given segment start offsets into ``n`` rows."""
+    seg = np.zeros(n, dtype=np.int64)
+    if len(starts) > 1:
+        seg[starts[1:]] = 1
+    return np.cumsum(seg)
+
+
+def wilder_rsi_2d(prices: np.ndarray, lengths: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    Wilder RSI for many series at once.
+
+    ``prices`` is (n_series, max_len), left-aligned and padded past each series'
+    ``lengths``. The loop runs over time steps, each step updating every series.
+    Values match compute_rsi_wilder: the first ``period`` + 1 bars are NaN, the
+    seed is the mean of the first ``period`` gains/losses (NaNs skipped) and
+    RSI is 100 whenever the average loss is 0.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    n, width = prices.shape
+    rsi = np.full((n, width), np.nan)
+    if width < period + 2:
+        return rsi
+
+    delta = np.diff(prices, axis=1)
+    gain = np.clip(delta, 0, None)
+    loss = -np.clip(delta, None, 0)
+
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        # all-NaN seeds (too few valid bars) are expected and stay NaN
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        avg_gain = np.nanmean(gain[:, :period], axis=1)
+        avg_loss = np.nanmean(loss[:, :period], axis=1)
+        for t in range(period + 1, width):
+            avg_gain = (avg_gain * (period - 1) + gain[:, t - 1]) / period
+            avg_loss = (avg_loss * (period - 1) + loss[:, t - 1]) / period
+            rsi[:, t] = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+
+    rsi[np.arange(width) >= np.asarray(lengths)[:, None]] = np.nan
+    return rsi
+
+
+def wilder_rsi_segments(close, starts, period: int = 14) -> np.ndarray:
+    """
+    Wilder RSI over one sorted close array holding many tickers back to back.
+
+    ``starts`` are the offsets where each ticker's bars begin (see segment_starts).
+    Returns a float array aligned with ``close``.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    starts = np.asarray(starts, dtype=np.int64)
+    if close.size == 0:
+        return np.zeros(0)
+
+    lengths = np.diff(np.r_[starts, close.size])
+    width = int(lengths.max())
+    seg = segment_ids(starts, close.size)
+    pos = np.arange(close.size) - starts[seg]
+
+    padded = np.full((len(starts), width), np.nan)
+    padded[seg, pos] = close
+    return wilder_rsi_2d(padded, lengths, period)[seg, pos]
+
+
+def compute_rsi_wilder(series: pd.Series, period: int = 14) -> pd.Series:
+    """Compute RSI using Wilder's smoothing method."""
+    if series is None:
+        return pd.Series(dtype=float)
+    values = wilder_rsi_2d(series.to_numpy(dtype=np.float64)[None, :], np.array([len(series)]), period)[0]
+    return pd.Series(values, index=series.index)
+
@@ -0,0 +1,223 @@
+"""
+Incremental OHLC ingestion: yfinance -> Supabase ``ohlc_data`` (+ the local OHLC store).
+
+Headless use, outside Streamlit (reads .streamlit/secrets.toml):
+    python -m core.ingest                 # tickers from the DMA_Data/Nifty_200 tab
+    python -m core.ingest --days 365 RELIANCE TCS
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from core.columns import normalize_ticker
+from core.ohlc_store import OHLC_COLUMNS, get_ohlc_store
+
+
+def frame_from_download(raw: pd.DataFrame, symbols: list) -> pd.DataFrame:
+    """Long ohlc_data-shaped rows from a (possibly multi-ticker) yf.download result."""
+    if raw is None or raw.empty:
+        return pd.DataFrame(columns=OHLC_COLUMNS)
+    if not isinstance(raw.columns, pd.MultiIndex):
+        raw = pd.concat({symbols[0]: raw}, axis=1)
+    level = 0 if set(symbols) & set(raw.columns.get_level_values(0)) else 1
+
+    frames = []
+    present = set(raw.columns.get_level_values(level))
+    for symbol in symbols:
+        if symbol not in present:
+            continue
+        sub = raw.xs(symbol, axis=1, level=level)
+        sub.columns = [str(c).lower() for c in sub.columns]
+        if "close" not in sub.columns:
+            continue
+        sub = sub.dropna(subset=["close"])
+        frames.append(pd.DataFrame({
+            "ticker": symbol,
+            "trade_date": pd.to_datetime(sub.index).strftime("%Y-%m-%d"),
+            "open": sub.get("open"),
+            "high": sub.get("high"),
+            "low": sub.get("low"),
+            "close": sub["close"],
+            "volume": sub.get("volume"),
+        }).reset_index(drop=True))
+    if not frames:
+        return pd.DataFrame(columns=OHLC_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _download(symbols: list, start: str) -> pd.DataFrame:
+    import yfinance as yf
+    raw = yf.download(
+        symbols,
+        start=start,
+        interval="1d",
+        auto_adjust=False,
+        group_by="ticker",
+        threads=True,
+        progress=False
+    )
+    return frame_from_download(raw, symbols)
+
+
+class OHLCIngestor:
+    """
+    Loads daily bars for many tickers into Supabase.
+
+    - only the dates after each ticker's last stored bar are downloaded,
+      and tickers sharing a start date are downloaded together in batches
+    - rows are upserted on (ticker, trade_date) in chunks, on a bounded pool
+    - tickers whose bars were upserted are checkpointed (in the data source's
+      cache dir), so a failed run resumes where it stopped; a run without
+      failures removes the checkpoint
+
+    ``progress(done, total, message)`` is called after each batch; pass a Streamlit
+    progress bar wrapper for the page, or leave it None when running headless.
+    The ohlc_data table needs a unique constraint on (ticker, trade_date).
+    """
+
+    def __init__(self, client, store=None, batch_size: int = 50, upsert_chunk: int = 500,
+                 max_workers: int = 4, checkpoint_path: str = None,
+                 download=None, progress=None):
+        self.client = client
+        self.store = store or get_ohlc_store()
+        self.batch_size = batch_size
+        self.upsert_chunk = upsert_chunk
+        self.max_workers = max_workers
+        if checkpoint_path is None:
+            # one checkpoint per data source, next to its OHLC store
+            from core.sources import get_data_source
+            checkpoint_path = get_data_source().cache_path("ingest_checkpoint.json")
+        self.checkpoint_path = checkpoint_path
+        self.download = download or _download
+        self.progress = progress
+
+    # -------------------------------
+    # Checkpoint
+    # -------------------------------
+    def _load_checkpoint(self) -> set:
+        try:
+            with open(self.checkpoint_path, "r") as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return set()
+        # only resume today's run; a new day needs every ticker again
+        return set(state.get("done", [])) if state.get("run_date") == date.today().isoformat() else set()
+
+    def _save_checkpoint(self, done: set):
+        os.makedirs(os.path.dirname(self.checkpoint_path), exist_ok=True)
+        tmp = f"{self.checkpoint_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"run_date": date.today().isoformat(), "done": sorted(done)}, f)
+        os.replace(tmp, self.checkpoint_path)
+
+    def _clear_checkpoint(self):
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
+
+    # -------------------------------
+    # Pipeline
+    # -------------------------------
+    def _plan(self, symbols: list, days: int, start=None) -> dict:
+        """Group symbols by the first date still missing; {start: [symbols]}."""
+        floor = pd.Timestamp(start).date() if start is not None else (datetime.today() - timedelta(days=days)).date()
+        self.store.sync(self.client, symbols, start=floor)
+        last = self.store.last_dates(symbols)
+        plan = {}
+        for s in symbols:
+            since = floor
+            if s in last:
+                since = max(floor, date.fromisoformat(last[s]) + timedelta(days=1))
+            if since <= date.today():
+                plan.setdefault(since.isoformat(), []).append(s)
+        return plan
+
+    def _upsert(self, rows: list) -> int:
+        self.client.table("ohlc_data").upsert(rows, on_conflict="ticker,trade_date").execute()
+        return len(rows)
+
+    def _ingest_batch(self, symbols: list, start: str):
+        """Download and upsert one batch; returns (rows upserted, tickers that got rows)."""
+        df = self.download(symbols, start)
+        if df.empty:
+            return 0, set()
+        # a multi-ticker download aligns dates across tickers, which makes volume float
+        df["volume"] = pd.to_numeric(df["volume"], errors="coerce").round().astype("Int64")
+        rows = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+        chunks = [rows[i:i+self.upsert_chunk] for i in range(0, len(rows), self.upsert_chunk)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            inserted = sum(pool.map(self._upsert, chunks))
+        self.store.write_many((ticker, sub, False, None) for ticker, sub in df.groupby("ticker", sort=False))
+        return inserted, set(df["ticker"])
+
+    def run(self, tickers: list, days: int = 180, start=None) -> dict:
+        """
+        Ingest ``tickers`` (sheet or Yahoo form) from ``start`` (default: ``days``
+        calendar days back); returns a summary dict of the run.
+        """
+        symbols = list(dict.fromkeys(normalize_ticker(t) for t in tickers if str(t).strip()))
+        done = self._load_checkpoint()
+        todo = [s for s in symbols if s not in done]
+        plan = self._plan(todo, days, start) if todo else {}
+
+        batches = [
+            (since, group[i:i+self.batch_size])
+            for since, group in plan.items()
+            for i in range(0, len(group), self.batch_size)
+        ]
+        planned = {s for _, batch in batches for s in batch}
+        # up-to-date tickers are not checkpointed: a later run the same day must still pick up new bars
+        up_to_date = [s for s in todo if s not in planned]
+        summary = {"tickers": len(symbols), "skipped": len(symbols) - len(todo),
+                   "up_to_date": len(up_to_date), "rows": 0, "failed": []}
+
+        finished = 0
+        for since, batch in batches:
+            try:
+                rows, written = self._ingest_batch(batch, since)
+                summary["rows"] += rows
+                done.update(written)
+                self._save_checkpoint(done)
+                message = f"{len(batch)} tickers from {since}"
+            except Exception as e:
+                summary["failed"].extend(batch)
+                message = f"failed {len(batch)} tickers from {since}: {e}"
+            finished += len(batch)
+            if self.progress:
+                self.progress(finished, len(todo), message)
+        if summary["failed"]:
+            self._save_checkpoint(done)
+        else:
+            # nothing left to resume
+            self._clear_checkpoint()
+        return summary
+
+
+def main(argv=None):
+    import argparse
+    from core.clients import get_supabase_client
+    parser = argparse.ArgumentParser(description="Incrementally load daily OHLC bars into Supabase.")
+    parser.add_argument("tickers", nargs="*", help="tickers to load (default: the Nifty_200 tab)")
+    parser.add_argument("--days", type=int, default=180, help="history window for tickers with no stored bars")
+    parser.add_argument("--sheet", default="DMA_Data")
+    parser.add_argument("--tab", default="Nifty_200")
+    args = parser.parse_args(argv)
+
+    tickers = args.tickers
+    if not tickers:
+        from core.fetcher import DataFetcher
+        tickers = DataFetcher(args.sheet).fetch(args.tab)["Ticker"].dropna().tolist()
+
+    def report(done, total, message):
+        print(f"[{done}/{total}] {message}", flush=True)
+
+    summary = OHLCIngestor(get_supabase_client(), progress=report).run(tickers, days=args.days)
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Compact in-memory OHLC bars.
+
+A long OHLC frame (object tickers, datetime64 dates, float64 everything) costs
+~70 bytes a bar and is copied by every filter, merge and groupby on its way to
+the analyzers. OHLCBars keeps the same bars as flat NumPy columns instead:
+
+    symbols   sorted unique tickers; ``code`` (int32) indexes it per bar
+    dates     sorted trade dates present; ``session`` (int32) indexes it per bar
+    open, high, low, close   float32 (float64 with ``dtype=np.float64``)
+    volume    int64, MISSING_VOLUME where the source had none
+
+Bars are grouped by ticker in date order, so each ticker's bars are the
+contiguous rows ``offsets[i]:offsets[i + 1]`` and kernels read them as views.
+"""
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ("open", "high", "low", "close")
+PRICE_DTYPE = np.float32
+MISSING_VOLUME = -1
+
+
+class OHLCBars:
+    """Columnar bars grouped by ticker (see module docstring); price columns not read are None."""
+
+    def __init__(self, symbols, code, session, dates, open=None, high=None, low=None, close=None, volume=None):
+        self.symbols = np.asarray(symbols, dtype=object)
+        self.code = np.asarray(code, dtype=np.int32)
+        self.session = np.asarray(session, dtype=np.int32)
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.open, self.high, self.low, self.close = open, high, low, close
+        self.volume = volume
+        self.offsets = np.r_[0, np.cumsum(np.bincount(self.code, minlength=len(self.symbols)))].astype(np.int64)
+
+    # -------------------------------
+    # Construction
+    # -------------------------------
+    @classmethod
+    def _build(cls, symbols, code, days, prices: dict, volume, dtype):
+        """Sort bars by (symbol, date) unless they already are, and encode the dates as sessions."""
+        dates, session = np.unique(days, return_inverse=True)
+        key = code.astype(np.int64) * max(len(dates), 1) + session
+        order = None if len(key) < 2 or np.all(key[1:] >= key[:-1]) else np.argsort(key, kind="stable")
+
+        def arrange(values):
+            return values if order is None else values[order]
+
+        columns = {c: None if v is None else arrange(np.asarray(v, dtype=dtype)) for c, v in prices.items()}
+        if volume is not None:
+            volume = np.asarray(volume, dtype=np.float64)
+            volume = arrange(np.where(np.isnan(volume), MISSING_VOLUME, volume).astype(np.int64))
+        return cls(symbols, arrange(code), arrange(session), dates, volume=volume, **columns)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, dtype=PRICE_DTYPE) -> "OHLCBars":
+        """From a long OHLC frame (rows without ticker or trade_date are dropped)."""
+        days = pd.to_datetime(df["trade_date"]).to_numpy().astype("datetime64[D]")
+        code, symbols = pd.factorize(df["ticker"], sort=True)
+        keep = (code >= 0) & ~np.isnat(days)
+        prices = {
+            c: pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=np.float64)[keep] if c in df.columns else None
+            for c in PRICE_COLUMNS
+        }
+        volume = pd.to_numeric(df["volume"], errors="coerce").to_numpy(dtype=np.float64)[keep] \
+            if "volume" in df.columns else None
+        return cls._build(np.asarray(symbols, dtype=object), code[keep], days[keep], prices, volume, dtype)
+
+    @classmethod
+    def from_arrow(cls, table, dtype=PRICE_DTYPE) -> "OHLCBars":
+        """From an Arrow table of the OHLC store (ticker dictionary-encoded, never turned into Python strings)."""
+        import pyarrow.compute as pc
+
+        encoded = pc.dictionary_encode(table["ticker"]).combine_chunks()
+        dictionary = np.asarray(encoded.dictionary.to_pylist(), dtype=object)
+        order = np.argsort(dictionary, kind="stable")
+        rank = np.empty(len(dictionary), dtype=np.int32)
+        rank[order] = np.arange(len(dictionary), dtype=np.int32)
+        code = rank[encoded.indices.to_numpy(zero_copy_only=False)]
+        days = table["trade_date"].to_numpy().astype("datetime64[D]")
+        present = table.column_names
+        prices = {c: table[c].to_numpy() if c in present else None for c in PRICE_COLUMNS}
+        volume = table["volume"].to_numpy() if "volume" in present else None
+        return cls._build(dictionary[order], code, days, prices, volume, dtype)
+
+    # -------------------------------
+    # Shape
+    # -------------------------------
+    def __len__(self) -> int:
+        return len(self.code)
+
+    @property
+    def starts(self) -> np.ndarray:
+        return self.offsets[:-1]
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @property
+    def trade_date(self) -> np.ndarray:
+        """Date of every bar (datetime64[D])."""
+        return self.dates[self.session]
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.code, self.session, self.dates, self.offsets, self.volume,
+                  self.open, self.high, self.low, self.close]
+        names = sum(len(s.encode()) + 8 for s in self.symbols)
+        return sum(a.nbytes for a in arrays if a is not None) + names
+
+    def float_volume(self) -> np.ndarray:
+        """Volume as float64, NaN where missing (what the rolling kernels expect)."""
+        return np.where(self.volume == MISSING_VOLUME, np.nan, self.volume.astype(np.float64))
+
+    def ticker(self, symbol: str) -> dict:
+        """Views of one ticker's bars: trade_date plus every column that was read."""
+        i = int(np.searchsorted(self.symbols, symbol))
+        if i >= len(self.symbols) or self.symbols[i] != symbol:
+            raise KeyError(symbol)
+        rows = slice(self.offsets[i], self.offsets[i + 1])
+        out = {"trade_date": self.dates[self.session[rows]]}
+        for c in (*PRICE_COLUMNS, "volume"):
+            if getattr(self, c) is not None:
+                out[c] = getattr(self, c)[rows]
+        return out
+
+    # -------------------------------
+    # Subsets
+    # -------------------------------
+    def take(self, mask: np.ndarray) -> "OHLCBars":
+        """Bars where ``mask`` is True (still grouped by ticker); ``self`` when all are kept."""
+        if mask.all():
+            return self
+        used = np.zeros(len(self.symbols), dtype=bool)
+        used[self.code[mask]] = True
+        recode = np.cumsum(used, dtype=np.int32) - 1
+        session = self.session[mask]
+        present = np.zeros(len(self.dates), dtype=bool)
+        present[session] = True
+        resession = np.cumsum(present, dtype=np.int32) - 1
+
+        def pick(values):
+            return None if values is None else values[mask]
+
+        return OHLCBars(
+            self.symbols[used], recode[self.code[mask]], resession[session], self.dates[present],
+            open=pick(self.open), high=pick(self.high), low=pick(self.low), close=pick(self.close),
+            volume=pick(self.volume),
+        )
+
+    def select(self, tickers=None, start=None, end=None) -> "OHLCBars":
+        """Bars of ``tickers`` (default: all) between ``start`` and ``end`` (inclusive)."""
+        mask = np.ones(len(self), dtype=bool)
+        if tickers is not None:
+            mask &= np.isin(self.symbols, list(tickers))[self.code]
+        if start is not None or end is not None:
+            lo = 0 if start is None else np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start).date(), "D"))
+            hi = len(self.dates) if end is None else np.searchsorted(
+                self.dates, np.datetime64(pd.Timestamp(end).date(), "D"), side="right")
+            mask &= (self.session >= lo) & (self.session < hi)
+        return self.take(mask)
+
+    def sessions_only(self, is_session: np.ndarray) -> "OHLCBars":
+        """Bars whose date is a session, given ``is_session`` per entry of ``dates``."""
+        return self.take(np.asarray(is_session, dtype=bool)[self.session])
+
+    # -------------------------------
+    # Views for kernels and legacy code
+    # -------------------------------
+    def last_rows(self, lag: int = 0):
+        """Row ``lag`` bars before each ticker's last bar, and whether the ticker has it."""
+        last = self.offsets[1:] - 1
+        return np.maximum(last - lag, 0), self.lengths > lag
+
+    def padded(self, columns=("open", "high", "low", "close", "volume")) -> dict:
+        """pad_ohlc() layout: (n_tickers, max_bars) float64 grids, bars with no close dropped."""
+        bars = self.take(~np.isnan(self.close)) if self.close is not None else self
+        lengths = bars.lengths
+        width = int(lengths.max()) if len(lengths) else 0
+        pos = np.arange(len(bars)) - bars.offsets[bars.code]
+        arrays = {}
+        for c in columns:
+            grid = np.full((len(bars.symbols), width), np.nan)
+            grid[bars.code, pos] = bars.float_volume() if c == "volume" else getattr(bars, c)
+            arrays[c] = grid
+        dates = np.full((len(bars.symbols), width), np.datetime64("NaT"), dtype="datetime64[D]")
+        dates[bars.code, pos] = bars.trade_date
+        arrays["dates"] = dates
+        arrays["lengths"] = lengths
+        arrays["tickers"] = bars.symbols
+        return arrays
+
+    def to_frame(self) -> pd.DataFrame:
+        """Long frame for code that still wants one (ticker categorical, trade_date datetime64)."""
+        data = {
+            "ticker": pd.Categorical.from_codes(self.code, categories=self.symbols),
+            "trade_date": self.trade_date.astype("datetime64[ns]"),
+        }
+        for c in PRICE_COLUMNS:
+            if getattr(self, c) is not None:
+                data[c] = getattr(self, c)
+        if self.volume is not None:
+            data["volume"] = self.float_volume()
+        return pd.DataFrame(data)
+
+
+def as_bars(ohlc, dtype=PRICE_DTYPE) -> OHLCBars:
+    """``ohlc`` as OHLCBars (frames are converted once)."""
+    return ohlc if isinstance(ohlc, OHLCBars) else OHLCBars.from_frame(ohlc, dtype)
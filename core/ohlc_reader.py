@@ -0,0 +1,250 @@
+"""
+Paged, concurrent reads of the Supabase ``ohlc_data`` table.
+
+Tickers are queried in chunks (one ``in_`` filter each) and every chunk in
+pages, since PostgREST caps each response at its max-rows setting (1000 on
+Supabase). The first page of a chunk also asks for the exact row count, so the
+remaining pages of all chunks can be requested at once on a bounded thread
+pool. Rows go straight into typed NumPy columns, only for the columns asked for.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from core.telemetry import span
+
+# dtype each ohlc_data column is parsed to (trade_date ends up datetime64[ns])
+COLUMN_DTYPES = {
+    "ticker": object,
+    "trade_date": "datetime64[s]",
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "volume": np.float64,
+}
+
+
+def _typed_frame(records: list, columns: list) -> pd.DataFrame:
+    """PostgREST JSON rows -> DataFrame with one typed NumPy array per column (None -> NaN/NaT)."""
+    data = {}
+    for c in columns:
+        values = np.array([r.get(c) for r in records], dtype=COLUMN_DTYPES.get(c, object))
+        if c == "trade_date":
+            values = values.astype("datetime64[ns]")
+        data[c] = values
+    return pd.DataFrame(data, columns=columns)
+
+
+class OHLCReader:
+    """
+    Complete reads of ``table`` for many tickers, ordered by (ticker, trade_date).
+
+    ``chunk`` tickers go in one filter and pages ask for ``page_size`` rows; when
+    the server returns fewer (a lower max-rows cap) the pages shrink to match.
+    Clients without row counts are paged one request after another instead.
+    ``requests`` counts the HTTP requests made, for throughput measurements.
+    """
+
+    def __init__(self, page_size: int = 1000, chunk: int = 100, max_workers: int = 8, table: str = "ohlc_data"):
+        self.page_size = page_size
+        self.chunk = chunk
+        self.max_workers = max_workers
+        self.table = table
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _page(self, client, tickers, columns, since, until, start: int, stop: int, count: bool = False):
+        query = client.table(self.table)
+        query = query.select(",".join(columns), count="exact") if count else query.select(",".join(columns))
+        query = query.in_("ticker", tickers)
+        if since is not None:
+            query = query.gte("trade_date", since)
+        if until is not None:
+            query = query.lte("trade_date", until)
+        resp = query.order("ticker").order("trade_date").range(start, stop - 1).execute()
+        with self._lock:
+            self.requests += 1
+        return getattr(resp, "data", None) or [], getattr(resp, "count", None)
+
+    def _span(self, client, tickers, columns, since, until, start: int, stop: int) -> list:
+        """Rows [start, stop), re-requesting the remainder whenever a response comes back short."""
+        rows = []
+        while start < stop:
+            data, _ = self._page(client, tickers, columns, since, until, start, stop)
+            if not data:
+                break
+            rows.extend(data)
+            start += len(data)
+        return rows
+
+    def _drain(self, client, tickers, columns, since, until, start: int) -> list:
+        """Rows from ``start`` on, page after page, for clients that report no row count."""
+        rows = []
+        while True:
+            data, _ = self._page(client, tickers, columns, since, until, start, start + self.page_size)
+            if not data:
+                return rows
+            rows.extend(data)
+            start += len(data)
+
+    def read(self, client, tickers: list, since=None, until=None, columns: list = None) -> pd.DataFrame:
+        """
+        Every row of ``tickers`` with ``since`` <= trade_date <= ``until`` (ISO
+        strings, both optional), with only ``columns`` requested and returned.
+        """
+        columns = list(columns or COLUMN_DTYPES)
+        tickers = list(dict.fromkeys(tickers))
+        batches = [tickers[i:i + self.chunk] for i in range(0, len(tickers), self.chunk)]
+        if not batches:
+            return _typed_frame([], columns)
+        with span("ohlc_reader.read", table=self.table, tickers=len(tickers)) as s:
+            requests = self.requests
+            df = self._read(client, batches, since, until, columns)
+            s.set(rows=len(df), requests=self.requests - requests)
+            return df
+
+    def _read(self, client, batches: list, since, until, columns: list) -> pd.DataFrame:
+        pages = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(batches)))) as pool:
+            firsts = {
+                pool.submit(self._page, client, batch, columns, since, until, 0, self.page_size, True): i
+                for i, batch in enumerate(batches)
+            }
+            rest = {}
+            for future in as_completed(firsts):
+                i = firsts[future]
+                data, total = future.result()
+                pages[(i, 0)] = data
+                if total is None:
+                    if len(data):
+                        rest[pool.submit(self._drain, client, batches[i], columns, since, until, len(data))] = (i, 1)
+                    continue
+                # a short first page of a larger result is the server's max-rows cap
+                step = len(data) if 0 < len(data) < min(self.page_size, total) else self.page_size
+                for start in range(len(data), total, step):
+                    stop = min(start + step, total)
+                    rest[pool.submit(self._span, client, batches[i], columns, since, until, start, stop)] = (i, start)
+            for future, key in rest.items():
+                pages[key] = future.result()
+
+        records = [row for key in sorted(pages) for row in pages[key]]
+        return _typed_frame(records, columns)
+
+
+class LocalPostgREST:
+    """
+    In-process stand-in for a Supabase client, serving ``tables``
+    ({name: DataFrame}) through the query-builder calls the readers use:
+    table().select(columns, count=).in_/eq/gte/lte/order/range().execute().
+
+    Responses hold at most ``max_rows`` rows, like PostgREST's db-max-rows, as
+    JSON-style records (dates as ISO strings, missing values as None), and each
+    request waits ``latency`` seconds to stand in for the network round trip.
+    """
+
+    def __init__(self, tables: dict, max_rows: int = 1000, latency: float = 0.0):
+        self.tables = {}
+        for name, df in tables.items():
+            df = df.copy()
+            for c in df.columns:
+                if pd.api.types.is_datetime64_any_dtype(df[c]):
+                    df[c] = df[c].dt.strftime("%Y-%m-%d")
+            self.tables[name] = df.astype(object).where(df.notna(), None)
+        self.max_rows = max_rows
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._results = {}
+
+    def table(self, name: str) -> "_LocalQuery":
+        return _LocalQuery(self, name)
+
+    def _rows(self, name: str, filters: tuple, orders: tuple) -> pd.DataFrame:
+        """Filtered, ordered rows of a query (cached, so its pages only slice)."""
+        key = (name, filters, orders)
+        with self._lock:
+            self.requests += 1
+            if key in self._results:
+                return self._results[key]
+        df = self.tables[name]
+        mask = np.ones(len(df), dtype=bool)
+        for op, column, value in filters:
+            values = df[column]
+            if op == "in":
+                mask &= values.isin(list(value)).to_numpy()
+            elif op == "eq":
+                mask &= (values == value).to_numpy()
+            elif op == "gte":
+                mask &= (values >= value).to_numpy()
+            elif op == "lte":
+                mask &= (values <= value).to_numpy()
+        df = df[mask]
+        if orders:
+            df = df.sort_values([c for c, _ in orders], ascending=[a for _, a in orders], kind="stable")
+        with self._lock:
+            self._results[key] = df
+        return df
+
+
+class _LocalResponse:
+    def __init__(self, data: list, count: int = None):
+        self.data = data
+        self.count = count
+
+
+class _LocalQuery:
+    def __init__(self, server: LocalPostgREST, name: str):
+        self._server = server
+        self._name = name
+        self._filters = []
+        self._columns = None
+        self._count = False
+        self._orders = []
+        self._range = None
+
+    def select(self, columns: str = "*", count: str = None):
+        self._columns = None if columns == "*" else columns.split(",")
+        self._count = count == "exact"
+        return self
+
+    def in_(self, column: str, values):
+        self._filters.append(("in", column, tuple(values)))
+        return self
+
+    def eq(self, column: str, value):
+        self._filters.append(("eq", column, value))
+        return self
+
+    def gte(self, column: str, value):
+        self._filters.append(("gte", column, value))
+        return self
+
+    def lte(self, column: str, value):
+        self._filters.append(("lte", column, value))
+        return self
+
+    def order(self, column: str, desc: bool = False):
+        self._orders.append((column, not desc))
+        return self
+
+    def range(self, start: int, end: int):
+        self._range = (start, end)
+        return self
+
+    def limit(self, n: int):
+        self._range = (0, n - 1)
+        return self
+
+    def execute(self) -> _LocalResponse:
+        if self._server.latency:
+            time.sleep(self._server.latency)
+        df = self._server._rows(self._name, tuple(self._filters), tuple(self._orders))
+        start, end = self._range or (0, len(df) - 1)
+        page = df.iloc[start:min(end + 1, start + self._server.max_rows)]
+        if self._columns is not None:
+            page = page[self._columns]
+        return _LocalResponse(page.to_dict("records"), len(df) if self._count else None)
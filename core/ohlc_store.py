@@ -0,0 +1,260 @@
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from core.ohlc_bars import PRICE_DTYPE, OHLCBars
+from core.ohlc_reader import OHLCReader
+from core.paths import CACHE_DIR, file_lock
+from core.telemetry import span
+
+OHLC_STORE_DIR = os.path.join(CACHE_DIR, "ohlc")
+OHLC_COLUMNS = ["ticker", "trade_date", "open", "high", "low", "close", "volume"]
+OHLC_SCHEMA = pa.schema([
+    ("ticker", pa.string()),
+    ("trade_date", pa.date32()),
+    ("open", pa.float64()),
+    ("high", pa.float64()),
+    ("low", pa.float64()),
+    ("close", pa.float64()),
+    ("volume", pa.float64()),
+])
+
+
+class OHLCStore:
+    """
+    Local Parquet copy of the Supabase ``ohlc_data`` table, one file per ticker.
+
+    sync() pulls only bars newer than the last stored ``trade_date`` of each
+    ticker; read() serves columns and date ranges straight from disk.
+    A small manifest keeps each ticker's first/last stored date so sync never
+    has to open the Parquet files, plus a revision that changes whenever stored
+    history is replaced or corrected (appending new bars keeps it).
+    Several processes may share a store: writes hold a file lock and merge the
+    manifest on disk, and readers pick up the manifest another process saved.
+    """
+
+    def __init__(self, root: str = OHLC_STORE_DIR, page_size: int = 1000, chunk: int = 100, max_workers: int = 8):
+        self.root = root
+        # paged, concurrent reads of ohlc_data (see core.ohlc_reader)
+        self.reader = OHLCReader(page_size=page_size, chunk=chunk, max_workers=max_workers)
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+        self._manifest_path = os.path.join(self.root, "manifest.json")
+        self._manifest_mtime = None
+        self._manifest = {}
+        self._refresh_manifest()
+
+    # -------------------------------
+    # Manifest
+    # -------------------------------
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self._manifest_path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _refresh_manifest(self):
+        """Merge in the manifest on disk when another process has saved it since we last did (caller holds the lock)."""
+        try:
+            mtime = os.stat(self._manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._manifest_mtime:
+            self._manifest.update(self._read_manifest())
+            self._manifest_mtime = mtime
+
+    def _write_manifest(self):
+        tmp = f"{self._manifest_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._manifest, f)
+        os.replace(tmp, self._manifest_path)
+        self._manifest_mtime = os.stat(self._manifest_path).st_mtime_ns
+
+    def _path(self, ticker: str) -> str:
+        return os.path.join(self.root, f"{ticker}.parquet")
+
+    def last_dates(self, tickers=None) -> dict:
+        """Last stored trade_date (ISO string) per ticker, for tickers present in the store."""
+        with self._lock:
+            self._refresh_manifest()
+            items = self._manifest.items() if tickers is None else (
+                (t, self._manifest[t]) for t in tickers if t in self._manifest
+            )
+            return {t: meta["last"] for t, meta in items}
+
+    def meta(self, tickers) -> dict:
+        """{ticker: {"first", "last", "revision"}} for tickers present in the store."""
+        with self._lock:
+            self._refresh_manifest()
+            return {
+                t: {"first": m["first"], "last": m["last"], "revision": m.get("revision", 0)}
+                for t, m in ((t, self._manifest.get(t)) for t in tickers) if m is not None
+            }
+
+    # -------------------------------
+    # Sync from Supabase
+    # -------------------------------
+    def _plan_sync(self, tickers: list, cutoff: str) -> dict:
+        """Group tickers by the trade_date each must be fetched from; returns {since: [(ticker, replace)]}."""
+        plan = {}
+        with self._lock:
+            self._refresh_manifest()
+            for t in tickers:
+                meta = self._manifest.get(t)
+                if meta is None or cutoff < meta["first"]:
+                    # nothing stored, or the window now reaches before what we hold: refetch it
+                    plan.setdefault(cutoff, []).append((t, True))
+                else:
+                    since = (date.fromisoformat(meta["last"]) + timedelta(days=1)).isoformat()
+                    plan.setdefault(since, []).append((t, False))
+        return plan
+
+    def _fetch_remote(self, client, tickers: list, since: str) -> pd.DataFrame:
+        return self.reader.read(client, tickers, since=since, columns=OHLC_COLUMNS)
+
+    def sync(self, client, tickers: list, days: int = 90, start=None) -> int:
+        """
+        Bring the store up to date for ``tickers`` with history from ``start``
+        (default: ``days`` calendar days back). Returns the number of rows fetched from Supabase.
+        """
+        if start is None:
+            start = (datetime.today() - timedelta(days=days)).date()
+        cutoff = pd.Timestamp(start).date().isoformat()
+        fetched = 0
+        with span("ohlc_store.sync", tickers=len(tickers)) as s:
+            plan = self._plan_sync(list(dict.fromkeys(tickers)), cutoff)
+            for since, entries in plan.items():
+                rows = self._fetch_remote(client, [t for t, _ in entries], since)
+                fetched += len(rows)
+                by_ticker = dict(tuple(rows.groupby("ticker", sort=False))) if not rows.empty else {}
+                self.write_many(
+                    (ticker, by_ticker.get(ticker), replace, cutoff if replace else None)
+                    for ticker, replace in entries if replace or ticker in by_ticker
+                )
+            # every stored ticker is still asked for bars after its last one; a hit is when none came back
+            s.set(rows=fetched, cache="miss" if fetched else "hit")
+        return fetched
+
+    # -------------------------------
+    # Local writes / reads
+    # -------------------------------
+    def _to_table(self, df: pd.DataFrame) -> pa.Table:
+        df = df.reindex(columns=OHLC_COLUMNS).copy()
+        df["trade_date"] = pd.to_datetime(df["trade_date"], errors="coerce").dt.date
+        for c in ["open", "high", "low", "close", "volume"]:
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype("float64")
+        df = df.dropna(subset=["trade_date"])
+        return pa.Table.from_pandas(df, schema=OHLC_SCHEMA, preserve_index=False)
+
+    def write(self, ticker: str, rows: pd.DataFrame = None, replace: bool = False, first: str = None):
+        """Append (or with ``replace``, overwrite) bars for one ticker, keeping one row per trade_date."""
+        self.write_many([(ticker, rows, replace, first)])
+
+    def write_many(self, items):
+        """write() for every (ticker, rows, replace, first) in ``items``, saving the manifest once."""
+        with self._lock, file_lock(os.path.join(self.root, "manifest.lock")):
+            # the other process's entries (and files) as of now, so neither overwrites the other's
+            self._manifest_mtime = None
+            self._refresh_manifest()
+            try:
+                for ticker, rows, replace, first in items:
+                    self._write_one(ticker, rows, replace, first)
+            finally:
+                # whatever was written before a failure is on disk, so keep the manifest in step
+                self._write_manifest()
+
+    def _write_one(self, ticker: str, rows, replace: bool, first: str):
+        """One ticker's Parquet file and manifest entry (caller holds the lock and saves the manifest)."""
+        path = self._path(ticker)
+        new = self._to_table(rows if rows is not None else pd.DataFrame(columns=OHLC_COLUMNS))
+        meta = self._manifest.get(ticker, {})
+        stored = pq.read_table(path, schema=OHLC_SCHEMA).to_pandas() if os.path.exists(path) else None
+        df = new.to_pandas()
+        if not replace and stored is not None:
+            df = pd.concat([stored, df], ignore_index=True)
+        df = df.drop_duplicates(subset=["trade_date"], keep="last").sort_values("trade_date", ignore_index=True)
+        # only a change to bars already held is a new revision: new bars, or the same bars
+        # re-sent (another process synced them first), are not
+        rewrites = False
+        if "last" in meta and stored is not None:
+            if replace:
+                rewrites = not df.equals(stored)
+            elif new.num_rows and pc.min(new["trade_date"]).as_py().isoformat() <= meta["last"]:
+                rewrites = len(stored.merge(df, how="inner")) < len(stored)
+        table = pa.Table.from_pandas(df, schema=OHLC_SCHEMA, preserve_index=False)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+
+        if rewrites:
+            meta["revision"] = meta.get("revision", 0) + 1
+        if replace or "first" not in meta:
+            meta["first"] = first or (df["trade_date"].iloc[0].isoformat() if len(df) else date.today().isoformat())
+        # an empty replace still records that the window was fetched, so the next sync is incremental
+        meta["last"] = df["trade_date"].iloc[-1].isoformat() if len(df) else (
+            date.fromisoformat(meta["first"]) - timedelta(days=1)).isoformat()
+        self._manifest[ticker] = meta
+
+    def read(self, tickers: list, start=None, end=None, columns: list = None) -> pd.DataFrame:
+        """
+        Stored bars for ``tickers`` between ``start`` and ``end`` (inclusive), with
+        only ``columns`` materialised. ``trade_date`` comes back as datetime64.
+        """
+        columns = columns or OHLC_COLUMNS
+        if "ticker" not in columns:
+            columns = ["ticker"] + list(columns)
+        table = self._scan(tickers, start, end, columns)
+        if table is None:
+            return pd.DataFrame(columns=columns)
+        df = table.to_pandas(date_as_object=False)
+        if "trade_date" in df.columns:
+            df["trade_date"] = df["trade_date"].astype("datetime64[ns]")
+        return df
+
+    def read_bars(self, tickers: list, start=None, end=None, columns: list = None, dtype=PRICE_DTYPE) -> OHLCBars:
+        """read() as compact OHLCBars, built from the Arrow columns without a pandas frame in between."""
+        columns = ["ticker", "trade_date"] + [c for c in (columns or OHLC_COLUMNS) if c not in ("ticker", "trade_date")]
+        table = self._scan(tickers, start, end, columns)
+        if table is None:
+            table = pa.Table.from_pylist([], schema=pa.schema([OHLC_SCHEMA.field(c) for c in columns]))
+        return OHLCBars.from_arrow(table, dtype)
+
+    def _scan(self, tickers: list, start, end, columns: list):
+        """Arrow table of the stored bars (None when no ticker is stored)."""
+        files = [self._path(t) for t in dict.fromkeys(tickers) if os.path.exists(self._path(t))]
+        if not files:
+            return None
+
+        flt = None
+        if start is not None:
+            flt = ds.field("trade_date") >= pd.Timestamp(start).date()
+        if end is not None:
+            upper = ds.field("trade_date") <= pd.Timestamp(end).date()
+            flt = upper if flt is None else flt & upper
+
+        with span("ohlc_store.scan", files=len(files)) as s:
+            table = ds.dataset(files, schema=OHLC_SCHEMA, format="parquet").to_table(columns=columns, filter=flt)
+            s.set(rows=table.num_rows, bytes=table.nbytes)
+        return table
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_ohlc_store() -> OHLCStore:
+    """Process-wide OHLC store of the data source, shared by the analyzers and pages."""
+    from core.sources import get_data_source
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = OHLCStore(get_data_source().cache_path("ohlc"))
+        return _default_store
@@ -0,0 +1,29 @@
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# Local, git-ignored home for caches and stores that survive restarts
+CACHE_DIR = os.path.join(ROOT_DIR, ".cache")
+
+
+@contextmanager
+def file_lock(path: str):
+    """
+    Exclusive advisory lock on ``path`` (created if missing) for read-modify-write
+    of files shared between processes, e.g. the app and the precompute job.
+    Without fcntl (Windows) this is a no-op.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
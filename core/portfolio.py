@@ -1,52 +1,308 @@
+import threading
+
+import numpy as np
 import pandas as pd
-import gspread
-import streamlit as st
-from oauth2client.service_account import ServiceAccountCredentials
+from core.clients import get_gspread_client
 from core.columns import col
-import json
+from core.fd_benchmark import FDGrid, profit_chart_spec
+from core.sheets import get_snapshot
+from core.telemetry import span
+from core.ui import warning
 
 class PortfolioManager:
-    def __init__(self, sheet_name, creds_dict):
-        scope = [
-            "https://spreadsheets.google.com/feeds",
-            "https://www.googleapis.com/auth/drive"
-        ]
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-        self.client = gspread.authorize(creds)
+    def __init__(self, sheet_name, creds_dict=None):
+        self.creds_dict = creds_dict
         self.sheet_name = sheet_name
 
+    @property
+    def client(self):
+        # 🔐 resolved on first use, from the configured data source (no handshake when it is local)
+        return get_gspread_client(self.creds_dict)
+
     def load(self, tab_name):
-        records = _load_raw_records(self.sheet_name, tab_name)
-        df = pd.DataFrame(records)
-        if df.empty:
-            return df
+        with span("portfolio.load", sheet=self.sheet_name, tab=tab_name) as s:
+            records = get_snapshot(self.sheet_name, tab_name).records(tab_name)
+            df = pd.DataFrame(records)
+            if df.empty:
+                s.set(rows=0)
+                return df
 
-        df[col("ticker")] = df[col("ticker")].astype(str).str.upper()
-        df[col("sell_date")] = pd.to_datetime(df[col("sell_date")], errors="coerce", dayfirst=True).dt.date
-        df[col("buy_date")] = pd.to_datetime(df[col("buy_date")], errors="coerce", dayfirst=True).dt.date
+            df[col("ticker")] = df[col("ticker")].astype(str).str.upper()
+            df[col("sell_date")] = pd.to_datetime(df[col("sell_date")], errors="coerce", dayfirst=True).dt.date
+            df[col("buy_date")] = pd.to_datetime(df[col("buy_date")], errors="coerce", dayfirst=True).dt.date
 
-        for c in [col("buy_price"), col("buy_qty"), col("current_price")]:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
+            for c in [col("buy_price"), col("buy_qty"), col("current_price")]:
+                df[c] = pd.to_numeric(df[c], errors="coerce")
 
-        return df.dropna(subset=[
-            col("ticker"),
-            col("buy_price"),
-            col("buy_qty"),
-            col("current_price")
-        ])
+            df = df.dropna(subset=[
+                col("ticker"),
+                col("buy_price"),
+                col("buy_qty"),
+                col("current_price")
+            ])
+            s.set(rows=len(df))
+            return df
     def load_surcharges(self):
         try:
-            sheet = self.client.open(self.sheet_name).worksheet("Surcharges")
-            records = sheet.get_all_records()
+            records = get_snapshot(self.sheet_name, "Surcharges").records("Surcharges")
             df = pd.DataFrame(records)
             df["Charges"] = pd.to_numeric(df["Charges"], errors="coerce")
             return df.dropna(subset=["Charges"])
         except Exception as e:
-            st.warning(f"⚠️ Failed to load surcharges: {e}")
+            warning(f"⚠️ Failed to load surcharges: {e}")
             return pd.DataFrame(columns=["Date", "Type", "Charges", "Strategy"])
 
-@st.cache_data(ttl=300, show_spinner=True)
-def _load_raw_records(sheet_name, tab_name):
-    client = gspread.service_account_from_dict(json.loads(st.secrets["GOOGLE_CREDS_JSON"]))
-    sheet = client.open(sheet_name).worksheet(tab_name)
-    return sheet.get_all_records()
\ No newline at end of file
+# -------------------------------
+# Ledger of every strategy's lots
+# -------------------------------
+SELL_PRICE = "Sell Price"
+LOT_COLUMNS = ["ticker", "buy_date", "sell_date", "buy_price", "buy_qty", "current_price"]
+
+
+class PortfolioLedger:
+    """
+    Every strategy's portfolio lots in one table, with the aggregates the
+    portfolio, FD benchmark and profit pages show.
+
+    The lot columns are also held as NumPy arrays (dates as datetime64[D], the
+    strategy as a code into ``strategies``). Aggregates are computed on first
+    use and kept on the ledger; get_portfolio_ledger() builds a new ledger only
+    when a portfolio or surcharge tab changes.
+    """
+
+    def __init__(self, portfolios: dict, surcharges: pd.DataFrame = None, version: str = None):
+        self.version = version
+        self.strategies = tuple(portfolios)
+        self.has_sell_price = any(SELL_PRICE in df.columns for df in portfolios.values())
+        columns = [col(c) for c in LOT_COLUMNS] + [SELL_PRICE]
+        frames = [df.reindex(columns=columns).assign(Strategy=name) for name, df in portfolios.items() if not df.empty]
+        lots = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns + ["Strategy"])
+
+        self.ticker = lots[col("ticker")].to_numpy(dtype=object)
+        self.strategy_code = pd.Categorical(lots["Strategy"], categories=self.strategies).codes.astype(np.int16)
+        self.buy_date = pd.to_datetime(lots[col("buy_date")], errors="coerce").to_numpy().astype("datetime64[D]")
+        self.sell_date = pd.to_datetime(lots[col("sell_date")], errors="coerce").to_numpy().astype("datetime64[D]")
+        self.buy_price = pd.to_numeric(lots[col("buy_price")], errors="coerce").to_numpy(dtype=np.float64)
+        self.buy_qty = pd.to_numeric(lots[col("buy_qty")], errors="coerce").to_numpy(dtype=np.float64)
+        self.sell_price = pd.to_numeric(lots[SELL_PRICE], errors="coerce").to_numpy(dtype=np.float64)
+        self.current_price = pd.to_numeric(lots[col("current_price")], errors="coerce").to_numpy(dtype=np.float64)
+        self.cost = self.buy_price * self.buy_qty
+        self.is_open = np.isnat(self.sell_date)
+
+        self.surcharges = surcharges if surcharges is not None else pd.DataFrame(columns=["Date", "Type", "Charges", "Strategy"])
+        self._memo = {}
+
+    @classmethod
+    def load(cls, strategy_config: dict, version: str = None) -> "PortfolioLedger":
+        """Read every portfolio tab (and each sheet's Surcharges tab) once."""
+        managers = {}
+        portfolios = {}
+        for name, config in strategy_config.items():
+            sheet = config["sheet_name"]
+            manager = managers.setdefault(sheet, PortfolioManager(sheet))
+            portfolios[name] = manager.load(config["portfolio_tab"])
+        surcharges = pd.concat([m.load_surcharges() for m in managers.values()], ignore_index=True)
+        return cls(portfolios, surcharges, version)
+
+    def __len__(self) -> int:
+        return len(self.ticker)
+
+    def _frame(self, rows: np.ndarray) -> pd.DataFrame:
+        """Lots at ``rows`` as a display frame (sheet column names)."""
+        return pd.DataFrame({
+            col("ticker"): self.ticker[rows],
+            "Strategy": np.asarray(self.strategies, dtype=object)[self.strategy_code[rows]]
+            if self.strategies else np.empty(0, dtype=object),
+            col("buy_date"): self.buy_date[rows].astype("datetime64[ns]"),
+            col("sell_date"): self.sell_date[rows].astype("datetime64[ns]"),
+            col("buy_price"): self.buy_price[rows],
+            col("buy_qty"): self.buy_qty[rows],
+            SELL_PRICE: self.sell_price[rows],
+            col("current_price"): self.current_price[rows],
+        })
+
+    def _cached(self, key, build):
+        if key not in self._memo:
+            self._memo[key] = build()
+        return self._memo[key]
+
+    # -------------------------------
+    # Open lots
+    # -------------------------------
+    @property
+    def open_investment(self) -> float:
+        return float(np.nansum(self.cost[self.is_open]))
+
+    def open_positions(self, sell_threshold_pct: float = 12) -> pd.DataFrame:
+        """
+        Open lots consolidated per (ticker, strategy). ``Highlight`` is SELL where
+        the ticker's open lots across all strategies are up ``sell_threshold_pct``.
+        """
+        return self._cached(("open", sell_threshold_pct), lambda: self._open_positions(sell_threshold_pct))
+
+    def _open_positions(self, sell_threshold_pct: float) -> pd.DataFrame:
+        lots = self._frame(np.flatnonzero(self.is_open))
+        lots["weighted_cost"] = lots[col("buy_price")] * lots[col("buy_qty")]
+
+        by_ticker = lots.groupby(col("ticker")).agg(
+            cost=("weighted_cost", "sum"), qty=(col("buy_qty"), "sum"), price=(col("current_price"), "first"))
+        avg_buy = by_ticker["cost"] / by_ticker["qty"]
+        sell = ((by_ticker["price"] - avg_buy) / avg_buy) * 100 >= sell_threshold_pct
+        lots["Highlight"] = lots[col("ticker")].map(sell).map({True: "SELL"}).fillna("NORMAL")
+
+        positions = (
+            lots.groupby([col("ticker"), "Strategy", "Highlight"], as_index=False)
+            .agg({col("buy_qty"): "sum", "weighted_cost": "sum", col("current_price"): "first"})
+            .rename(columns={
+                col("ticker"): "Ticker",
+                col("buy_qty"): "Total Qty",
+                "weighted_cost": "Total Cost",
+                col("current_price"): "Current Price"
+            })
+        )
+        positions["Total Qty"] = positions["Total Qty"].astype(int)
+        positions["Avg Buy Price"] = positions["Total Cost"] / positions["Total Qty"]
+        positions["Investment"] = positions["Avg Buy Price"] * positions["Total Qty"]
+        positions["Current Value"] = positions["Current Price"] * positions["Total Qty"]
+        positions["Profit"] = positions["Current Value"] - positions["Investment"]
+        positions["Profit %"] = (positions["Profit"] / positions["Investment"]) * 100
+        positions[f"Target Price ({sell_threshold_pct:g}%)"] = positions["Avg Buy Price"] * (1 + sell_threshold_pct / 100)
+        return positions
+
+    # -------------------------------
+    # Sold lots
+    # -------------------------------
+    @property
+    def realized(self) -> pd.DataFrame:
+        """Sold lots with Investment, RealizedValue, Profit and Days Held (NaN without a buy date)."""
+        def build():
+            sold = np.flatnonzero(~self.is_open)
+            lots = self._frame(sold)
+            lots["Investment"] = self.cost[sold]
+            lots["RealizedValue"] = self.sell_price[sold] * self.buy_qty[sold]
+            lots["Profit"] = lots["RealizedValue"] - lots["Investment"]
+            days = (self.sell_date[sold] - self.buy_date[sold]).astype("timedelta64[D]").astype(np.float64)
+            lots["Days Held"] = np.clip(days, 1, None)
+            return lots
+        return self._cached("realized", build)
+
+    @property
+    def strategy_summary(self) -> pd.DataFrame:
+        """Realized Investment, RealizedValue, Profit and Profit % per strategy."""
+        def build():
+            summary = self.realized.groupby("Strategy").agg({
+                "Investment": "sum",
+                "RealizedValue": "sum",
+                "Profit": "sum"
+            }).reset_index()
+            summary["Profit %"] = (summary["Profit"] / summary["Investment"]) * 100
+            return summary
+        return self._cached("strategy_summary", build)
+
+    @property
+    def surcharge_total(self) -> float:
+        return float(self.surcharges["Charges"].sum()) if "Charges" in self.surcharges.columns else 0.0
+
+    @property
+    def totals(self) -> dict:
+        """Overall realized figures: investment, value, profit and net of surcharges."""
+        def build():
+            invested = self.realized["Investment"].sum()
+            realized = self.realized["RealizedValue"].sum()
+            profit = realized - invested
+            net = profit - self.surcharge_total
+            return {
+                "open_investment": self.open_investment,
+                "investment": invested,
+                "realized": realized,
+                "profit": profit,
+                "profit_pct": (profit / invested * 100) if invested > 0 else 0,
+                "surcharges": self.surcharge_total,
+                "net_profit": net,
+                "net_profit_pct": (net / invested * 100) if invested > 0 else 0,
+            }
+        return self._cached("totals", build)
+
+    # -------------------------------
+    # FD benchmark
+    # -------------------------------
+    @property
+    def fd_grid(self) -> FDGrid:
+        """FD returns of the dated sold lots at every FD_RATES rate and method."""
+        def build():
+            lots = self.realized.dropna(subset=[col("buy_date"), col("sell_date")])
+            rows = lots.index.to_numpy()
+            sold = np.flatnonzero(~self.is_open)[rows]
+            return FDGrid(self.ticker[sold], self.buy_date[sold], self.sell_date[sold],
+                          lots["Investment"].to_numpy(), lots["RealizedValue"].to_numpy())
+        return self._cached("fd_grid", build)
+
+    def fd_comparison(self, fd_rate: float, method: str = "simple") -> pd.DataFrame:
+        """Sold lots with both dates, against an FD at ``fd_rate`` % a year (``method`` of FD_METHODS)."""
+        def build():
+            grid = self.fd_grid
+            lots = self.realized.dropna(subset=[col("buy_date"), col("sell_date")]).copy()
+            lots["FD Return"] = grid.lot_return(fd_rate, method)
+            lots["Strategy Profit"] = lots["Profit"]
+            lots["FD Profit"] = lots["FD Return"] - lots["Investment"]
+            lots["Excess Profit"] = lots["Strategy Profit"] - lots["FD Profit"]
+            lots["Underperforming FD"] = lots["RealizedValue"] < lots["FD Return"]
+            lots["Strategy XIRR %"] = grid.lot_xirr * 100
+            return lots
+        return self._cached(("fd", fd_rate, method), build)
+
+    def fd_benchmark(self, fd_rate: float, method: str = "simple") -> pd.DataFrame:
+        """fd_comparison() summed per ticker, with Strategy/FD/Excess percentages and the ticker's XIRR."""
+        def build():
+            grid = self.fd_grid
+            benchmark = pd.DataFrame({
+                "Ticker": np.asarray(grid.tickers, dtype=object),
+                "Investment": grid.ticker_invested,
+                "RealizedValue": grid.ticker_realized,
+                "FD Return": grid.ticker_return(fd_rate, method),
+            })
+            benchmark["Strategy Profit"] = benchmark["RealizedValue"] - benchmark["Investment"]
+            benchmark["FD Profit"] = benchmark["FD Return"] - benchmark["Investment"]
+            benchmark["Excess Profit"] = benchmark["Strategy Profit"] - benchmark["FD Profit"]
+            benchmark["Strategy %"] = (benchmark["Strategy Profit"] / benchmark["Investment"]) * 100
+            benchmark["FD %"] = (benchmark["FD Profit"] / benchmark["Investment"]) * 100
+            benchmark["Excess %"] = benchmark["Strategy %"] - benchmark["FD %"]
+            benchmark["Strategy XIRR %"] = grid.ticker_xirr * 100
+            return benchmark
+        return self._cached(("fd_benchmark", fd_rate, method), build)
+
+    def fd_chart(self, fd_rate: float, method: str = "simple", outperformers_only: bool = False) -> dict:
+        """Cached Plotly spec of Strategy vs FD profit per ticker (see profit_chart_spec)."""
+        def build():
+            benchmark = self.fd_benchmark(fd_rate, method)
+            if outperformers_only:
+                benchmark = benchmark[benchmark["Excess Profit"] > 0]
+            return profit_chart_spec(benchmark)
+        return self._cached(("fd_chart", fd_rate, method, outperformers_only), build)
+
+_ledger_cache = {}
+_ledger_lock = threading.Lock()
+
+
+def ledger_version(strategy_config: dict) -> str:
+    """Content hash of every portfolio and Surcharges tab the ledger reads."""
+    tabs = {}
+    for config in strategy_config.values():
+        tabs.setdefault(config["sheet_name"], ["Surcharges"]).append(config["portfolio_tab"])
+    return "|".join(f"{sheet}:{get_snapshot(sheet).digest(t)}" for sheet, t in sorted(tabs.items()))
+
+
+def get_portfolio_ledger(strategy_config: dict) -> PortfolioLedger:
+    """Process-wide ledger of ``strategy_config``, rebuilt only when its tabs change."""
+    key = tuple((name, c["sheet_name"], c["portfolio_tab"]) for name, c in strategy_config.items())
+    with span("portfolio.ledger") as s:
+        version = ledger_version(strategy_config)
+        with _ledger_lock:
+            ledger = _ledger_cache.get(key)
+            s.set(cache="hit")
+            if ledger is None or ledger.version != version:
+                ledger = PortfolioLedger.load(strategy_config, version)
+                _ledger_cache[key] = ledger
+                s.set(cache="miss")
+            s.set(rows=len(ledger))
+            return ledger
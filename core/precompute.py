@@ -0,0 +1,267 @@
+"""
+End-of-day precompute: a headless job that ingests the day's OHLC bars, runs
+every strategy, builds the portfolio ledger and writes all of it as one
+versioned results snapshot. The pages read the latest snapshot (one file,
+cached in memory until it changes) and compute live only when there is no
+snapshot for the last close.
+
+    python -m core.precompute --once          # now (e.g. from cron)
+    python -m core.precompute                 # daemon: after every NSE close
+    python -m core.precompute --at 18:30 --no-ingest
+
+Snapshots are pickles written by this job only, at
+<data source cache>/results/<version>.pkl, with latest.pkl pointing at the newest.
+"""
+import logging
+import os
+import pickle
+import threading
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from core.telemetry import span
+from core.ui import warning
+
+log = logging.getLogger(__name__)
+
+MARKET_TZ = ZoneInfo("Asia/Kolkata")
+RUN_AT = "16:00"           # NSE closes at 15:30 IST; leave time for the day's bars to land
+KEEP_SNAPSHOTS = 10
+INGEST_SESSIONS = 120
+
+
+class ResultsSnapshot:
+    """
+    Everything the pages show for one close: each strategy's result frame,
+    analysis frame and sheet summary, and the portfolio ledger with its
+    aggregates already computed.
+    """
+
+    def __init__(self, session, fingerprint: str, results: dict, analysis: dict, summaries: dict,
+                 ledger, timings: dict = None):
+        self.version = datetime.now(MARKET_TZ).strftime("%Y%m%d-%H%M%S")
+        self.created_at = datetime.now(MARKET_TZ)
+        self.session = session
+        self.fingerprint = fingerprint
+        self.results = results
+        self.analysis = analysis
+        self.summaries = summaries
+        self.ledger = ledger
+        self.timings = timings or {}
+
+    def caption(self) -> str:
+        return f"📦 Precomputed after the {self.session:%d %b} close ({self.created_at:%d %b %H:%M} IST)"
+
+
+def results_dir() -> str:
+    from core.sources import get_data_source
+    return get_data_source().cache_path("results")
+
+
+def strategies_fingerprint(strategy_config: dict) -> str:
+    from core.runner import config_fingerprint
+    return "|".join(f"{name}:{config_fingerprint(c)}" for name, c in sorted(strategy_config.items()))
+
+
+def last_close(now: datetime = None, run_at: str = RUN_AT):
+    """Session of the newest close a snapshot should cover at ``now`` (its data is ready from ``run_at``)."""
+    from core.trading_calendar import get_trading_calendar
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    hour, minute = map(int, run_at.split(":"))
+    calendar = get_trading_calendar()
+    day = now.date()
+    if now.hour * 60 + now.minute < hour * 60 + minute:
+        day -= timedelta(days=1)
+    return calendar.last_session(day)
+
+
+# -------------------------------
+# Writing
+# -------------------------------
+def precompute(strategy_config: dict, ingest: bool = True, sessions: int = INGEST_SESSIONS,
+               root: str = None) -> ResultsSnapshot:
+    """Ingest (optionally), run every strategy, build the ledger and write the snapshot; returns it."""
+    from core.clients import get_supabase_client
+    from core.columns import col
+    from core.fetcher import DataFetcher
+    from core.ingest import OHLCIngestor
+    from core.portfolio import get_portfolio_ledger
+    from core.registry import analyzer_class
+    from core.runner import clear_result_cache, latest_ohlc_date, run_all
+    from core.sheets import clear_snapshots
+    from core.trading_calendar import get_trading_calendar
+
+    root = root or results_dir()
+    session = last_close()
+    with span("precompute.run", session=str(session)) as s:
+        # fresh sheet values and OHLC, not whatever this process cached earlier
+        clear_snapshots()
+        clear_result_cache()
+        latest_ohlc_date.clear()
+
+        if ingest:
+            with span("precompute.ingest") as si:
+                tickers = []
+                for config in strategy_config.values():
+                    if getattr(analyzer_class(config), "uses_ohlc", False):
+                        fetcher = DataFetcher(config["sheet_name"])
+                        for tab in config["buy_tabs"]:
+                            df = fetcher.fetch(tab)
+                            if col("ticker") in df.columns:
+                                tickers += df[col("ticker")].dropna().tolist()
+                start = get_trading_calendar().window_start(sessions)
+                summary = OHLCIngestor(get_supabase_client()).run(list(dict.fromkeys(tickers)), start=start)
+                latest_ohlc_date.clear()
+                si.set(rows=summary["rows"], failed=len(summary["failed"]))
+                if summary["failed"]:
+                    log.warning("OHLC ingest failed for %d tickers: %s", len(summary["failed"]),
+                                ", ".join(summary["failed"]))
+
+        with span("precompute.strategies"):
+            results, runners, timings = run_all(strategy_config)
+            analysis = {n: r.analyzer.analysis_df for n, r in runners.items() if hasattr(r.analyzer, "analysis_df")}
+            summaries = {n: r.analyzer.get_sheet_summary() for n, r in runners.items()
+                         if hasattr(r.analyzer, "get_sheet_summary")}
+
+        with span("precompute.ledger"):
+            ledger = get_portfolio_ledger(strategy_config)
+            # the aggregates the pages show by default, computed before pickling
+            ledger.open_positions(sell_threshold_pct=12)
+            ledger.totals
+            ledger.strategy_summary
+            ledger.fd_grid
+
+        snapshot = ResultsSnapshot(session, strategies_fingerprint(strategy_config), results, analysis, summaries,
+                                   ledger, timings)
+        with span("precompute.write") as sw:
+            path = write_snapshot(snapshot, root)
+            sw.set(bytes=os.path.getsize(path))
+        s.set(version=snapshot.version)
+    return snapshot
+
+
+def write_snapshot(snapshot: ResultsSnapshot, root: str, keep: int = KEEP_SNAPSHOTS) -> str:
+    """Write ``snapshot`` as <version>.pkl, point latest.pkl at it and drop all but the ``keep`` newest."""
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, f"{snapshot.version}.pkl")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+    latest = os.path.join(root, "latest.pkl")
+    tmp = f"{latest}.{os.getpid()}.tmp"
+    os.link(path, tmp)
+    os.replace(tmp, latest)
+
+    versions = sorted(f for f in os.listdir(root) if f.endswith(".pkl") and f != "latest.pkl")
+    for old in versions[:-keep]:
+        os.remove(os.path.join(root, old))
+    return path
+
+
+# -------------------------------
+# Reading (pages)
+# -------------------------------
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def read_snapshot(root: str = None):
+    """Latest snapshot under ``root``, or None; re-read only when latest.pkl changes."""
+    path = os.path.join(root or results_dir(), "latest.pkl")
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _loaded_lock:
+        cached = _loaded.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+    with span("precompute.read", bytes=stat.st_size) as s:
+        try:
+            with open(path, "rb") as f:
+                snapshot = pickle.load(f)
+        except Exception as e:
+            warning(f"⚠️ Could not read results snapshot {path}: {e}")
+            return None
+        s.set(version=snapshot.version)
+    with _loaded_lock:
+        _loaded[path] = (key, snapshot)
+    return snapshot
+
+
+def load_results(strategy_config: dict):
+    """Latest snapshot if it covers the last close and the current ``strategy_config``, else None."""
+    snapshot = read_snapshot()
+    if snapshot is None:
+        return None
+    if snapshot.session < last_close() or snapshot.fingerprint != strategies_fingerprint(strategy_config):
+        return None
+    return snapshot
+
+
+def load_ledger(strategy_config: dict, snapshot: ResultsSnapshot = None):
+    """``snapshot``'s ledger while the portfolio tabs still match it, else the shared live ledger."""
+    from core.portfolio import get_portfolio_ledger, ledger_version
+    if snapshot is not None and snapshot.ledger.version == ledger_version(strategy_config):
+        return snapshot.ledger
+    return get_portfolio_ledger(strategy_config)
+
+
+# -------------------------------
+# Scheduler
+# -------------------------------
+def next_run(now: datetime = None, run_at: str = RUN_AT) -> datetime:
+    """First ``run_at`` (IST) on an NSE session after ``now``."""
+    from core.trading_calendar import get_trading_calendar
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    hour, minute = map(int, run_at.split(":"))
+    calendar = get_trading_calendar()
+    day = now.date()
+    while True:
+        at = datetime(day.year, day.month, day.day, hour, minute, tzinfo=MARKET_TZ)
+        if at > now and calendar.is_session([day])[0]:
+            return at
+        day += timedelta(days=1)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Precompute strategy results and portfolio aggregates after the close.")
+    parser.add_argument("--once", action="store_true", help="run now and exit (for cron)")
+    parser.add_argument("--at", default=RUN_AT, help="daemon run time on each NSE session, HH:MM IST")
+    parser.add_argument("--no-ingest", action="store_true", help="skip loading the day's OHLC into Supabase")
+    parser.add_argument("--sessions", type=int, default=INGEST_SESSIONS, help="OHLC history to keep ingested")
+    args = parser.parse_args(argv)
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    from config import STRATEGY_CONFIG
+
+    def run():
+        began = time.perf_counter()
+        snapshot = precompute(STRATEGY_CONFIG, ingest=not args.no_ingest, sessions=args.sessions)
+        print(f"✅ Snapshot {snapshot.version} for the {snapshot.session} close "
+              f"in {time.perf_counter() - began:.1f}s", flush=True)
+
+    if args.once:
+        run()
+        return 0
+
+    while True:
+        at = next_run(run_at=args.at)
+        print(f"🌀 Next precompute at {at:%Y-%m-%d %H:%M} IST", flush=True)
+        while (wait := (at - datetime.now(MARKET_TZ)).total_seconds()) > 0:
+            time.sleep(min(wait, 300))
+        try:
+            run()
+        except Exception as e:
+            # keep the daemon alive; the pages fall back to computing live
+            log.exception("Precompute failed: %s", e)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
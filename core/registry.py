@@ -0,0 +1,47 @@
+"""
+Analyzers by name, imported on first use.
+
+STRATEGY_CONFIG names its analyzer ("analyzer": "Nifty200RSIAnalyzer") instead
+of importing the class, so loading the config (every page does) costs no
+analyzer imports; a page that never runs a strategy never loads them.
+"""
+import importlib
+import threading
+
+# name -> module defining it
+ANALYZERS = {
+    "SignalAnalyzer": "core.analyzers",
+    "ConsolidateAnalyzer": "core.analyzers",
+    "TrendingValueAnalyzer": "core.analyzers",
+    "GARPAnalyzer": "core.analyzers",
+    "Nifty200RSIAnalyzer": "core.analyzers",
+    "EarningsGapAnalyzer": "core.analyzers",
+}
+
+_lock = threading.Lock()
+_classes = {}
+
+
+def register_analyzer(name: str, module: str):
+    """Make analyzer class ``name`` of ``module`` available to STRATEGY_CONFIG."""
+    with _lock:
+        ANALYZERS[name] = module
+        _classes.pop(name, None)
+
+
+def get_analyzer(name: str) -> type:
+    """Analyzer class ``name``, importing its module the first time."""
+    with _lock:
+        cls = _classes.get(name)
+    if cls is None:
+        if name not in ANALYZERS:
+            raise KeyError(f"Unknown analyzer {name!r} (known: {', '.join(ANALYZERS)})")
+        cls = getattr(importlib.import_module(ANALYZERS[name]), name)
+        with _lock:
+            _classes[name] = cls
+    return cls
+
+
+def analyzer_class(config: dict) -> type:
+    """Analyzer class of a STRATEGY_CONFIG entry."""
+    return get_analyzer(config["analyzer"])
@@ -0,0 +1,321 @@
+"""
+Persisted per-ticker Wilder RSI and RSI-cycle state.
+
+Each ticker keeps its running Wilder averages, last close/date and the
+dip/trigger/active flags of the RSI cycle rule, so a new daily bar is one
+constant-time step() instead of a 90-day recompute. Each state is seeded at
+a fixed date (the start of the analyzer's window when the ticker was first
+seen) and keeps it, so its values move neither with the start of a fetch
+window nor with how deep other callers have synced the OHLC store. A ticker is
+recomputed from its seed only when its stored bars change (correction, new rule).
+States live in the signal state store, which also logs every Active/Inactive flip;
+the app and the precompute job share it, so each re-reads the rows the other
+saved before planning and before saving.
+"""
+import hashlib
+import json
+import math
+import threading
+
+import numpy as np
+
+from core.backtest import pad_ohlc
+from core.ohlc_bars import as_bars
+from core.rules import RSI_RULE
+from core.signal_state import get_signal_store
+
+
+def new_state(rule: dict) -> dict:
+    return {
+        "bars": 0, "sum_gain": 0.0, "sum_loss": 0.0, "avg_gain": None, "avg_loss": None,
+        "last_close": None, "last_date": None, "rsi": None,
+        "bars_since_dip": rule["lookback"], "peak_since_dip": None,
+        "triggered": False, "active": False,
+    }
+
+
+def step(state: dict, trade_date: str, close: float, rule: dict) -> dict:
+    """
+    Advance ``state`` by one bar in place. Matches wilder_rsi_2d (seed = mean of
+    the first ``period`` changes, first RSI one bar later) and rsi_active_2d.
+    """
+    period = rule["period"]
+    k = state["bars"]  # index of this bar = number of price changes so far
+    if k > 0:
+        delta = close - state["last_close"]
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        if k <= period:
+            state["sum_gain"] += gain
+            state["sum_loss"] += loss
+            if k == period:
+                state["avg_gain"] = state["sum_gain"] / period
+                state["avg_loss"] = state["sum_loss"] / period
+        else:
+            state["avg_gain"] = (state["avg_gain"] * (period - 1) + gain) / period
+            state["avg_loss"] = (state["avg_loss"] * (period - 1) + loss) / period
+            avg_loss = state["avg_loss"]
+            state["rsi"] = 100.0 if avg_loss == 0 else 100 - 100 / (1 + state["avg_gain"] / avg_loss)
+    state["bars"] = k + 1
+    state["last_close"] = float(close)
+    state["last_date"] = trade_date
+
+    rsi = state["rsi"] if k > period else None
+    if rsi is not None and rsi <= rule["dip"]:
+        state["bars_since_dip"] = 0
+        state["peak_since_dip"] = rsi
+    else:
+        state["bars_since_dip"] = min(state["bars_since_dip"] + 1, rule["lookback"])
+        if rsi is not None and (state["peak_since_dip"] is None or rsi > state["peak_since_dip"]):
+            state["peak_since_dip"] = rsi
+    peak = state["peak_since_dip"]
+    state["triggered"] = bool(
+        state["bars_since_dip"] < rule["lookback"] and peak is not None and rule["cross"] <= peak < rule["block"]
+    )
+    cleared = rsi is not None and rsi >= rule["clear"]
+    state["active"] = (state["active"] and not cleared) or state["triggered"]
+    return state
+
+
+def replay_2d(close: np.ndarray, lengths: np.ndarray, rule: dict) -> dict:
+    """
+    step() over whole histories for many tickers at once: (n, width) closes,
+    left-aligned and NaN-padded. Returns the final state fields as arrays.
+    """
+    n, width = close.shape
+    period, lookback = rule["period"], rule["lookback"]
+    lengths = np.asarray(lengths)
+    s = {
+        "sum_gain": np.zeros(n), "sum_loss": np.zeros(n),
+        "avg_gain": np.full(n, np.nan), "avg_loss": np.full(n, np.nan), "rsi": np.full(n, np.nan),
+        "bars_since_dip": np.full(n, lookback), "peak_since_dip": np.full(n, np.nan),
+        "triggered": np.zeros(n, dtype=bool), "active": np.zeros(n, dtype=bool),
+    }
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for t in range(1, width):
+            live = t < lengths
+            delta = close[:, t] - close[:, t - 1]
+            gain, loss = np.clip(delta, 0, None), np.clip(-delta, 0, None)
+            rsi = np.full(n, np.nan)
+            if t <= period:
+                s["sum_gain"] = np.where(live, s["sum_gain"] + gain, s["sum_gain"])
+                s["sum_loss"] = np.where(live, s["sum_loss"] + loss, s["sum_loss"])
+                if t == period:
+                    s["avg_gain"] = np.where(live, s["sum_gain"] / period, np.nan)
+                    s["avg_loss"] = np.where(live, s["sum_loss"] / period, np.nan)
+            else:
+                s["avg_gain"] = np.where(live, (s["avg_gain"] * (period - 1) + gain) / period, s["avg_gain"])
+                s["avg_loss"] = np.where(live, (s["avg_loss"] * (period - 1) + loss) / period, s["avg_loss"])
+                rsi = np.where(s["avg_loss"] == 0, 100.0, 100 - 100 / (1 + s["avg_gain"] / s["avg_loss"]))
+                s["rsi"] = np.where(live, rsi, s["rsi"])
+
+            dipped = live & (rsi <= rule["dip"])
+            s["bars_since_dip"] = np.where(
+                dipped, 0, np.where(live, np.minimum(s["bars_since_dip"] + 1, lookback), s["bars_since_dip"]))
+            s["peak_since_dip"] = np.where(
+                dipped, rsi, np.where(live, np.fmax(s["peak_since_dip"], rsi), s["peak_since_dip"]))
+            peak = s["peak_since_dip"]
+            triggered = (s["bars_since_dip"] < lookback) & (peak >= rule["cross"]) & (peak < rule["block"])
+            s["triggered"] = np.where(live, triggered, s["triggered"])
+            s["active"] = np.where(live, (s["active"] & ~(rsi >= rule["clear"])) | triggered, s["active"])
+    return s
+
+
+def _label(active) -> str:
+    return "Active" if active else "Inactive"
+
+
+def _num(value):
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+class RSIStateStore:
+    """
+    RSI/cycle state for every ticker of one strategy, persisted in the signal
+    state store (position = Active/Inactive, last bar = last_date).
+
+    plan() compares each ticker's state with the OHLC store's manifest and
+    splits tickers into those that need a full recompute() and those that only
+    need extend() with their newest bars. Call save() once after updating.
+    """
+
+    def __init__(self, signals=None, strategy: str = "Nifty200_RSI", rule: dict = None):
+        self.signals = signals or get_signal_store()
+        self.strategy = strategy
+        self.rule = {**RSI_RULE, **(rule or {})}
+        self._rule_key = json.dumps(self.rule, sort_keys=True)
+        self._lock = threading.Lock()
+        self._labels = {}
+        self._states = {}
+        # (last bar, position, revision) of each row as last read or written by this process
+        self._seen = {}
+        self._dirty = set()
+        self._transitions = []
+        self._adopt(self.signals.load(self.strategy))
+
+    def _adopt(self, rows: dict) -> set:
+        """
+        Take over the stored rows another process saved since we last read or
+        wrote them, unless ours is further along (caller holds the lock).
+        Returns the tickers whose stored state replaced ours.
+        """
+        adopted = set()
+        for ticker, row in rows.items():
+            payload = row["payload"]
+            token = (row["last_bar"], row["state"], payload.get("rsi", {}).get("revision"))
+            if self._seen.get(ticker) == token:
+                continue
+            self._seen[ticker] = token
+            mine = self._states.get(ticker)
+            # states built under other thresholds are recomputed, not reused
+            if payload.get("rule") != self._rule_key:
+                if mine is None:
+                    self._labels[ticker] = row["state"]
+                continue
+            if mine is None or payload["rsi"]["last_date"] >= mine["last_date"]:
+                self._states[ticker] = payload["rsi"]
+                self._labels[ticker] = row["state"]
+                self._dirty.discard(ticker)
+                adopted.add(ticker)
+            else:
+                # a process that fell behind overwrote our newer state: write it back
+                self._dirty.add(ticker)
+        return adopted
+
+    def _flip(self, ticker: str, trade_date: str, state: dict, recomputed: bool = False):
+        """Queue a transition when ``state`` changed the ticker's position."""
+        before, after = self._labels.get(ticker), _label(state["active"])
+        if before != after and (before is not None or state["active"]):
+            detail = {"rsi": None if state["rsi"] is None else round(state["rsi"], 2)}
+            if recomputed:
+                detail["recomputed"] = True
+            self._transitions.append((ticker, trade_date, before, after, detail))
+        self._labels[ticker] = after
+
+    def save(self):
+        """
+        Write changed tickers (and their transitions) to the signal state store.
+        A ticker another process has saved as far along since we read it keeps
+        that row, and a flip is logged only while the stored position differs.
+        """
+        with self._lock:
+            pending = self._dirty | {t for t, *_ in self._transitions}
+            if not pending:
+                return
+            rows = self.signals.load(self.strategy, pending)
+            theirs = self._adopt(rows)
+            stored = {t: row["state"] for t, row in rows.items()}
+            transitions = []
+            for ticker, bar_date, _, after, detail in self._transitions:
+                if ticker in theirs or stored.get(ticker) == after:
+                    continue
+                transitions.append((ticker, bar_date, stored.get(ticker), after, detail))
+                stored[ticker] = after
+            updates = {}
+            for t in self._dirty:
+                state = self._states[t]
+                updates[t] = (_label(state["active"]), state["last_date"], {"rule": self._rule_key, "rsi": state})
+                self._seen[t] = (state["last_date"], updates[t][0], state.get("revision"))
+            self._transitions, self._dirty = [], set()
+            if updates or transitions:
+                self.signals.record(self.strategy, updates, transitions)
+
+    def get_many(self, tickers) -> dict:
+        with self._lock:
+            return {t: dict(self._states[t]) for t in tickers if t in self._states}
+
+    def plan(self, sources: dict):
+        """
+        ``sources`` is OHLCStore.meta(): {ticker: {"first", "last", "revision"}}.
+        Returns (tickers to recompute, {ticker: last state date} to extend).
+        """
+        recompute, extend = [], {}
+        with self._lock:
+            self._adopt(self.signals.load(self.strategy, sources))
+            for ticker, src in sources.items():
+                state = self._states.get(ticker)
+                # a deeper sync moves the store's first bar but not the seed, so only the revision matters
+                if (state is None or "seed" not in state
+                        or state.get("revision") != src["revision"] or state["last_date"] > src["last"]):
+                    recompute.append(ticker)
+                elif state["last_date"] < src["last"]:
+                    extend[ticker] = state["last_date"]
+        return recompute, extend
+
+    def seeds(self, tickers) -> dict:
+        """Seed date of every ticker in ``tickers`` that has a state."""
+        with self._lock:
+            return {t: self._states[t]["seed"] for t in tickers if "seed" in self._states.get(t, {})}
+
+    def recompute(self, bars, sources: dict, start=None):
+        """
+        Rebuild the state of every ticker in ``bars`` (frame or OHLCBars) from its
+        seed date: the existing state's, else ``start`` (None: the first bar given).
+        """
+        bars = as_bars(bars)
+        seeds = self.seeds(bars.symbols)
+        default = np.datetime64("NaT") if start is None else np.datetime64(str(start)[:10], "D")
+        seed = np.array([np.datetime64(seeds[t], "D") if t in seeds else default for t in bars.symbols],
+                        dtype="datetime64[D]")
+        # NaT seeds compare False, so those tickers keep every bar
+        bars = bars.take(~(bars.trade_date < seed[bars.code]))
+        arrays = pad_ohlc(bars, columns=("close",))
+        if not len(arrays["tickers"]):
+            return
+        final = replay_2d(arrays["close"], arrays["lengths"], self.rule)
+        rows = np.arange(len(arrays["tickers"]))
+        last = arrays["lengths"] - 1
+        last_close = arrays["close"][rows, last]
+        last_date = arrays["dates"][rows, last]
+        with self._lock:
+            for i, ticker in enumerate(arrays["tickers"]):
+                src = sources.get(ticker, {})
+                self._states[ticker] = {
+                    "bars": int(arrays["lengths"][i]),
+                    "sum_gain": float(final["sum_gain"][i]), "sum_loss": float(final["sum_loss"][i]),
+                    "avg_gain": _num(final["avg_gain"][i]), "avg_loss": _num(final["avg_loss"][i]),
+                    "last_close": float(last_close[i]), "last_date": str(last_date[i]),
+                    "rsi": _num(final["rsi"][i]),
+                    "bars_since_dip": int(final["bars_since_dip"][i]),
+                    "peak_since_dip": _num(final["peak_since_dip"][i]),
+                    "triggered": bool(final["triggered"][i]), "active": bool(final["active"][i]),
+                    "seed": str(arrays["dates"][i, 0]), "revision": src.get("revision"),
+                }
+                self._dirty.add(ticker)
+                self._flip(ticker, self._states[ticker]["last_date"], self._states[ticker], recomputed=True)
+
+    def extend(self, bars) -> int:
+        """Step each ticker's state through its bars newer than the state (frame or OHLCBars); returns bars applied."""
+        bars = as_bars(bars)
+        bars = bars.take(~np.isnan(bars.close))
+        dates = np.datetime_as_string(bars.dates, unit="D")
+        applied = 0
+        with self._lock:
+            for ticker, trade_date, close in zip(
+                bars.symbols[bars.code], dates[bars.session].tolist(), bars.close.tolist()
+            ):
+                state = self._states.get(ticker)
+                if state is None or trade_date <= state["last_date"]:
+                    continue
+                step(state, trade_date, float(close), self.rule)
+                self._dirty.add(ticker)
+                self._flip(ticker, trade_date, state)
+                applied += 1
+        return applied
+
+
+_default_states = {}
+_default_lock = threading.Lock()
+
+
+def get_rsi_state(rule: dict = None) -> RSIStateStore:
+    """Process-wide RSI state for ``rule``; non-default thresholds are kept under their own strategy key."""
+    rule = {**RSI_RULE, **(rule or {})}
+    key = json.dumps(rule, sort_keys=True)
+    with _default_lock:
+        if key not in _default_states:
+            strategy = "Nifty200_RSI"
+            if rule != RSI_RULE:
+                strategy += ":" + hashlib.sha1(key.encode()).hexdigest()[:8]
+            _default_states[key] = RSIStateStore(strategy=strategy, rule=rule)
+        return _default_states[key]
@@ -0,0 +1,149 @@
+"""
+Entry-rule kernels shared by the backtester and the parameter sweep.
+
+Every kernel works on (n_tickers, n_bars) arrays, left-aligned and NaN-padded
+past each ticker's history, and loops over time steps rather than tickers.
+"""
+import numpy as np
+
+from core.indicators import wilder_rsi_2d
+
+# Nifty200RSIAnalyzer: arm on a dip, trigger on the cross, block/clear above
+RSI_RULE = {"period": 14, "dip": 35, "cross": 40, "block": 45, "clear": 55, "lookback": 30}
+
+# EarningsGapAnalyzer: gap-up on volume that holds, with momentum and a PEG ceiling
+GAP_RULE = {"gap_pct": 2.0, "min_avg_volume": 600_000, "volume_mult": 1.1, "max_peg": 4.5,
+            "min_rsi": 40, "rsi_period": 14, "volume_window": 20, "return_window": 20}
+
+# ConsolidateAnalyzer: price within band_pct of every DMA, 52-week high older than the low
+CONSOLIDATE_RULE = {"band_pct": 5, "dma_periods": [5, 20, 50, 100, 200], "range_window": 252}
+
+RULES = {"Nifty200_RSI": RSI_RULE, "EarningsGap": GAP_RULE, "Consolidate_500_Stocks": CONSOLIDATE_RULE}
+
+
+def rsi_active_2d(rsi: np.ndarray, dip=35, cross=40, block=45, lookback=30, clear=55) -> np.ndarray:
+    """
+    Per-bar Active state of the RSI cycle rule, as Nifty200RSIAnalyzer keeps it
+    (core.rsi_state.step): a bar triggers when the last dip (RSI <= ``dip``) lies
+    inside the last ``lookback`` bars and RSI since then reached ``cross`` without
+    touching ``block``; Active latches on a trigger and holds until RSI >= ``clear``.
+    """
+    n, width = rsi.shape
+    active = np.zeros((n, width), dtype=bool)
+    latched = np.zeros(n, dtype=bool)
+    bars_since_dip = np.full(n, lookback)
+    peak_since_dip = np.full(n, np.nan)
+    for t in range(width):
+        r = rsi[:, t]
+        dipped = r <= dip
+        bars_since_dip = np.where(dipped, 0, bars_since_dip + 1)
+        peak_since_dip = np.where(dipped, r, np.fmax(peak_since_dip, r))
+        triggered = (bars_since_dip < lookback) & (peak_since_dip >= cross) & (peak_since_dip < block)
+        latched = (latched & ~(r >= clear)) | triggered
+        active[:, t] = latched
+    return active
+
+
+def rsi_entries_2d(close: np.ndarray, lengths: np.ndarray, rule: dict = None, rsi: np.ndarray = None) -> np.ndarray:
+    """Bars where the RSI rule turns Active (the day the live analyzer would first show BUY)."""
+    rule = {**RSI_RULE, **(rule or {})}
+    if rsi is None:
+        rsi = wilder_rsi_2d(close, lengths, rule["period"])
+    active = rsi_active_2d(rsi, rule["dip"], rule["cross"], rule["block"], rule["lookback"], rule["clear"])
+    entries = active.copy()
+    entries[:, 1:] &= ~active[:, :-1]
+    return entries
+
+
+def rolling_mean_2d(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over ``window`` bars; NaN until a full window of valid values (pandas rolling)."""
+    valid = ~np.isnan(values)
+    csum = np.cumsum(np.where(valid, values, 0.0), axis=1)
+    ccount = np.cumsum(valid, axis=1)
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] < window:
+        return out
+    total = csum[:, window - 1:].copy()
+    total[:, 1:] -= csum[:, :-window]
+    count = ccount[:, window - 1:].copy()
+    count[:, 1:] -= ccount[:, :-window]
+    out[:, window - 1:] = np.where(count == window, total / window, np.nan)
+    return out
+
+
+def gap_features_2d(open_, low, close, volume, lengths, rule: dict = None, rsi: np.ndarray = None) -> dict:
+    """Parameter-independent inputs of the gap rule (RSI, prior close, 20-bar volume mean, 20-bar return)."""
+    rule = {**GAP_RULE, **(rule or {})}
+    if rsi is None:
+        rsi = wilder_rsi_2d(close, lengths, rule["rsi_period"])
+    prev_close = np.full(close.shape, np.nan)
+    prev_close[:, 1:] = close[:, :-1]
+    window = rule["return_window"]
+    ret = np.full(close.shape, np.nan)
+    ret[:, window:] = close[:, window:] / close[:, :-window] - 1
+    return {
+        "rsi": rsi,
+        "prev_close": prev_close,
+        "avg_volume": rolling_mean_2d(volume, rule["volume_window"]),
+        "ret": ret,
+        "open": open_,
+        "low": low,
+        "close": close,
+        "volume": volume,
+    }
+
+
+def gap_entries_2d(features: dict, rule: dict = None, peg: np.ndarray = None) -> np.ndarray:
+    """
+    Bars that pass every EarningsGapAnalyzer condition. ``peg`` is one value per
+    ticker; without it the PEG ceiling is skipped (there is no PEG history).
+    """
+    rule = {**GAP_RULE, **(rule or {})}
+    f = features
+    with np.errstate(invalid="ignore"):
+        ok = (
+            (f["open"] >= (1 + rule["gap_pct"] / 100) * f["prev_close"])
+            & (f["avg_volume"] >= rule["min_avg_volume"])
+            & (f["volume"] >= rule["volume_mult"] * f["avg_volume"])
+            & (f["close"] > np.fmin(f["open"], f["low"]))
+            & (f["rsi"] >= rule["min_rsi"])
+            & (f["ret"] >= 0)
+        )
+        if peg is not None:
+            ok &= (np.asarray(peg, dtype=float) < rule["max_peg"])[:, None]
+    return ok
+
+
+def rolling_argext_2d(values: np.ndarray, window: int, highest: bool = True) -> np.ndarray:
+    """
+    Bar index of the trailing ``window``-bar max (``highest``) or min, over whatever
+    history exists so far (first occurrence on ties, NaN ignored).
+    """
+    n, width = values.shape
+    fill = -np.inf if highest else np.inf
+    padded = np.full((n, width + window - 1), fill)
+    padded[:, window - 1:] = np.where(np.isnan(values), fill, values)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis=1)
+    offset = windows.argmax(axis=2) if highest else windows.argmin(axis=2)
+    return offset + np.arange(width) - (window - 1)
+
+
+def consolidate_features_2d(high, low, close, lengths, rule: dict = None) -> dict:
+    """Parameter-independent inputs of the consolidation rule (DMAs and the 52-week high/low order)."""
+    rule = {**CONSOLIDATE_RULE, **(rule or {})}
+    window = rule["range_window"]
+    return {
+        "close": close,
+        "dmas": np.stack([rolling_mean_2d(close, p) for p in rule["dma_periods"]]),
+        "high_before_low": rolling_argext_2d(high, window, True) < rolling_argext_2d(low, window, False),
+    }
+
+
+def consolidate_entries_2d(features: dict, rule: dict = None) -> np.ndarray:
+    """Bars that pass every ConsolidateAnalyzer condition."""
+    rule = {**CONSOLIDATE_RULE, **(rule or {})}
+    band = rule["band_pct"] / 100
+    close, dmas = features["close"], features["dmas"]
+    with np.errstate(invalid="ignore"):
+        in_band = ((1 - band) * close < dmas) & (dmas < (1 + band) * close)
+    return features["high_before_low"] & in_band.all(axis=0)
@@ -1,29 +1,245 @@
-import pandas as pd
-import streamlit as st
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pandas as pd
+from .clients import get_supabase_client
+from .fundamentals import get_peg_cache
 from .portfolio import PortfolioManager
+from .registry import analyzer_class
 from .fetcher import DataFetcher
+from .sheets import get_snapshot
+from .telemetry import bind, span
+from .ui import cache_data
+
+# (name, config fingerprint) -> (data version, result frame, analyzer outputs), shared by every page and session
+_result_cache = {}
+_cache_lock = threading.Lock()
+_key_locks = {}
+
+
+@cache_data(ttl=300, show_spinner=False)
+def latest_ohlc_date():
+    """Newest trade_date in Supabase ohlc_data (None if the table is empty)."""
+    resp = (
+        get_supabase_client().table("ohlc_data")
+        .select("trade_date")
+        .order("trade_date", desc=True)
+        .limit(1)
+        .execute()
+    )
+    data = getattr(resp, "data", [])
+    return data[0]["trade_date"] if data else None
+
+
+def config_fingerprint(config: dict) -> str:
+    return json.dumps(
+        {k: (v.__name__ if isinstance(v, type) else v) for k, v in config.items()},
+        sort_keys=True, default=str
+    )
+
+
+def data_version(config: dict) -> str:
+    """
+    Token that changes only when a strategy's inputs can have changed: the content
+    of its sheet tabs, the newest OHLC bar (for OHLC-driven analyzers) and the day.
+    """
+    tabs = config["buy_tabs"] + [config["portfolio_tab"]]
+    parts = [date.today().isoformat(), get_snapshot(config["sheet_name"]).digest(tabs)]
+    if getattr(analyzer_class(config), "uses_ohlc", False):
+        parts.append(str(latest_ohlc_date()))
+    return "|".join(parts)
+
+
+# what an analyzer run leaves behind for the pages; cached as copies, never as the analyzer itself
+ANALYZER_OUTPUTS = ("signal_log", "analysis_df", "active_signals")
+
+
+def _copy_output(value):
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, list):
+        return [dict(v) if isinstance(v, dict) else v for v in value]
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+def clear_result_cache():
+    with _cache_lock:
+        _result_cache.clear()
+
 
 class StrategyRunner:
     def __init__(self, name, config):
         self.name = name
         self.config = config
-        self.analyzer = config["analyzer_class"](
-            sell_threshold_pct=config.get("sell_threshold_pct", 12)
+        self.analyzer = analyzer_class(config)(
+            sell_threshold_pct=config.get("sell_threshold_pct", 12),
+            rule=config.get("rule")
         )
 
-        creds_dict = json.loads(st.secrets["GOOGLE_CREDS_JSON"])
-        self.portfolio_mgr = PortfolioManager(config["sheet_name"], creds_dict)
-        self.fetcher = DataFetcher(config["sheet_name"], creds_dict)
+        # Sheets clients come from the process-wide registry, so this costs no auth handshake
+        self.portfolio_mgr = PortfolioManager(config["sheet_name"])
+        self.fetcher = DataFetcher(config["sheet_name"])
 
-    def run(self):
-        portfolio_df = self.portfolio_mgr.load(self.config["portfolio_tab"])
+    def load_inputs(self, tab_frames: dict = None):
+        """
+        (buy_df, portfolio_df) for this strategy. ``tab_frames`` maps tab name to an
+        already-fetched frame so strategies sharing a tab read it once.
+        """
+        tab_frames = tab_frames if tab_frames is not None else {}
+        tab = self.config["portfolio_tab"]
+        portfolio_df = tab_frames[tab] if tab in tab_frames else self.portfolio_mgr.load(tab)
         buy_df = pd.concat(
-            [self.fetcher.fetch(tab) for tab in self.config["buy_tabs"]],
+            [tab_frames[t] if t in tab_frames else self.fetcher.fetch(t) for t in self.config["buy_tabs"]],
             ignore_index=True
         ).drop_duplicates(subset=["Ticker"])
+        return buy_df, portfolio_df
 
+    def analyze(self, buy_df, portfolio_df):
         self.analyzer.analyze_buy(buy_df)
         self.analyzer.analyze_sell(portfolio_df)
 
-        return pd.DataFrame(self.analyzer.signal_log)
\ No newline at end of file
+        return pd.DataFrame(self.analyzer.signal_log)
+
+    def cache_key(self):
+        return (self.name, config_fingerprint(self.config))
+
+    def _outputs(self) -> dict:
+        return {k: _copy_output(getattr(self.analyzer, k)) for k in ANALYZER_OUTPUTS if hasattr(self.analyzer, k)}
+
+    def cached(self, version):
+        """Cached result frame for ``version`` (with copies of its outputs on this runner's analyzer), or None."""
+        with _cache_lock:
+            cached = _result_cache.get(self.cache_key())
+        if cached is None or cached[0] != version:
+            return None
+        for k, value in cached[2].items():
+            setattr(self.analyzer, k, _copy_output(value))
+        return cached[1].copy()
+
+    def run(self, use_cache=True, inputs=None, version=None):
+        """
+        Run the strategy, or reuse the last result computed for the same name,
+        config and data version. On a hit, ``self.analyzer`` gets copies of the
+        outputs (signal_log, analysis_df, ...) of the run that produced it, so no
+        two pages or sessions share a mutable analyzer. ``inputs`` is an optional
+        (buy_df, portfolio_df) pair fetched by the caller.
+        """
+        with span("runner.run", strategy=self.name) as s:
+            if not use_cache:
+                s.set(cache="off")
+                return self.analyze(*(inputs or self.load_inputs()))
+
+            key = self.cache_key()
+            version = version or data_version(self.config)
+            with _cache_lock:
+                key_lock = _key_locks.setdefault(key, threading.Lock())
+
+            # one computation per key at a time; concurrent callers wait and then hit
+            with key_lock:
+                hit = self.cached(version)
+                if hit is not None:
+                    s.set(cache="hit", rows=len(hit))
+                    return hit
+                result = self.analyze(*(inputs or self.load_inputs()))
+                with _cache_lock:
+                    _result_cache[key] = (version, result.copy(), self._outputs())
+                s.set(cache="miss", rows=len(result))
+                return result.copy()
+
+
+def run_all(strategy_config: dict, names=None, max_workers: int = None):
+    """
+    Run several strategies with their shared inputs fetched once.
+
+    Tabs used by more than one strategy are read once, the OHLC-driven analyzers
+    share one OHLC window covering all their tickers, and PEG lookups for those
+    tickers go through the PEG cache in one bulk call. The analyzers then run
+    concurrently on a thread pool (they spend most of their time in NumPy/pandas
+    and network I/O). Cached results for the current data version are reused.
+
+    Returns ({name: result frame}, {name: StrategyRunner}, {stage: seconds}).
+    """
+    from .analyzers import fetch_ohlc_bars
+
+    names = list(names or strategy_config.keys())
+    timings = {}
+
+    def stage(name, **attrs):
+        return span(f"run_all.{name}", **attrs)
+
+    def done(name, s):
+        timings[name] = round(s.seconds, 4)
+
+    with span("runner.run_all", strategies=len(names)) as root:
+        with stage("plan") as s:
+            runners = {n: StrategyRunner(n, strategy_config[n]) for n in names}
+            versions = {n: data_version(strategy_config[n]) for n in names}
+            results = {}
+            for n, runner in runners.items():
+                hit = runner.cached(versions[n])
+                if hit is not None:
+                    results[n] = hit
+            pending = [n for n in names if n not in results]
+            s.set(cached=len(results), pending=len(pending))
+        done("plan", s)
+
+        # 📑 each distinct tab once
+        with stage("sheets") as s:
+            tab_frames = {}
+            for n in pending:
+                runner, cfg = runners[n], strategy_config[n]
+                for tab in cfg["buy_tabs"]:
+                    if tab not in tab_frames:
+                        tab_frames[tab] = runner.fetcher.fetch(tab)
+                if cfg["portfolio_tab"] not in tab_frames:
+                    tab_frames[cfg["portfolio_tab"]] = runner.portfolio_mgr.load(cfg["portfolio_tab"])
+            inputs = {n: runners[n].load_inputs(tab_frames) for n in pending}
+            s.set(tabs=len(tab_frames), rows=sum(len(df) for df in tab_frames.values()))
+        done("sheets", s)
+
+        # 📦 one OHLC window for every OHLC-driven analyzer
+        ohlc_runners = [n for n in pending if getattr(runners[n].analyzer, "uses_ohlc", False)]
+        if ohlc_runners:
+            with stage("ohlc") as s:
+                tickers = list(dict.fromkeys(
+                    sym for n in ohlc_runners for sym in runners[n].analyzer.ohlc_tickers(inputs[n][0])
+                ))
+                sessions = max(runners[n].analyzer.ohlc_sessions for n in ohlc_runners)
+                ohlc = fetch_ohlc_bars(get_supabase_client(), tickers, sessions)
+                for n in ohlc_runners:
+                    runners[n].analyzer.ohlc = ohlc
+                s.set(rows=len(ohlc))
+            done("ohlc", s)
+
+            peg_tickers = [
+                sym for n in ohlc_runners if hasattr(runners[n].analyzer, "peg_cache")
+                for sym in runners[n].analyzer.ohlc_tickers(inputs[n][0])
+            ]
+            if peg_tickers:
+                with stage("peg") as s:
+                    get_peg_cache().get_many(peg_tickers)
+                done("peg", s)
+
+        def run_one(n):
+            began = time.perf_counter()
+            frame = runners[n].run(inputs=inputs[n], version=versions[n])
+            # the runner outlives this call in the pages; it should not pin the shared OHLC bars
+            if getattr(runners[n].analyzer, "ohlc", None) is not None:
+                runners[n].analyzer.ohlc = None
+            return n, frame, time.perf_counter() - began
+
+        if pending:
+            with stage("analyze") as s:
+                with ThreadPoolExecutor(max_workers=max_workers or len(pending)) as pool:
+                    for n, frame, seconds in pool.map(bind(run_one), pending):
+                        results[n] = frame
+                        timings[f"analyze:{n}"] = round(seconds, 4)
+            done("analyze", s)
+
+    timings["total"] = round(root.seconds, 4)
+    return {n: results[n] for n in names}, runners, timings
@@ -0,0 +1,184 @@
+"""
+Batched spreadsheet snapshots: every tab a spreadsheet is read for, in one
+``values:batchGet`` request, cached under a single version key.
+"""
+import hashlib
+import json
+import threading
+from collections import Counter
+from datetime import datetime
+
+from core.clients import open_spreadsheet
+from core.telemetry import span
+from core.ui import cache_data
+
+SNAPSHOT_TTL = 300
+
+_tabs_lock = threading.Lock()
+_registered_tabs = {}
+
+
+def register_tabs(sheet_name: str, tabs):
+    """Declare tabs of ``sheet_name`` that the snapshot should include."""
+    with _tabs_lock:
+        known = _registered_tabs.setdefault(sheet_name, [])
+        known.extend(t for t in tabs if t not in known)
+
+
+def registered_tabs(sheet_name: str) -> tuple:
+    with _tabs_lock:
+        return tuple(_registered_tabs.get(sheet_name, []))
+
+
+def _range_name(tab: str) -> str:
+    return "'{}'".format(tab.replace("'", "''"))
+
+
+class SpreadsheetSnapshot:
+    """
+    Values of several tabs of one spreadsheet, read together.
+
+    values() mirrors ``worksheet.get_all_values()`` and records() mirrors
+    ``worksheet.get_all_records()``, so callers get the same shapes they did
+    from per-tab reads.
+    """
+
+    def __init__(self, sheet_name: str, tab_values: dict, version: str):
+        self.sheet_name = sheet_name
+        self.tab_values = tab_values
+        self.version = version
+        payloads = {tab: json.dumps(values).encode() for tab, values in tab_values.items()}
+        self.tab_digests = {tab: hashlib.sha1(payload).hexdigest() for tab, payload in payloads.items()}
+        # JSON size of the values, about what the batchGet response carried
+        self.nbytes = sum(len(payload) for payload in payloads.values())
+
+    @classmethod
+    def fetch(cls, sheet_name: str, tabs) -> "SpreadsheetSnapshot":
+        with span("sheets.batch_get", sheet=sheet_name, tabs=len(tabs)) as s:
+            snapshot = cls._fetch(sheet_name, tabs)
+            s.set(rows=sum(len(v) for v in snapshot.tab_values.values()), bytes=snapshot.nbytes)
+            return snapshot
+
+    @classmethod
+    def _fetch(cls, sheet_name: str, tabs) -> "SpreadsheetSnapshot":
+        # gspread is imported on the first fetch, not when a page imports this module
+        from gspread.exceptions import APIError
+        from gspread.utils import fill_gaps
+
+        tabs = list(dict.fromkeys(tabs))
+        spreadsheet = open_spreadsheet(sheet_name)
+        try:
+            resp = spreadsheet.values_batch_get([_range_name(t) for t in tabs])
+        except APIError:
+            # one unknown tab fails the whole batch: retry with the tabs that exist
+            existing = {ws.title for ws in spreadsheet.worksheets()}
+            tabs = [t for t in tabs if t in existing]
+            resp = spreadsheet.values_batch_get([_range_name(t) for t in tabs]) if tabs else {}
+        value_ranges = resp.get("valueRanges", [])
+        tab_values = {
+            tab: fill_gaps(vr.get("values", [[]]))
+            for tab, vr in zip(tabs, value_ranges)
+        }
+        return cls(sheet_name, tab_values, version=datetime.now().isoformat(timespec="seconds"))
+
+    def __contains__(self, tab: str) -> bool:
+        return tab in self.tab_values
+
+    def values(self, tab: str) -> list:
+        if tab not in self.tab_values:
+            from gspread.exceptions import WorksheetNotFound
+            raise WorksheetNotFound(tab)
+        return self.tab_values[tab]
+
+    def digest(self, tabs) -> str:
+        """Content hash of ``tabs``; it only changes when their cell values do."""
+        return hashlib.sha1("|".join(self.tab_digests.get(t, "-") for t in tabs).encode()).hexdigest()
+
+    def records(self, tab: str) -> list:
+        from gspread.exceptions import GSpreadException
+        from gspread.utils import numericise_all, to_records
+
+        values = self.values(tab)
+        if values == [[]] or not values:
+            return []
+        keys, rows = values[0], values[1:]
+        dupes = [k for k, n in Counter(keys).items() if n > 1]
+        if dupes:
+            raise GSpreadException(f"the header row in the worksheet contains duplicates: {dupes}")
+        return to_records(keys, [numericise_all(row) for row in rows])
+
+
+@cache_data(ttl=SNAPSHOT_TTL, show_spinner=True)
+def _fetch_snapshot(sheet_name, tabs):
+    return SpreadsheetSnapshot.fetch(sheet_name, tabs)
+
+
+def get_snapshot(sheet_name: str, tab: str = None) -> SpreadsheetSnapshot:
+    """
+    Cached snapshot of every registered tab of ``sheet_name``.
+    An unregistered ``tab`` is registered first, which starts a new snapshot.
+    """
+    if tab is not None and tab not in registered_tabs(sheet_name):
+        register_tabs(sheet_name, [tab])
+    with span("sheets.snapshot", sheet=sheet_name) as s:
+        snapshot = _fetch_snapshot(sheet_name, registered_tabs(sheet_name))
+        # a batch_get under this span means the cache had no snapshot for these tabs
+        s.set(cache="miss" if s.children else "hit")
+        return snapshot
+
+
+def clear_snapshots():
+    """Drop every cached snapshot, so the next read fetches again."""
+    _fetch_snapshot.clear()
+
+
+# -------------------------------
+# Local stand-ins (offline runs, benchmarks)
+# -------------------------------
+class LocalSpreadsheet:
+    """
+    In-process spreadsheet serving ``tabs`` ({tab: rows of cell strings}) through
+    the calls the snapshot makes: values_batch_get() and worksheets().
+    Like the API, an unknown tab fails the whole batch.
+    """
+
+    def __init__(self, title: str, tabs: dict):
+        self.title = title
+        self.tabs = tabs
+
+    def values_batch_get(self, ranges: list) -> dict:
+        names = [r[1:-1].replace("''", "'") if r.startswith("'") else r for r in ranges]
+        missing = [n for n in names if n not in self.tabs]
+        if missing:
+            from gspread.exceptions import APIError
+            raise APIError(_LocalAPIResponse(f"Unable to parse range: {missing[0]}"))
+        return {"valueRanges": [{"range": r, "values": self.tabs[n]} for r, n in zip(ranges, names)]}
+
+    def worksheets(self) -> list:
+        return [_LocalWorksheet(name) for name in self.tabs]
+
+
+class LocalGSpread:
+    """gspread client stand-in: open(name) returns the LocalSpreadsheet of that name."""
+
+    def __init__(self, spreadsheets: dict):
+        self.spreadsheets = {name: LocalSpreadsheet(name, tabs) for name, tabs in spreadsheets.items()}
+
+    def open(self, name: str) -> LocalSpreadsheet:
+        return self.spreadsheets[name]
+
+
+class _LocalWorksheet:
+    def __init__(self, title: str):
+        self.title = title
+
+
+class _LocalAPIResponse:
+    """Just enough of a requests.Response for gspread's APIError."""
+
+    def __init__(self, message: str):
+        self.text = json.dumps({"error": {"code": 400, "message": message, "status": "INVALID_ARGUMENT"}})
+        self.status_code = 400
+
+    def json(self):
+        return json.loads(self.text)
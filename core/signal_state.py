@@ -0,0 +1,190 @@
+"""
+Durable per-ticker signal state, in SQLite (optionally mirrored to Supabase).
+
+Every strategy keeps one row per ticker: its state-machine position
+("Active"/"Inactive"), the last bar it evaluated and a JSON payload with
+whatever the analyzer needs to resume from that bar. Every change of
+position is appended to a transitions table, which is the audit trail of
+when and why a ticker's signal turned on or off.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from core.paths import CACHE_DIR
+
+SIGNAL_STATE_DB = os.path.join(CACHE_DIR, "signal_state.sqlite")
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS signal_state (
+    strategy   TEXT NOT NULL,
+    ticker     TEXT NOT NULL,
+    state      TEXT NOT NULL,
+    last_bar   TEXT,
+    payload    TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (strategy, ticker)
+);
+CREATE TABLE IF NOT EXISTS signal_transitions (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    strategy    TEXT NOT NULL,
+    ticker      TEXT NOT NULL,
+    bar_date    TEXT,
+    from_state  TEXT,
+    to_state    TEXT NOT NULL,
+    detail      TEXT,
+    recorded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_transitions_strategy ON signal_transitions (strategy, ticker, bar_date);
+"""
+
+# one row per flip, however many processes evaluate the same bar (older files are de-duplicated first)
+_UNIQUE_TRANSITIONS = """
+DELETE FROM signal_transitions WHERE id NOT IN (
+    SELECT MIN(id) FROM signal_transitions GROUP BY strategy, ticker, bar_date, to_state
+);
+CREATE UNIQUE INDEX ux_transitions ON signal_transitions (strategy, ticker, bar_date, to_state);
+"""
+
+
+class SignalStateStore:
+    """
+    SQLite-backed signal state shared by every analyzer, page and process.
+
+    ``mirror`` is an optional Supabase client: state rows are upserted into its
+    ``signal_state`` table and transitions inserted into ``signal_transitions``
+    (same columns as the local tables). Mirror failures never fail a run.
+    """
+
+    def __init__(self, path: str = SIGNAL_STATE_DB, mirror=None):
+        self.path = path
+        self.mirror = mirror
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'ux_transitions'").fetchone():
+                conn.executescript(_UNIQUE_TRANSITIONS)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def load(self, strategy: str, tickers=None) -> dict:
+        """{ticker: {"state", "last_bar", "payload"}} for ``strategy`` (all tickers by default)."""
+        sql = "SELECT ticker, state, last_bar, payload FROM signal_state WHERE strategy = ?"
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(sql, (strategy,)).fetchall()
+        wanted = None if tickers is None else set(tickers)
+        return {
+            ticker: {"state": state, "last_bar": last_bar, "payload": json.loads(payload) if payload else {}}
+            for ticker, state, last_bar, payload in rows
+            if wanted is None or ticker in wanted
+        }
+
+    def record(self, strategy: str, updates: dict, transitions: list = ()):
+        """
+        Save ``updates`` ({ticker: (state, last_bar, payload)}) and append
+        ``transitions`` ([(ticker, bar_date, from_state, to_state, detail)]).
+        A transition already logged for the same bar and new state is skipped.
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        state_rows = [
+            (strategy, ticker, state, last_bar, json.dumps(payload), now)
+            for ticker, (state, last_bar, payload) in updates.items()
+        ]
+        transition_rows = [
+            (strategy, ticker, bar_date, from_state, to_state, json.dumps(detail) if detail else None, now)
+            for ticker, bar_date, from_state, to_state, detail in transitions
+        ]
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO signal_state (strategy, ticker, state, last_bar, payload, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (strategy, ticker) DO UPDATE SET state = excluded.state, "
+                "last_bar = excluded.last_bar, payload = excluded.payload, updated_at = excluded.updated_at",
+                state_rows
+            )
+            # only the rows that were new here go on to the mirror
+            transition_rows = [
+                row for row in transition_rows
+                if conn.execute(
+                    "INSERT OR IGNORE INTO signal_transitions "
+                    "(strategy, ticker, bar_date, from_state, to_state, detail, recorded_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    row
+                ).rowcount
+            ]
+        if self.mirror is not None:
+            self._push(state_rows, transition_rows)
+
+    def _push(self, state_rows: list, transition_rows: list):
+        state_cols = ["strategy", "ticker", "state", "last_bar", "payload", "updated_at"]
+        transition_cols = ["strategy", "ticker", "bar_date", "from_state", "to_state", "detail", "recorded_at"]
+        try:
+            if state_rows:
+                self.mirror.table("signal_state").upsert(
+                    [dict(zip(state_cols, r)) for r in state_rows], on_conflict="strategy,ticker"
+                ).execute()
+            if transition_rows:
+                self.mirror.table("signal_transitions").insert(
+                    [dict(zip(transition_cols, r)) for r in transition_rows]
+                ).execute()
+        except Exception as e:
+            # the rows are already in the local store; only the mirror copy is missing
+            log.warning("Signal state mirror failed: %s", e)
+
+    def transitions(self, strategy: str = None, ticker: str = None, limit: int = 500) -> pd.DataFrame:
+        """Most recent transitions first, optionally for one strategy and/or ticker."""
+        sql = "SELECT strategy, ticker, bar_date, from_state, to_state, detail, recorded_at FROM signal_transitions"
+        where, params = [], []
+        if strategy is not None:
+            where.append("strategy = ?")
+            params.append(strategy)
+        if ticker is not None:
+            where.append("ticker = ?")
+            params.append(ticker)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY bar_date DESC, id DESC LIMIT ?"
+        with self._lock, self._connect() as conn:
+            return pd.read_sql_query(sql, conn, params=params + [limit])
+
+    def clear(self, strategy: str):
+        """Forget the state (not the history) of ``strategy``, forcing a full re-evaluation."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM signal_state WHERE strategy = ?", (strategy,))
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def _mirror_client():
+    """Supabase client when the [signal_state] secret sets ``mirror = true``, else None."""
+    try:
+        from core.clients import _secrets, get_supabase_client
+        if _secrets().get("signal_state", {}).get("mirror", False):
+            return get_supabase_client()
+    except Exception:
+        pass
+    return None
+
+
+def get_signal_store() -> SignalStateStore:
+    """Process-wide signal state store of the data source (only the live one mirrors to Supabase)."""
+    from core.sources import get_data_source
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            source = get_data_source()
+            _default_store = SignalStateStore(source.cache_path("signal_state.sqlite"),
+                                              mirror=_mirror_client() if source.live else None)
+        return _default_store
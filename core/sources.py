@@ -0,0 +1,349 @@
+"""
+Where sheet tabs, OHLC bars and PEG ratios come from.
+
+    live      Google Sheets + Supabase, authenticated from st.secrets (default)
+    local     files in a directory: sheets/<sheet>/<tab>.csv, OHLC in
+              ohlc.parquet or ohlc.sqlite (table ohlc_data), optional peg.json
+    recorded  a snapshot written by record(): the tab values and OHLC bars one
+              live run read, replayed without any network round trip
+
+The source is chosen by the STOCKSTRATEGIES_DATA_SOURCE environment variable
+("live", "local:<dir>", "recorded:<dir>") or else the [data_source] secret
+(kind = "...", path = "..."). The clients registry (core.clients) serves the
+source's clients wherever the code asks for the default gspread/Supabase
+client, so DataFetcher, PortfolioManager and the analyzers run unchanged on
+any source. Local and recorded sources keep their OHLC store, signal state
+and PEG cache under their own cache directory, apart from the live ones.
+
+    python -m core.sources record .cache/recordings/2024-06-14
+    STOCKSTRATEGIES_DATA_SOURCE=recorded:.cache/recordings/2024-06-14 streamlit run main.py
+    python -m core.sources replay .cache/recordings/2024-06-14 --repeat 5
+"""
+import csv
+import glob
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from core.paths import CACHE_DIR
+
+DATA_SOURCE_ENV = "STOCKSTRATEGIES_DATA_SOURCE"
+RECORDINGS_DIR = os.path.join(CACHE_DIR, "recordings")
+
+
+class DataSource:
+    """
+    Base source. client("gspread") / client("supabase") return the clients the
+    registry should serve by default; None means "build from secrets".
+    """
+
+    kind = None
+    live = False
+
+    def __init__(self):
+        self.cache_dir = CACHE_DIR
+        self._lock = threading.Lock()
+        self._clients = {}
+
+    def client(self, kind: str):
+        with self._lock:
+            if kind not in self._clients:
+                self._clients[kind] = self._open_client(kind)
+            return self._clients[kind]
+
+    def _open_client(self, kind: str):
+        return None
+
+    def peg_source(self):
+        """PEG lookups for this source's PEG cache."""
+        from core.fundamentals import YFinancePEGSource
+        return YFinancePEGSource()
+
+    def cache_path(self, name: str) -> str:
+        """Path of a local store (OHLC store, signal state, PEG cache) kept for this source."""
+        return os.path.join(self.cache_dir, name)
+
+    def describe(self) -> str:
+        return self.kind
+
+
+class LiveSource(DataSource):
+    """Google Sheets for the tabs, Supabase for OHLC, yfinance for PEG (clients from st.secrets)."""
+
+    kind = "live"
+    live = True
+
+
+class LocalSource(DataSource):
+    """
+    Files under ``path``: one CSV per tab in sheets/<sheet name>/, OHLC bars in
+    ohlc.parquet or ohlc.sqlite, and PEG ratios in peg.json ({ticker: peg}).
+    Requests wait ``latency`` seconds, 0 (full speed) by default; the local
+    stores live in ``cache_dir`` (default: one per source path under .cache/sources).
+    """
+
+    kind = "local"
+
+    def __init__(self, path: str, latency: float = 0.0, cache_dir: str = None):
+        super().__init__()
+        self.path = os.path.abspath(path)
+        self.latency = latency
+        if not os.path.isdir(self.path):
+            raise FileNotFoundError(f"No {self.kind} data source at {self.path}")
+        digest = hashlib.sha1(self.path.encode()).hexdigest()[:10]
+        self.cache_dir = cache_dir or os.path.join(CACHE_DIR, "sources", f"{self.kind}-{digest}")
+
+    def describe(self) -> str:
+        return f"{self.kind}:{self.path}"
+
+    def _open_client(self, kind: str):
+        if kind == "gspread":
+            from core.sheets import LocalGSpread
+            return LocalGSpread(self.sheets())
+        if kind == "supabase":
+            from core.ohlc_reader import LocalPostgREST
+            return LocalPostgREST({"ohlc_data": self.ohlc()}, latency=self.latency)
+        return None
+
+    def peg_source(self):
+        from core.fundamentals import StaticPEGSource
+        try:
+            with open(os.path.join(self.path, "peg.json")) as f:
+                return StaticPEGSource(json.load(f))
+        except FileNotFoundError:
+            return StaticPEGSource({})
+
+    def sheets(self) -> dict:
+        """{sheet name: {tab: rows of cell strings}}."""
+        sheets = {}
+        for tab_path in sorted(glob.glob(os.path.join(self.path, "sheets", "*", "*.csv"))):
+            sheet = os.path.basename(os.path.dirname(tab_path))
+            with open(tab_path, newline="", encoding="utf-8") as f:
+                sheets.setdefault(sheet, {})[os.path.splitext(os.path.basename(tab_path))[0]] = list(csv.reader(f))
+        return sheets
+
+    def ohlc(self) -> pd.DataFrame:
+        """Every stored bar, with trade_date as datetime."""
+        parquet = os.path.join(self.path, "ohlc.parquet")
+        sqlite = os.path.join(self.path, "ohlc.sqlite")
+        if os.path.exists(parquet):
+            df = pd.read_parquet(parquet)
+        elif os.path.exists(sqlite):
+            with sqlite3.connect(sqlite) as conn:
+                df = pd.read_sql_query("SELECT * FROM ohlc_data", conn)
+        else:
+            df = pd.DataFrame(columns=["ticker", "trade_date", "open", "high", "low", "close", "volume"])
+        df["trade_date"] = pd.to_datetime(df["trade_date"])
+        return df
+
+
+class RecordedSource(LocalSource):
+    """
+    A snapshot written by record(): manifest.json, sheets/<sheet>.json with the
+    tab values exactly as the batched read returned them, ohlc.parquet and peg.json.
+    """
+
+    kind = "recorded"
+
+    def __init__(self, path: str, latency: float = 0.0, cache_dir: str = None):
+        super().__init__(path, latency, cache_dir)
+        with open(os.path.join(self.path, "manifest.json")) as f:
+            self.manifest = json.load(f)
+
+    def sheets(self) -> dict:
+        sheets = {}
+        for sheet in self.manifest["sheets"]:
+            with open(os.path.join(self.path, "sheets", f"{_file_name(sheet)}.json"), encoding="utf-8") as f:
+                sheets[sheet] = json.load(f)
+        return sheets
+
+
+SOURCES = {"live": LiveSource, "local": LocalSource, "recorded": RecordedSource}
+
+
+def _file_name(name: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_ ." else "_" for c in name)
+
+
+def parse_source(spec: str) -> DataSource:
+    """DataSource for "live", "local:<dir>" or "recorded:<dir>"."""
+    kind, _, path = spec.partition(":")
+    if kind not in SOURCES:
+        raise ValueError(f"Unknown data source {kind!r} (expected one of {', '.join(SOURCES)})")
+    return SOURCES[kind](path) if path else SOURCES[kind]()
+
+
+def _configured_spec() -> str:
+    spec = os.environ.get(DATA_SOURCE_ENV)
+    if spec:
+        return spec
+    try:
+        from core.clients import _secrets
+        config = _secrets().get("data_source", {})
+    except Exception:
+        # no secrets file (headless runs, benchmarks)
+        return "live"
+    kind = config.get("kind", "live")
+    return f"{kind}:{config['path']}" if config.get("path") else kind
+
+
+_default_source = None
+_default_lock = threading.Lock()
+
+
+def get_data_source() -> DataSource:
+    """Process-wide data source, as configured."""
+    global _default_source
+    with _default_lock:
+        if _default_source is None:
+            _default_source = parse_source(_configured_spec())
+        return _default_source
+
+
+def use_data_source(source: DataSource):
+    """
+    Switch the process to ``source`` (None: back to the configured one): cached
+    clients, spreadsheet snapshots, strategy results and the per-source stores
+    are dropped so they are rebuilt on the new source.
+    """
+    global _default_source
+    import core.fundamentals
+    import core.ohlc_store
+    import core.rsi_state
+    import core.signal_state
+    from core.clients import reset_clients
+    from core.sheets import clear_snapshots
+
+    with _default_lock:
+        _default_source = source
+    reset_clients()
+    clear_snapshots()
+    with core.ohlc_store._default_lock:
+        core.ohlc_store._default_store = None
+    with core.signal_state._default_lock:
+        core.signal_state._default_store = None
+    with core.rsi_state._default_lock:
+        core.rsi_state._default_states.clear()
+    with core.fundamentals._default_lock:
+        core.fundamentals._default_cache = None
+    try:
+        from core.runner import clear_result_cache, latest_ohlc_date
+        clear_result_cache()
+        latest_ohlc_date.clear()
+    except ImportError:
+        pass
+
+
+# -------------------------------
+# Recording and replay
+# -------------------------------
+def record(path: str, strategy_config: dict = None, sessions: int = 250) -> dict:
+    """
+    Snapshot what a run of ``strategy_config`` reads from the current source into
+    ``path``: every registered tab, the last ``sessions`` sessions of OHLC for
+    the buy-tab tickers and the cached PEG ratios. Returns the manifest.
+    """
+    from core.columns import col, normalize_ticker
+    from core.fetcher import DataFetcher
+    from core.fundamentals import get_peg_cache
+    from core.ohlc_store import get_ohlc_store
+    from core.sheets import get_snapshot
+    from core.trading_calendar import get_trading_calendar
+    from core.clients import get_supabase_client
+
+    if strategy_config is None:
+        from config import STRATEGY_CONFIG as strategy_config
+
+    os.makedirs(os.path.join(path, "sheets"), exist_ok=True)
+    sheets = sorted({c["sheet_name"] for c in strategy_config.values()})
+    tickers = []
+    for sheet in sheets:
+        snapshot = get_snapshot(sheet)
+        _write_json(os.path.join(path, "sheets", f"{_file_name(sheet)}.json"), snapshot.tab_values)
+        fetcher = DataFetcher(sheet)
+        for c in strategy_config.values():
+            if c["sheet_name"] != sheet:
+                continue
+            for tab in c["buy_tabs"]:
+                df = fetcher.fetch(tab)
+                if not df.empty:
+                    tickers += [normalize_ticker(t) for t in df[col("ticker")]]
+    tickers = list(dict.fromkeys(tickers))
+
+    start = get_trading_calendar().window_start(sessions)
+    store = get_ohlc_store()
+    store.sync(get_supabase_client(), tickers, start=start)
+    ohlc = store.read(tickers, start=start)
+    ohlc.to_parquet(os.path.join(path, "ohlc.parquet"), index=False)
+    pegs = {t: p for t, p in get_peg_cache().snapshot().items() if t in set(tickers)}
+    _write_json(os.path.join(path, "peg.json"), pegs)
+
+    manifest = {
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "source": get_data_source().describe(),
+        "sheets": sheets,
+        "tabs": {sheet: list(get_snapshot(sheet).tab_values) for sheet in sheets},
+        "tickers": len(tickers),
+        "sessions": sessions,
+        "ohlc_rows": len(ohlc),
+        "pegs": len(pegs),
+    }
+    _write_json(os.path.join(path, "manifest.json"), manifest)
+    return manifest
+
+
+def _write_json(path: str, payload):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, default=str)
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Record the live inputs of a run, or replay a recording.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="snapshot what a run reads from the configured source")
+    rec.add_argument("path", nargs="?", default=os.path.join(RECORDINGS_DIR, datetime.now().strftime("%Y-%m-%d")))
+    rec.add_argument("--sessions", type=int, default=250)
+    rep = sub.add_parser("replay", help="run every strategy on a recording, at full speed")
+    rep.add_argument("path")
+    rep.add_argument("--repeat", type=int, default=1, help="runs; the first starts from empty local stores")
+    rep.add_argument("--latency", type=float, default=0.0, help="seconds added to each OHLC request")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        manifest = record(args.path, sessions=args.sessions)
+        print(f"✅ Recorded {manifest['tickers']} tickers, {manifest['ohlc_rows']} bars, "
+              f"{sum(len(t) for t in manifest['tabs'].values())} tabs to {args.path}")
+        return 0
+
+    from config import STRATEGY_CONFIG
+    from core.runner import run_all
+
+    scratch = tempfile.mkdtemp(prefix="stockstrategies-replay-")
+    source = RecordedSource(args.path, latency=args.latency, cache_dir=scratch)
+    print(f"▶ Replaying {source.describe()} (recorded {source.manifest['recorded_at']})")
+    try:
+        for i in range(args.repeat):
+            # later runs keep the stores the first one filled, but not its results
+            use_data_source(source)
+            results, _, timings = run_all(STRATEGY_CONFIG)
+            stages = "  ".join(f"{k}={v:.3f}s" for k, v in timings.items() if ":" not in k)
+            print(f"  run {i + 1}: {stages}  rows={sum(len(df) for df in results.values())}")
+    finally:
+        use_data_source(None)
+        shutil.rmtree(scratch, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,215 @@
+"""
+Parameter sweeps of the strategy thresholds over historical OHLC.
+
+Each parameter set is a dict of rule overrides (keys of RSI_RULE, GAP_RULE or
+CONSOLIDATE_RULE) plus an optional ``sell_threshold_pct``:
+
+    from core.sweep import run_sweep
+    ranked = run_sweep(ohlc, "Nifty200_RSI", {"dip": [30, 35], "cross": [40, 42], "sell_threshold_pct": [8, 12, 15]})
+
+Headless use (reads OHLC through the local store):
+    python -m core.sweep Nifty200_RSI dip=30,35 cross=38,40,42 sell_threshold_pct=8,12,15
+"""
+import itertools
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from core.backtest import pad_ohlc, simulate_exits, strategy_entries, trade_log, trade_stats
+from core.rules import RULES
+
+SHARED_FIELDS = ("open", "high", "low", "close", "volume", "dates", "lengths")
+STAT_COLUMNS = ["Trades", "Closed", "Open", "Hit Rate %", "Avg Holding Days", "Avg Return %",
+                "Peak Open Trades", "CAGR %"]
+
+
+class SharedArrays:
+    """
+    NumPy arrays copied once into shared memory. Workers attach to them by name
+    (see attach) instead of each receiving a pickled copy.
+    """
+
+    def __init__(self, arrays: dict):
+        self._blocks = []
+        self.spec = {}
+        for name, values in arrays.items():
+            values = np.ascontiguousarray(values)
+            block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            np.ndarray(values.shape, values.dtype, buffer=block.buf)[...] = values
+            self._blocks.append(block)
+            self.spec[name] = (block.name, values.shape, values.dtype.str)
+
+    @staticmethod
+    def attach(spec: dict):
+        """Read-only views of the arrays described by ``spec``; returns (arrays, blocks)."""
+        arrays, blocks = {}, []
+        for name, (block_name, shape, dtype) in spec.items():
+            block = shared_memory.SharedMemory(name=block_name)
+            view = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+            view.flags.writeable = False
+            arrays[name] = view
+            blocks.append(block)
+        return arrays, blocks
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# -------------------------------
+# Parameter sets
+# -------------------------------
+def param_grid(space: dict) -> list:
+    """Every combination of ``space`` ({name: [values]})."""
+    names = list(space)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(space[n] for n in names))]
+
+
+def param_sample(space: dict, n: int, seed: int = 0) -> list:
+    """Up to ``n`` distinct random combinations of ``space``."""
+    names = list(space)
+    total = math.prod(len(space[k]) for k in names)
+    if total <= n:
+        return param_grid(space)
+    rng = np.random.default_rng(seed)
+    picked = {}
+    while len(picked) < n:
+        combo = tuple(int(rng.integers(len(space[k]))) for k in names)
+        picked.setdefault(combo, {k: space[k][i] for k, i in zip(names, combo)})
+    return list(picked.values())
+
+
+def _indicator_key(strategy: str, params: dict) -> tuple:
+    """The parameters that decide which cached indicators a set needs."""
+    rule = {**RULES[strategy], **params}
+    if strategy == "Nifty200_RSI":
+        return (rule["period"],)
+    if strategy == "EarningsGap":
+        return (rule["rsi_period"], rule["volume_window"], rule["return_window"])
+    return (tuple(rule["dma_periods"]), rule["range_window"])
+
+
+# -------------------------------
+# Evaluation
+# -------------------------------
+def evaluate(arrays: dict, strategy: str, params: dict, peg: dict = None, cache: dict = None,
+             start=None, end=None) -> dict:
+    """Backtest statistics of one parameter set, as a flat row."""
+    rule = {k: v for k, v in params.items() if k != "sell_threshold_pct"}
+    sell_threshold_pct = params.get("sell_threshold_pct", 12)
+    entries = strategy_entries(strategy, arrays, rule, peg, cache)
+    exits = simulate_exits(entries, arrays["close"], arrays["lengths"], sell_threshold_pct)
+    trades = trade_log(strategy, arrays, *exits)
+    stats = trade_stats(trades, start, end)
+    row = stats.iloc[0].drop("Strategy").to_dict() if len(stats) else dict.fromkeys(STAT_COLUMNS, 0)
+    return {**params, **row}
+
+
+# Per-process state of a sweep worker (set by _init_worker)
+_worker = {}
+
+
+def _init_worker(spec, tickers, strategy, peg, start, end):
+    arrays, blocks = SharedArrays.attach(spec)
+    arrays["tickers"] = np.asarray(tickers, dtype=object)
+    _worker.update(arrays=arrays, blocks=blocks, strategy=strategy, peg=peg,
+                   start=start, end=end, cache={})
+
+
+def _evaluate_in_worker(params):
+    w = _worker
+    return evaluate(w["arrays"], w["strategy"], params, w["peg"], w["cache"], w["start"], w["end"])
+
+
+def run_sweep(ohlc: pd.DataFrame, strategy: str, space: dict, samples: int = None, workers: int = None,
+              metric: str = "CAGR %", min_trades: int = 1, peg: dict = None, seed: int = 0) -> pd.DataFrame:
+    """
+    Backtest every parameter set of ``space`` (or ``samples`` random ones) for
+    ``strategy`` and rank them by ``metric``.
+
+    The padded OHLC arrays go into shared memory once; each worker process
+    attaches to them and keeps its own cache of indicators that do not depend
+    on the swept thresholds. Sets are ordered by the indicators they need and
+    handed out in contiguous chunks, so a worker computes each indicator once.
+    Sets with fewer than ``min_trades`` trades are ranked last. Sweeping
+    ``max_peg`` needs ``peg`` ({ticker: PEG}), without which it would change nothing.
+    """
+    if strategy not in RULES:
+        raise KeyError(f"No backtest rule for strategy {strategy!r}")
+    if "max_peg" in space and peg is None:
+        raise ValueError("Sweeping max_peg needs peg ratios: pass peg={ticker: PEG}")
+    sets = param_grid(space) if samples is None else param_sample(space, samples, seed)
+    sets.sort(key=lambda p: repr(_indicator_key(strategy, p)))
+
+    arrays = pad_ohlc(ohlc)
+    dates = pd.to_datetime(ohlc["trade_date"])
+    start, end = dates.min(), dates.max()
+    workers = min(workers or os.cpu_count() or 1, len(sets)) or 1
+
+    if workers == 1:
+        cache = {}
+        rows = [evaluate(arrays, strategy, p, peg, cache, start, end) for p in sets]
+    else:
+        with SharedArrays({k: arrays[k] for k in SHARED_FIELDS}) as shared:
+            init = (shared.spec, arrays["tickers"].tolist(), strategy, peg, start, end)
+            chunksize = max(1, math.ceil(len(sets) / workers))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init) as pool:
+                rows = list(pool.map(_evaluate_in_worker, sets, chunksize=chunksize))
+
+    ranked = pd.DataFrame(rows)
+    ranked["_eligible"] = ranked["Trades"] >= min_trades
+    ranked = (
+        ranked.sort_values(["_eligible", metric, "Hit Rate %"], ascending=False, kind="stable", na_position="last")
+        .drop(columns="_eligible")
+        .reset_index(drop=True)
+    )
+    ranked.insert(0, "Rank", np.arange(1, len(ranked) + 1))
+    return ranked
+
+
+def main(argv=None):
+    import argparse
+    from core.analyzers import fetch_ohlc_window
+    from core.clients import get_supabase_client
+    from core.fundamentals import get_peg_cache
+    from core.ohlc_store import get_ohlc_store
+
+    parser = argparse.ArgumentParser(description="Rank strategy thresholds by backtest performance.")
+    parser.add_argument("strategy", choices=sorted(RULES))
+    parser.add_argument("params", nargs="+", help="name=v1,v2,... (e.g. dip=30,35 sell_threshold_pct=8,12)")
+    parser.add_argument("--samples", type=int, default=None, help="random sets instead of the full grid")
+    parser.add_argument("--sessions", type=int, default=500, help="history window in NSE sessions")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--metric", default="CAGR %")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    space = {}
+    for item in args.params:
+        name, values = item.split("=", 1)
+        space[name] = [json.loads(v) for v in values.split(",")]
+
+    tickers = list(get_ohlc_store().last_dates())
+    ohlc = fetch_ohlc_window(get_supabase_client(), tickers, sessions=args.sessions)
+    # the earnings-gap rule's PEG ceiling, as the live analyzer applies it
+    peg = get_peg_cache().get_many(tickers) if args.strategy == "EarningsGap" else None
+    ranked = run_sweep(ohlc, args.strategy, space, samples=args.samples, workers=args.workers,
+                       metric=args.metric, peg=peg)
+    print(ranked.head(args.top).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Stage timings of the hot paths (strategy runs, sheet and OHLC reads, RSI, PEG
+lookups, page renders) as nested spans.
+
+    from core.telemetry import span
+
+    with span("fetcher.fetch", tab=tab_name) as s:
+        ...
+        s.set(rows=len(df), bytes=n, cache="hit")
+
+A span opened while another is open becomes its child; a span opened with none
+open starts a run. When a run ends it is kept in memory for the sidebar panel
+(timing_panel()); at most every FLUSH_SECONDS (and at exit) the runs ended
+since are appended to a JSON-lines log and the Prometheus textfile is
+rewritten (for node_exporter's textfile collector).
+Thread pools started inside a span keep the nesting when their tasks are
+wrapped with bind().
+"""
+import atexit
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import pandas as pd
+
+from core.paths import CACHE_DIR
+
+TELEMETRY_DIR = os.path.join(CACHE_DIR, "telemetry")
+SPAN_LOG = os.path.join(TELEMETRY_DIR, "spans.jsonl")
+PROM_FILE = os.path.join(TELEMETRY_DIR, "stockstrategies.prom")
+MAX_LOG_BYTES = 20 * 1024 ** 2
+RECENT_RUNS = 50
+FLUSH_SECONDS = 5.0
+# runs whose root has not ended after this long are dropped (their context was lost)
+MAX_OPEN_SECONDS = 3600
+
+_current = contextvars.ContextVar("telemetry_span", default=None)
+_ids = itertools.count(1)
+
+
+class Span:
+    """One timed stage; ``attrs`` carries rows, bytes, cache ("hit"/"miss") and any other fields."""
+
+    def __init__(self, name: str, parent: "Span" = None, **attrs):
+        self.name = name
+        self.id = next(_ids)
+        self.parent = parent
+        self.run = parent.run if parent is not None else self
+        self.attrs = attrs
+        self.children = []
+        self.started_at = datetime.now()
+        self.seconds = None
+        self.error = None
+        self._start = time.perf_counter()
+        self._token = None
+
+    def set(self, **attrs) -> "Span":
+        self.attrs.update(attrs)
+        return self
+
+    def record(self) -> dict:
+        return {
+            "ts": self.started_at.isoformat(timespec="milliseconds"),
+            "run": self.run.id,
+            "span": self.id,
+            "parent": self.parent.id if self.parent is not None else None,
+            "name": self.name,
+            "seconds": round(self.seconds, 6),
+            "thread": threading.current_thread().name,
+            **({"error": self.error} if self.error else {}),
+            **self.attrs,
+        }
+
+    # -------------------------------
+    # Start/end, or use as a context manager
+    # -------------------------------
+    def start(self) -> "Span":
+        if self.parent is not None:
+            self.parent.children.append(self)
+        self._token = _current.set(self)
+        return self
+
+    def end(self, error: BaseException = None):
+        if self.seconds is not None:
+            return
+        self.seconds = time.perf_counter() - self._start
+        if error is not None:
+            self.error = type(error).__name__
+        try:
+            _current.reset(self._token)
+        except ValueError:
+            # ended from another context (e.g. a page's finally block after st.stop())
+            _current.set(self.parent)
+        get_telemetry().finish(self)
+
+    def __enter__(self) -> "Span":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end(exc)
+        return False
+
+
+class Abandoned(Exception):
+    """Error marker of a run whose render was cut short before it ended its span."""
+
+
+class Telemetry:
+    """
+    Collects finished spans: ended runs are appended to ``log_path`` (JSON lines)
+    and per-span totals written to ``prom_path`` by flush(), which finish() calls
+    at most every ``flush_seconds``. Either path may be None to keep that output off.
+    """
+
+    def __init__(self, log_path: str = SPAN_LOG, prom_path: str = PROM_FILE, recent: int = RECENT_RUNS,
+                 flush_seconds: float = FLUSH_SECONDS):
+        self.log_path = log_path
+        self.prom_path = prom_path
+        self.flush_seconds = flush_seconds
+        self.runs = deque(maxlen=recent)
+        self._pending = {}
+        self._opened = {}
+        self._unflushed = []
+        self._flushed_at = time.monotonic()
+        self._timer = None
+        self._totals = {}
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+
+    def finish(self, span: Span):
+        with self._lock:
+            totals = self._totals.setdefault(span.name, {"count": 0, "seconds": 0.0, "last": 0.0, "rows": 0,
+                                                         "bytes": 0, "hit": 0, "miss": 0, "errors": 0})
+            totals["count"] += 1
+            totals["seconds"] += span.seconds
+            totals["last"] = span.seconds
+            totals["rows"] += int(span.attrs.get("rows") or 0)
+            totals["bytes"] += int(span.attrs.get("bytes") or 0)
+            if span.attrs.get("cache") in ("hit", "miss"):
+                totals[span.attrs["cache"]] += 1
+            totals["errors"] += span.error is not None
+            if span.parent is not None and span.run.seconds is not None:
+                # its run already ended (abandoned, or a task that outlived it): counted, not kept
+                return
+            if span.run.id not in self._pending:
+                self._opened[span.run.id] = time.monotonic()
+            self._pending.setdefault(span.run.id, []).append(span.record())
+            if span.parent is not None:
+                return
+            records = self._pending.pop(span.id)
+            del self._opened[span.id]
+            self._drop_stale()
+            self.runs.append(records)
+            self._unflushed.extend(records)
+            wait = self.flush_seconds - (time.monotonic() - self._flushed_at)
+            if 0 < wait and self._timer is None:
+                # a quiet spell after this run still gets it written
+                self._timer = threading.Timer(wait, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if wait <= 0:
+            self.flush()
+
+    def _drop_stale(self):
+        cutoff = time.monotonic() - MAX_OPEN_SECONDS
+        for run_id in [r for r, opened in self._opened.items() if opened < cutoff]:
+            del self._pending[run_id], self._opened[run_id]
+
+    def open_runs(self) -> int:
+        """Runs with finished spans whose root has not ended yet."""
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Append the runs ended since the last flush to the log and rewrite the Prometheus file."""
+        with self._io_lock:
+            with self._lock:
+                records, self._unflushed = self._unflushed, []
+                prom = self._prom_lines()
+                self._flushed_at = time.monotonic()
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            try:
+                self._append_log(records)
+                self._write_prom(prom)
+            except OSError as e:
+                print(f"⚠️ Could not write telemetry: {e}")
+
+    def _append_log(self, records: list):
+        if not self.log_path or not records:
+            return
+        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > MAX_LOG_BYTES:
+            os.replace(self.log_path, f"{self.log_path}.1")
+        with open(self.log_path, "a") as f:
+            f.writelines(json.dumps(r, default=str) + "\n" for r in records)
+
+    def _prom_lines(self) -> list:
+        if not self.prom_path:
+            return []
+        metrics = [
+            ("stockstrategies_span_seconds_total", "counter", "Seconds spent in each span.", "seconds"),
+            ("stockstrategies_span_count_total", "counter", "Times each span ran.", "count"),
+            ("stockstrategies_span_last_seconds", "gauge", "Duration of the most recent run of each span.", "last"),
+            ("stockstrategies_span_rows_total", "counter", "Rows handled in each span.", "rows"),
+            ("stockstrategies_span_bytes_total", "counter", "Bytes transferred in each span.", "bytes"),
+            ("stockstrategies_span_errors_total", "counter", "Spans that ended with an exception.", "errors"),
+        ]
+        lines = []
+        for metric, kind, help_text, field in metrics:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+            lines += [f'{metric}{{span="{name}"}} {t[field]:g}' for name, t in sorted(self._totals.items())]
+        lines += ["# HELP stockstrategies_cache_total Cache lookups of each span by result.",
+                  "# TYPE stockstrategies_cache_total counter"]
+        lines += [
+            f'stockstrategies_cache_total{{span="{name}",result="{result}"}} {t[result]}'
+            for name, t in sorted(self._totals.items()) if t["hit"] or t["miss"] for result in ("hit", "miss")
+        ]
+        return lines
+
+    def _write_prom(self, lines: list):
+        if not self.prom_path:
+            return
+        os.makedirs(os.path.dirname(self.prom_path), exist_ok=True)
+        tmp = f"{self.prom_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.prom_path)
+
+    def recent_runs(self, n: int = 10) -> list:
+        """Span records of the last ``n`` runs, newest first."""
+        with self._lock:
+            return list(self.runs)[::-1][:n]
+
+
+_default_telemetry = None
+_default_lock = threading.Lock()
+
+
+def get_telemetry() -> Telemetry:
+    """Process-wide span collector."""
+    global _default_telemetry
+    with _default_lock:
+        if _default_telemetry is None:
+            _default_telemetry = Telemetry()
+            # runs ended since the last flush (e.g. the tail of a precompute job)
+            atexit.register(_default_telemetry.flush)
+        return _default_telemetry
+
+
+def current_span():
+    return _current.get()
+
+
+def span(name: str, **attrs) -> Span:
+    """New span under the current one; use it with ``with`` (or start()/end())."""
+    return Span(name, _current.get(), **attrs)
+
+
+def timed(name: str):
+    """Decorator: run the function inside span ``name``."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def bind(fn):
+    """``fn`` running under the span current now, for tasks handed to a thread pool."""
+    parent = _current.get()
+
+    @functools.wraps(fn)
+    def inner(*args, **kwargs):
+        token = _current.set(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return inner
+
+
+# -------------------------------
+# Streamlit
+# -------------------------------
+def page_span(page: str) -> Span:
+    """
+    Started span of a page render; the page calls .end() after its last element.
+    A render cut short (st.stop(), an exception) never ends its span, so a run
+    still open from an earlier rerun is ended here, marked Abandoned.
+    """
+    stale = _current.get()
+    if stale is not None:
+        stale.run.end(Abandoned())
+    _current.set(None)
+    return span("page.render", page=os.path.basename(page)).start()
+
+
+def timing_panel(n: int = 5):
+    """Optional sidebar panel with the stages of the last ``n`` runs in this process."""
+    import streamlit as st
+
+    if not st.sidebar.toggle("⏱️ Show timings", key="show_timings"):
+        return
+    runs = get_telemetry().recent_runs(n)
+    if not runs:
+        st.sidebar.caption("No runs recorded yet.")
+        return
+    for records in runs:
+        rows = sorted(records, key=lambda r: r["span"])
+        root = next(r for r in rows if r["parent"] is None)
+        depth = {}
+        for r in rows:
+            depth[r["span"]] = depth.get(r["parent"], -1) + 1
+        label = root.get("page") or root.get("strategy") or root["name"]
+        with st.sidebar.expander(f"{root['ts'][11:19]} · {label} · {root['seconds']:.2f}s"):
+            st.dataframe(pd.DataFrame({
+                "Stage": ["  " * depth[r["span"]] + r["name"] for r in rows],
+                "s": [round(r["seconds"], 3) for r in rows],
+                "Rows": [r.get("rows") for r in rows],
+                "Bytes": [r.get("bytes") for r in rows],
+                "Cache": [r.get("cache") for r in rows],
+            }), hide_index=True, width="stretch")
@@ -0,0 +1,160 @@
+"""
+NSE trading calendar: weekdays minus exchange holidays, as a numpy busdaycalendar.
+
+Holidays come from pages/nse_holidays.json ({"2025": ["2025-01-26", ...]}).
+Years missing from the file count every weekday as a session; add them with
+extend() (and persist=True), or learn them from stored bars with infer_holidays().
+"""
+import json
+import os
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from core.ohlc_bars import OHLCBars
+from core.paths import ROOT_DIR
+from core.telemetry import span
+
+HOLIDAY_FILE = os.path.join(ROOT_DIR, "pages", "nse_holidays.json")
+
+
+def _days(dates) -> np.ndarray:
+    """Any date-like (scalar, list, Series, datetime64 array) as datetime64[D]."""
+    if isinstance(dates, (pd.Series, pd.Index)):
+        return pd.to_datetime(dates).to_numpy().astype("datetime64[D]")
+    return np.asarray(pd.to_datetime(dates)).astype("datetime64[D]")
+
+
+class TradingCalendar:
+    """
+    Vectorized session arithmetic over a fixed holiday set.
+
+    is_session() tests many dates at once, window_start() counts N sessions
+    back, sessions() lists a range, and filter() keeps session rows of a
+    frame. extend()/refresh() swap in a new calendar atomically, so
+    concurrent readers always see a complete one.
+    """
+
+    def __init__(self, holidays=(), weekmask: str = "1111100", path: str = None):
+        self.path = path
+        self.weekmask = weekmask
+        self._lock = threading.Lock()
+        self._build(holidays)
+
+    @classmethod
+    def from_file(cls, path: str = HOLIDAY_FILE) -> "TradingCalendar":
+        return cls(cls._read(path), path=path)
+
+    @staticmethod
+    def _read(path: str) -> list:
+        try:
+            with open(path, "r") as f:
+                by_year = json.load(f)
+        except FileNotFoundError:
+            return []
+        return [d for days in by_year.values() for d in days]
+
+    def _build(self, holidays):
+        """Publish holidays, covered years and busdaycalendar together in one assignment."""
+        days = np.unique(_days(list(holidays))) if len(holidays) else np.array([], dtype="datetime64[D]")
+        days.flags.writeable = False
+        self._state = (days, frozenset(pd.DatetimeIndex(days).year),
+                       np.busdaycalendar(weekmask=self.weekmask, holidays=days))
+
+    @property
+    def _cal(self) -> np.busdaycalendar:
+        return self._state[2]
+
+    # -------------------------------
+    # Queries
+    # -------------------------------
+    @property
+    def holidays(self) -> np.ndarray:
+        return self._state[0]
+
+    def covers(self, year: int) -> bool:
+        """Whether holidays are known for ``year``."""
+        return year in self._state[1]
+
+    def is_session(self, dates) -> np.ndarray:
+        return np.is_busday(_days(dates), busdaycal=self._cal)
+
+    def last_session(self, on=None) -> date:
+        """``on`` (default today) if it is a session, else the session before it."""
+        day = _days(on if on is not None else date.today())
+        return np.busday_offset(day, 0, roll="backward", busdaycal=self._cal).astype(object)
+
+    def window_start(self, sessions: int, end=None) -> date:
+        """First session of the ``sessions``-session window ending at ``end`` (default: today)."""
+        day = _days(end if end is not None else date.today())
+        start = np.busday_offset(day, -(max(sessions, 1) - 1), roll="backward", busdaycal=self._cal)
+        return start.astype(object)
+
+    def sessions(self, start, end) -> np.ndarray:
+        """Session dates in [``start``, ``end``] as datetime64[D]."""
+        days = np.arange(_days(start), _days(end) + np.timedelta64(1, "D"), dtype="datetime64[D]")
+        return days[np.is_busday(days, busdaycal=self._cal)]
+
+    def count(self, start, end) -> int:
+        """Number of sessions in [``start``, ``end``]."""
+        return int(np.busday_count(_days(start), _days(end) + np.timedelta64(1, "D"), busdaycal=self._cal))
+
+    def filter(self, df, column: str = "trade_date"):
+        """Rows of ``df`` that fall on sessions (``column`` parsed to datetime64 once); OHLCBars too."""
+        with span("calendar.filter", rows_in=len(df)) as s:
+            if isinstance(df, OHLCBars):
+                df = df.sessions_only(self.is_session(df.dates))
+            elif not df.empty:
+                df = df.copy()
+                df[column] = pd.to_datetime(df[column])
+                df = df[self.is_session(df[column])]
+            s.set(rows=len(df))
+            return df
+
+    # -------------------------------
+    # Holiday data
+    # -------------------------------
+    def infer_holidays(self, observed, start=None, end=None) -> np.ndarray:
+        """
+        Sessions of this calendar with no bar in ``observed`` (all trade dates of a
+        broad universe): holidays the file is missing, ready for extend().
+        """
+        observed = np.unique(_days(observed))
+        if observed.size == 0:
+            return observed
+        days = self.sessions(start if start is not None else observed[0], end if end is not None else observed[-1])
+        return days[~np.isin(days, observed)]
+
+    def extend(self, holidays, persist: bool = False):
+        """Add ``holidays``; with ``persist``, also write them to the holiday file."""
+        with self._lock:
+            self._build(list(self.holidays) + list(_days(list(holidays))))
+            if persist and self.path:
+                by_year = {}
+                for day in pd.DatetimeIndex(self.holidays):
+                    by_year.setdefault(str(day.year), []).append(day.date().isoformat())
+                tmp = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp, "w") as f:
+                    json.dump(dict(sorted(by_year.items(), reverse=True)), f, indent=2)
+                os.replace(tmp, self.path)
+
+    def refresh(self):
+        """Reload holidays from the file (after it was edited)."""
+        if self.path:
+            with self._lock:
+                self._build(self._read(self.path))
+
+
+_default_calendar = None
+_default_lock = threading.Lock()
+
+
+def get_trading_calendar() -> TradingCalendar:
+    """Process-wide NSE calendar, built from the holiday file on first use."""
+    global _default_calendar
+    with _default_lock:
+        if _default_calendar is None:
+            _default_calendar = TradingCalendar.from_file()
+        return _default_calendar
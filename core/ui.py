@@ -0,0 +1,104 @@
+"""
+The few Streamlit services core/ needs (st.cache_data, st.secrets, st.warning),
+without importing Streamlit. Inside the app Streamlit is already loaded and
+these defer to it; headless runs (core.precompute, core.ingest, benchmarks)
+get an in-process TTL cache, secrets read from .streamlit/secrets.toml and
+the ``stockstrategies`` logger instead.
+"""
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+
+from core.paths import ROOT_DIR
+
+# path of a secrets.toml for headless runs (default: .streamlit/secrets.toml in the repo)
+SECRETS_ENV = "STOCKSTRATEGIES_SECRETS"
+
+log = logging.getLogger("stockstrategies")
+
+
+def _streamlit():
+    """The streamlit module when the app has loaded it, else None."""
+    return sys.modules.get("streamlit")
+
+
+def cache_data(ttl: float, show_spinner: bool = False):
+    """
+    st.cache_data(ttl=..., show_spinner=...) when Streamlit is loaded at the
+    first call, else a thread-safe in-process cache whose entries expire after
+    ``ttl`` seconds. Either way the wrapped function keeps ``.clear()``.
+    """
+    def wrap(fn):
+        backend = None
+        backend_lock = threading.Lock()
+
+        def resolve():
+            nonlocal backend
+            with backend_lock:
+                if backend is None:
+                    st = _streamlit()
+                    backend = st.cache_data(ttl=ttl, show_spinner=show_spinner)(fn) if st else _ttl_cache(fn, ttl)
+                return backend
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            return (backend or resolve())(*args, **kwargs)
+
+        def clear():
+            if backend is not None:
+                backend.clear()
+
+        inner.clear = clear
+        return inner
+    return wrap
+
+
+def _ttl_cache(fn, ttl: float):
+    entries = {}
+    lock = threading.Lock()
+
+    @functools.wraps(fn)
+    def inner(*args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        with lock:
+            hit = entries.get(key)
+        if hit is not None and time.monotonic() - hit[0] < ttl:
+            return hit[1]
+        value = fn(*args, **kwargs)
+        with lock:
+            entries[key] = (time.monotonic(), value)
+        return value
+
+    def clear():
+        with lock:
+            entries.clear()
+
+    inner.clear = clear
+    return inner
+
+
+@functools.lru_cache(maxsize=1)
+def _secrets_file(path: str) -> dict:
+    import tomllib
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def secrets():
+    """st.secrets in the app; headless, the parsed secrets.toml (FileNotFoundError when there is none)."""
+    st = _streamlit()
+    if st is not None:
+        return st.secrets
+    return _secrets_file(os.environ.get(SECRETS_ENV) or os.path.join(ROOT_DIR, ".streamlit", "secrets.toml"))
+
+
+def warning(message: str):
+    """st.warning in the app, a logged warning elsewhere."""
+    st = _streamlit()
+    if st is not None:
+        st.warning(message)
+    else:
+        log.warning(message)
@@ -1,7 +1,9 @@
 import streamlit as st
 import pandas as pd
 from config import STRATEGY_CONFIG
-from core.runner import StrategyRunner
+from core.precompute import load_results
+from core.runner import run_all
+from core.telemetry import page_span, timing_panel
 
 if "authentication_status" not in st.session_state or not st.session_state["authentication_status"]:
     st.warning("🔒 Please login from the Home page to access this section.")
@@ -10,18 +12,28 @@ if "authentication_status" not in st.session_state or not st.session_state["auth
 st.page_link("main.py", label="⬅️ Back to Home", icon="🏠")
 
 st.set_page_config(page_title="BUY Signals", layout="wide")
+render = page_span(__file__)
 st.title("🟢 BUY Signals")
 
 
 # ✅ Tabs setup (only visible after login)
 tabs = st.tabs([f"🟢 {strategy} BUY Signals" for strategy in STRATEGY_CONFIG.keys()] )
 
-        
+# 📦 Results of the end-of-day precompute, if it covered the last close
+snapshot = load_results(STRATEGY_CONFIG)
+if snapshot is not None:
+    results = snapshot.results
+    st.caption(snapshot.caption())
+else:
+    # 🚀 All strategies at once: shared inputs fetched once, analyzers run concurrently
+    with st.spinner("Running strategies..."):
+        results, _, timings = run_all(STRATEGY_CONFIG)
+    st.caption(f"⏱️ Computed in {timings['total']:.2f}s")
+
 # ✅ BUY signal tabs
 for i, strategy in enumerate(STRATEGY_CONFIG.keys()):
     with tabs[i]:
-        runner = StrategyRunner(strategy, STRATEGY_CONFIG[strategy])
-        result_df = runner.run()
+        result_df = results[strategy]
         if "Signal" in result_df.columns:
             buy_df = result_df[result_df["Signal"] == "BUY"]
         else:
@@ -32,4 +44,7 @@ for i, strategy in enumerate(STRATEGY_CONFIG.keys()):
         else:
             st.subheader(f"🟢 BUY Signals for {strategy}")
             st.dataframe(buy_df, width="stretch")
-        
\ No newline at end of file
+
+# ⏱️ Render timing
+render.end()
+timing_panel()
@@ -1,10 +1,8 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
 from config import STRATEGY_CONFIG
-from core.runner import StrategyRunner
-from core.columns import col
+from core.fd_benchmark import FD_METHODS, FD_RATES
+from core.precompute import load_ledger, load_results
+from core.telemetry import page_span, timing_panel
 
 # 🔐 Session protection
 if "authentication_status" not in st.session_state or not st.session_state["authentication_status"]:
@@ -14,66 +12,34 @@ if "authentication_status" not in st.session_state or not st.session_state["auth
 st.page_link("main.py", label="⬅️ Back to Home", icon="🏠")
 
 st.set_page_config(page_title="FD Benchmark Comparison", layout="wide")
+render = page_span(__file__)
 st.title("🏦 Strategy vs FD Benchmark")
 
-# 🌀 Load all portfolios
-all_portfolios = []
-for strategy, config in STRATEGY_CONFIG.items():
-    runner = StrategyRunner(strategy, config)
-    df = runner.portfolio_mgr.load(config["portfolio_tab"])
-    df["Strategy"] = strategy
-    all_portfolios.append(df)
-
-portfolio_df = pd.concat(all_portfolios, ignore_index=True)
-sold_df = portfolio_df[portfolio_df[col("sell_date")].notna()].copy()
-sell_price_col = "Sell Price"
+# 🌀 All portfolios: the precomputed ledger, unless the sheets were refreshed (page 2) or the
+# portfolio tabs changed since it was built; then the shared live one
+snapshot = None if "last_refresh" in st.session_state else load_results(STRATEGY_CONFIG)
+ledger = load_ledger(STRATEGY_CONFIG, snapshot)
 
 # 🔧 Controls
-fd_rate = st.slider("FD Interest Rate (%)", min_value=5.0, max_value=12.0, value=8.0, step=0.5)
+fd_rate = st.slider("FD Interest Rate (%)", min_value=float(FD_RATES[0]), max_value=float(FD_RATES[-1]), value=8.0, step=0.5)
+fd_method = st.radio("FD Interest", list(FD_METHODS), format_func=FD_METHODS.get, horizontal=True)
 show_outperformers_only = st.checkbox("✅ Show only outperformers (Strategy > FD)")
 
-if sell_price_col not in sold_df.columns:
+if not ledger.has_sell_price:
     st.warning("⚠️ 'Sell Price' column missing. Cannot compute benchmark.")
 else:
-    # ✅ Core calculations
-    sold_df["Investment"] = sold_df[col("buy_price")] * sold_df[col("buy_qty")]
-    sold_df["RealizedValue"] = sold_df[sell_price_col] * sold_df[col("buy_qty")]
-    sold_df[col("buy_date")] = pd.to_datetime(sold_df[col("buy_date")], errors="coerce")
-    sold_df[col("sell_date")] = pd.to_datetime(sold_df[col("sell_date")], errors="coerce")
-    sold_df = sold_df[sold_df[col("buy_date")].notna() & sold_df[col("sell_date")].notna()]
-    sold_df["Days Held"] = (sold_df[col("sell_date")] - sold_df[col("buy_date")]).dt.days.clip(lower=1)
-
-    sold_df["FD Return"] = sold_df["Investment"] * (1 + (fd_rate / 100) * sold_df["Days Held"] / 365)
-    sold_df["Strategy Profit"] = sold_df["RealizedValue"] - sold_df["Investment"]
-    sold_df["FD Profit"] = sold_df["FD Return"] - sold_df["Investment"]
-    sold_df["Excess Profit"] = sold_df["Strategy Profit"] - sold_df["FD Profit"]
-
-    # ✅ Group by ticker
-    benchmark_df = (
-        sold_df.groupby(col("ticker"), as_index=False)
-        .agg({
-            "Investment": "sum",
-            "RealizedValue": "sum",
-            "FD Return": "sum",
-            "Strategy Profit": "sum",
-            "FD Profit": "sum",
-            "Excess Profit": "sum"
-        })
-        .rename(columns={col("ticker"): "Ticker"})
-    )
-
-    benchmark_df["Strategy %"] = (benchmark_df["Strategy Profit"] / benchmark_df["Investment"]) * 100
-    benchmark_df["FD %"] = (benchmark_df["FD Profit"] / benchmark_df["Investment"]) * 100
-    benchmark_df["Excess %"] = benchmark_df["Strategy %"] - benchmark_df["FD %"]
+    # ✅ Sold lots vs FD, grouped by ticker (precomputed for every slider rate)
+    benchmark_df = ledger.fd_benchmark(fd_rate, fd_method)
+    display_columns = ["Ticker", "Investment", "RealizedValue", "FD Return", "Strategy Profit", "FD Profit", "Excess Profit", "Strategy %", "FD %", "Excess %"]
+    if fd_method == "xirr":
+        display_columns.append("Strategy XIRR %")
 
     if show_outperformers_only:
         benchmark_df = benchmark_df[benchmark_df["Excess Profit"] > 0]
 
     # ✅ Display table
     st.dataframe(
-        benchmark_df[
-            ["Ticker", "Investment", "RealizedValue", "FD Return", "Strategy Profit", "FD Profit", "Excess Profit", "Strategy %", "FD %", "Excess %"]
-        ]
+        benchmark_df[display_columns]
         .style
         .format({
             "Investment": "₹{:.2f}",
@@ -84,37 +50,15 @@ else:
             "Excess Profit": "₹{:.2f}",
             "Strategy %": "{:.2f}%",
             "FD %": "{:.2f}%",
-            "Excess %": "{:.2f}%"
+            "Excess %": "{:.2f}%",
+            "Strategy XIRR %": "{:.2f}%"
         }),
         width="stretch"
     )
 
-    # 📊 Grouped Bar Chart: Strategy vs FD Profit
-    tickers = benchmark_df["Ticker"]
-    strategy_profit = benchmark_df["Strategy Profit"]
-    fd_profit = benchmark_df["FD Profit"]
-
-    x = np.arange(len(tickers))
-    width = 0.35
-
-    fig, ax = plt.subplots(figsize=(10, 6))
-    bars1 = ax.bar(x - width/2, strategy_profit, width, label="Strategy", color="green")
-    bars2 = ax.bar(x + width/2, fd_profit, width, label="FD", color="gray")
-
-    for bar in bars1:
-        height = bar.get_height()
-        ax.annotate(f'₹{height:,.0f}', xy=(bar.get_x() + bar.get_width()/2, height),
-                    xytext=(0, 3), textcoords="offset points", ha='center', va='bottom', fontsize=8)
-
-    for bar in bars2:
-        height = bar.get_height()
-        ax.annotate(f'₹{height:,.0f}', xy=(bar.get_x() + bar.get_width()/2, height),
-                    xytext=(0, 3), textcoords="offset points", ha='center', va='bottom', fontsize=8)
-
-    ax.set_ylabel("Profit (₹)")
-    ax.set_title("Strategy vs FD Profit by Ticker")
-    ax.set_xticks(x)
-    ax.set_xticklabels(tickers, rotation=45, ha="right")
-    ax.legend()
+    # 📊 Grouped Bar Chart: Strategy vs FD Profit (cached figure spec)
+    st.plotly_chart(ledger.fd_chart(fd_rate, fd_method, show_outperformers_only), width="stretch")
 
-    st.pyplot(fig)
\ No newline at end of file
+# ⏱️ Render timing
+render.end()
+timing_panel()
@@ -3,8 +3,11 @@ import pandas as pd
 #import matplotlib.pyplot as plt
 #import numpy as np
 from config import STRATEGY_CONFIG
-from core.runner import StrategyRunner
 from core.columns import col
+from core.fd_benchmark import FD_METHODS, FD_RATES
+from core.portfolio import SELL_PRICE
+from core.precompute import load_ledger, load_results
+from core.telemetry import page_span, timing_panel
 
 # 🔐 Session protection
 if "authentication_status" not in st.session_state or not st.session_state["authentication_status"]:
@@ -14,40 +17,20 @@ if "authentication_status" not in st.session_state or not st.session_state["auth
 st.page_link("main.py", label="⬅️ Back to Home", icon="🏠")
 
 st.set_page_config(page_title="Profit Realizarion", layout="wide")
+render = page_span(__file__)
 st.title("📈 Profit Realization")
 
-# 🌀 Load all portfolios
-all_portfolios = []
-for strategy, config in STRATEGY_CONFIG.items():
-    runner = StrategyRunner(strategy, config)
-    df = runner.portfolio_mgr.load(config["portfolio_tab"])
-    df["Strategy"] = strategy
-    all_portfolios.append(df)
-
-portfolio_df = pd.concat(all_portfolios, ignore_index=True)
-active_df = portfolio_df[portfolio_df[col("sell_date")].isna()].copy()
+# 🌀 All portfolios: the precomputed ledger, unless the sheets were refreshed (page 2) or the
+# portfolio tabs changed since it was built; then the shared live one
+snapshot = None if "last_refresh" in st.session_state else load_results(STRATEGY_CONFIG)
+ledger = load_ledger(STRATEGY_CONFIG, snapshot)
 
 # 💰 Realized profit summary from sold holdings
-sold_df = portfolio_df[portfolio_df[col("sell_date")].notna()].copy()
-sell_price_col = "Sell Price"
-
-if sell_price_col not in sold_df.columns:
+if not ledger.has_sell_price:
     st.warning("⚠️ 'Sell Price' column missing in portfolio. Cannot compute realized profit.")
 else:
-    sold_df["Investment"] = sold_df[col("buy_price")] * sold_df[col("buy_qty")]
-    sold_df["RealizedValue"] = sold_df[sell_price_col] * sold_df[col("buy_qty")]
-    sold_df["Profit"] = sold_df["RealizedValue"] - sold_df["Investment"]
-
     # ✅ Per-strategy summary
-    strategy_summary = sold_df.groupby("Strategy").agg({
-        "Investment": "sum",
-        "RealizedValue": "sum",
-        "Profit": "sum"
-    }).reset_index()
-    strategy_summary["Profit %"] = (strategy_summary["Profit"] / strategy_summary["Investment"]) * 100
-
-    # Format for display
-    strategy_summary_display = strategy_summary.copy()
+    strategy_summary_display = ledger.strategy_summary.copy()
     strategy_summary_display["Investment"] = strategy_summary_display["Investment"].apply(lambda x: f"₹{x:,.2f}")
     strategy_summary_display["RealizedValue"] = strategy_summary_display["RealizedValue"].apply(lambda x: f"₹{x:,.2f}")
     strategy_summary_display["Profit"] = strategy_summary_display["Profit"].apply(lambda x: f"₹{x:,.2f}")
@@ -57,18 +40,7 @@ else:
     st.table(strategy_summary_display)
 
     # ✅ Overall totals
-    total_investment = sold_df["Investment"].sum()
-    total_realized = sold_df["RealizedValue"].sum()
-    total_profit = total_realized - total_investment
-    profit_pct = (total_profit / total_investment * 100) if total_investment > 0 else 0
-
-    surcharge_df = runner.portfolio_mgr.load_surcharges()
-    total_surcharge = surcharge_df["Charges"].sum() if "Charges" in surcharge_df.columns else 0
-
-    net_profit = total_profit - total_surcharge
-    net_profit_pct = (net_profit / total_investment * 100) if total_investment > 0 else 0
-
-    total_investment_all = active_df[col("buy_price")].mul(active_df[col("buy_qty")], fill_value=0).sum()
+    totals = ledger.totals
 
     summary_df = pd.DataFrame({
         "Metric": [
@@ -82,14 +54,14 @@ else:
             "Net Profit %"
         ],
         "Value": [
-            f"₹{total_investment_all:,.2f}",
-            f"₹{total_investment:,.2f}",
-            f"₹{total_realized:,.2f}",
-            f"₹{total_profit:,.2f}",
-            f"{profit_pct:.2f}%",
-            f"₹{total_surcharge:,.2f}",
-            f"₹{net_profit:,.2f}",
-            f"{net_profit_pct:.2f}%"
+            f"₹{totals['open_investment']:,.2f}",
+            f"₹{totals['investment']:,.2f}",
+            f"₹{totals['realized']:,.2f}",
+            f"₹{totals['profit']:,.2f}",
+            f"{totals['profit_pct']:.2f}%",
+            f"₹{totals['surcharges']:,.2f}",
+            f"₹{totals['net_profit']:,.2f}",
+            f"{totals['net_profit_pct']:.2f}%"
         ]
     })
 
@@ -101,23 +73,12 @@ with st.expander("🧪 FD Return vs Realized Value (Sold Only)"):
     st.caption("Validation table for sold entries comparing FD return vs actual realized value.")
 
     # 🔧 Adjustable FD rate
-    fd_rate_sold = st.slider("FD Interest Rate (%)", min_value=5.0, max_value=12.0, value=8.0, step=0.5, key="fd_rate_sold")
-
-    # ✅ Filter sold entries
-    sold_df = portfolio_df[portfolio_df[col("sell_date")].notna()].copy()
-    sell_price_col = "Sell Price"
+    fd_rate_sold = st.slider("FD Interest Rate (%)", min_value=float(FD_RATES[0]), max_value=float(FD_RATES[-1]), value=8.0, step=0.5, key="fd_rate_sold")
+    fd_method_sold = st.radio("FD Interest", list(FD_METHODS), format_func=FD_METHODS.get, horizontal=True, key="fd_method_sold")
 
-    # ✅ Convert dates
-    sold_df[col("buy_date")] = pd.to_datetime(sold_df[col("buy_date")], errors="coerce")
-    sold_df[col("sell_date")] = pd.to_datetime(sold_df[col("sell_date")], errors="coerce")
-    sold_df = sold_df[sold_df[col("buy_date")].notna() & sold_df[col("sell_date")].notna()]
-
-    # ✅ Core calculations
-    sold_df["Investment"] = sold_df[col("buy_price")] * sold_df[col("buy_qty")]
-    sold_df["RealizedValue"] = sold_df[sell_price_col] * sold_df[col("buy_qty")]
-    sold_df["Days Held"] = (sold_df[col("sell_date")] - sold_df[col("buy_date")]).dt.days.clip(lower=1)
-    sold_df["FD Return"] = sold_df["Investment"] * (1 + (fd_rate_sold / 100) * sold_df["Days Held"] / 365)
-    sold_df["Underperforming FD"] = sold_df["RealizedValue"] < sold_df["FD Return"]
+    # ✅ Dated sold entries vs FD (shared ledger, precomputed for every slider rate)
+    sold_df = ledger.fd_comparison(fd_rate_sold, fd_method_sold)
+    sell_price_col = SELL_PRICE
 
     # ✅ Display validation table
     st.dataframe(
@@ -134,4 +95,8 @@ with st.expander("🧪 FD Return vs Realized Value (Sold Only)"):
             "Days Held": "{:.0f}"
         }),
         width="stretch"
-    )
\ No newline at end of file
+    )
+
+# ⏱️ Render timing
+render.end()
+timing_panel()
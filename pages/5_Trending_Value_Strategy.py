@@ -1,7 +1,9 @@
 import streamlit as st
 import pandas as pd
 from config import STRATEGY_CONFIG
+from core.precompute import load_results
 from core.runner import StrategyRunner
+from core.telemetry import page_span, timing_panel
 
 # 🔒 Auth check
 if "authentication_status" not in st.session_state or not st.session_state["authentication_status"]:
@@ -10,15 +12,21 @@ if "authentication_status" not in st.session_state or not st.session_state["auth
 
 # 🧭 Page setup
 st.set_page_config(page_title="Trending Value Strategy", layout="wide")
+render = page_span(__file__)
 st.title("📈 Trending Value Strategy Analysis")
 
-# 🚀 Run strategy
-runner = StrategyRunner("TrendingValue", STRATEGY_CONFIG["TrendingValue"])
-runner.run()
-analysis_df = runner.analyzer.analysis_df
+# 📦 Precomputed after the close, else 🚀 run the strategy
+snapshot = load_results(STRATEGY_CONFIG)
+if snapshot is not None:
+    analysis_df = snapshot.analysis["TrendingValue"]
+    summary_df = snapshot.summaries["TrendingValue"].copy()
+else:
+    runner = StrategyRunner("TrendingValue", STRATEGY_CONFIG["TrendingValue"])
+    runner.run()
+    analysis_df = runner.analyzer.analysis_df
+    summary_df = runner.analyzer.get_sheet_summary()
 
 # 📋 TrendingValueStocks Sheet Summary
-summary_df = runner.analyzer.get_sheet_summary()
 if not summary_df.empty:
     st.subheader("📋 TrendingValueStocks Buy Table")
 
@@ -39,4 +47,8 @@ if not summary_df.empty:
 # 🔙 Navigation
 with st.container():
     st.markdown("---")
-    st.page_link("main.py", label="⬅️ Back to Home", icon="🏠")
\ No newline at end of file
+    st.page_link("main.py", label="⬅️ Back to Home", icon="🏠")
+
+# ⏱️ Render timing
+render.end()
+timing_panel()
@@ -1,7 +1,9 @@
 import streamlit as st
 import pandas as pd
 from config import STRATEGY_CONFIG
+from core.precompute import load_results
 from core.runner import StrategyRunner
+from core.telemetry import page_span, timing_panel
 
 # 🔒 Auth check
 if "authentication_status" not in st.session_state or not st.session_state["authentication_status"]:
@@ -10,15 +12,21 @@ if "authentication_status" not in st.session_state or not st.session_state["auth
 
 # 🧭 Page setup
 st.set_page_config(page_title="GARP Strategy", layout="wide")
+render = page_span(__file__)
 st.title("📊 GARP Strategy Analysis")
 
-# 🚀 Run strategy
-runner = StrategyRunner("GARP", STRATEGY_CONFIG["GARP"])
-runner.run()
-analysis_df = runner.analyzer.analysis_df
+# 📦 Precomputed after the close, else 🚀 run the strategy
+snapshot = load_results(STRATEGY_CONFIG)
+if snapshot is not None:
+    analysis_df = snapshot.analysis["GARP"]
+    summary_df = snapshot.summaries["GARP"].copy()
+else:
+    runner = StrategyRunner("GARP", STRATEGY_CONFIG["GARP"])
+    runner.run()
+    analysis_df = runner.analyzer.analysis_df
+    summary_df = runner.analyzer.get_sheet_summary()
 
 # 📊 Display results
-summary_df = runner.analyzer.get_sheet_summary()
 if summary_df.empty:
     st.info("No analysis data available.")
 else:
@@ -37,4 +45,8 @@ else:
 # 🔙 Navigation
 with st.container():
     st.markdown("---")
-    st.page_link("main.py", label="⬅️ Back to Home", icon="🏠")
\ No newline at end of file
+    st.page_link("main.py", label="⬅️ Back to Home", icon="🏠")
+
+# ⏱️ Render timing
+render.end()
+timing_panel()
@@ -1,14 +1,17 @@
-import json
 import pandas as pd
-import yfinance as yf
 import streamlit as st
-from supabase import create_client
+from core.clients import get_supabase_client
 from core.fetcher import DataFetcher
-from core.runner import StrategyRunner
+from core.precompute import load_results
+from core.runner import StrategyRunner, latest_ohlc_date
 from config import STRATEGY_CONFIG
-from datetime import datetime, timedelta
 import plotly.graph_objects as go
-from core.analyzers import filter_trading_days, Nifty200RSIAnalyzer
+from core.analyzers import fetch_ohlc_window, Nifty200RSIAnalyzer
+from core.indicators import compute_rsi_wilder
+from core.ingest import OHLCIngestor
+from core.signal_state import get_signal_store
+from core.trading_calendar import get_trading_calendar
+from core.telemetry import page_span, timing_panel
 
 
 
@@ -18,6 +21,7 @@ if "authentication_status" not in st.session_state or not st.session_state["auth
     st.stop()
 
 st.set_page_config(page_title="Nifty200 RSI Strategy", layout="wide")
+render = page_span(__file__)
 st.title("📈 Nifty200 RSI Strategy Analysis")
 
 
@@ -25,15 +29,13 @@ st.title("📈 Nifty200 RSI Strategy Analysis")
 # OHLC Pruning
 # -------------------------------
 def prune_ohlc_data():
-    url = st.secrets["supabase"]["url"]
-    key = st.secrets["supabase"]["key"]
-    supabase = create_client(url, key)
+    supabase = get_supabase_client()
 
-    cutoff_date = (datetime.today() - timedelta(days=730)).date().isoformat()
+    # ~2 years of NSE sessions
+    cutoff_date = get_trading_calendar().window_start(500).isoformat()
     supabase.table("ohlc_data").delete().lt("trade_date", cutoff_date).execute()
 
-    creds_dict = json.loads(st.secrets["GOOGLE_CREDS_JSON"])
-    fetcher = DataFetcher("DMA_Data", creds_dict)
+    fetcher = DataFetcher("DMA_Data")
     tickers_df = fetcher.fetch("Nifty_200")
 
     if tickers_df.empty or "Ticker" not in tickers_df.columns:
@@ -53,152 +55,50 @@ def prune_ohlc_data():
     supabase.table("ohlc_data").delete().not_.in_("ticker", normalized).execute()
     st.success(f"✅ Pruned OHLC data: kept last 2 years and only {len(normalized)} Nifty_200 tickers")
 
-# -------------------------------
-# OHLC Fetch + Normalize
-# -------------------------------
-def fetch_ohlc_normalized(ticker: str, days: int = 180):
-    df = yf.download(
-        ticker,
-        period=f"{days}d",
-        interval="1d",
-        auto_adjust=False,
-        group_by="column",
-        progress=False
-    )
-    if df is None or df.empty:
-        return None
-
-    if isinstance(df.columns, pd.MultiIndex):
-        try:
-            df = df.xs(ticker, axis=1, level=0)
-        except Exception:
-            pass
-        df.columns = ["_".join([str(x) for x in c if x is not None]) for c in df.columns]
-    else:
-        df.columns = [str(c) for c in df.columns]
-
-    df = df.reset_index()
-    date_col = next((c for c in ["Date","Datetime","date","datetime"] if c in df.columns), df.columns[0])
-    df.columns = [c.lower() for c in df.columns]
-    date_col = date_col.lower()
-    df["trade_date"] = pd.to_datetime(df[date_col]).dt.strftime("%Y-%m-%d")
-
-    required_fields = {}
-    for field in ["open","high","low","close","volume"]:
-        if field in df.columns:
-            required_fields[field] = df[field]
-        else:
-            candidates = [c for c in df.columns if c.endswith(f"_{field}") or c.startswith(f"{field}_")]
-            required_fields[field] = df[candidates[0]] if candidates else None
-
-    df = df.where(pd.notnull(df), None)
-    payload = pd.DataFrame({
-        "ticker": ticker,
-        "trade_date": df["trade_date"],
-        "open": required_fields["open"],
-        "high": required_fields["high"],
-        "low": required_fields["low"],
-        "close": required_fields["close"],
-        "volume": required_fields["volume"],
-    })
-    payload = payload[payload["trade_date"].notnull()]
-    return payload
-
 # -------------------------------
 # Supabase Loader
 # -------------------------------
-def load_ohlc_to_supabase(tickers, days=180):
-    url = st.secrets["supabase"]["url"]
-    key = st.secrets["supabase"]["key"]
-    supabase = create_client(url, key)
+def load_ohlc_to_supabase(tickers, sessions=120):
+    supabase = get_supabase_client()
 
     progress = st.progress(0)
     status = st.empty()
-    success_count, fail_count = 0, 0
-    total = len(tickers)
 
-    for i, t in enumerate(tickers, start=1):
-        symbol = t.strip().upper()
-        if symbol.startswith("NSE:"):
-            symbol = symbol.split("NSE:")[1] + ".NS"
-        else:
-            symbol = symbol + ".NS"
+    def report(done, total, message):
+        status.text(f"{message} ({done}/{total})…")
+        progress.progress(done / total if total else 1.0)
 
-        status.text(f"Processing {symbol} ({i}/{total})…")
-        try:
-            payload = fetch_ohlc_normalized(symbol, days=days)
-            if payload is None or payload.empty:
-                st.warning(f"No OHLC data for {symbol}")
-                fail_count += 1
-                continue
-
-            rows = payload.to_dict(orient="records")
-            if not rows:
-                st.warning(f"No valid rows after normalization for {symbol}")
-                fail_count += 1
-                continue
-
-            # 1. Get existing trade_date values for this ticker
-            existing = (
-                supabase.table("ohlc_data")
-                .select("trade_date")
-                .eq("ticker", symbol)
-                .execute()
-            )
-
-            existing_dates = {row["trade_date"] for row in getattr(existing, "data", [])}
-
-            # 2. Filter out rows that already exist
-            new_rows = [r for r in rows if r["trade_date"] not in existing_dates]
-
-            # 3. Insert only new rows
-            if new_rows:
-                resp = supabase.table("ohlc_data").insert(new_rows).execute()
-                st.write(f"{symbol} → inserted {len(new_rows)} new rows; error:", getattr(resp, "error", None))
-            else:
-                st.write(f"{symbol} → no new rows to insert")
-            success_count += 1
-
-        except Exception as e:
-            st.error(f"Error loading {symbol}: {e}")
-            fail_count += 1
-
-        progress.progress(i / total)
+    start = get_trading_calendar().window_start(sessions)
+    summary = OHLCIngestor(supabase, progress=report).run(tickers, start=start)
+    # new bars mean a new data version for the cached strategy results
+    latest_ohlc_date.clear()
 
     status.empty()
     progress.empty()
-    st.success(f"✅ Completed OHLC load. Success: {success_count}, Failed: {fail_count}, Total: {total}")
+    if summary["failed"]:
+        st.warning(f"⚠️ Failed tickers: {', '.join(summary['failed'])}")
+    st.success(
+        f"✅ Completed OHLC load. Rows upserted: {summary['rows']}, "
+        f"Already up to date: {summary['up_to_date'] + summary['skipped']}, "
+        f"Failed: {len(summary['failed'])}, Total: {summary['tickers']}"
+    )
 
 
 
-def plot_ticker_chart(ticker: str, days: int = 180):
-    url = st.secrets["supabase"]["url"]
-    key = st.secrets["supabase"]["key"]
-    supabase = create_client(url, key)
+def plot_ticker_chart(ticker: str, sessions: int = 120):
+    supabase = get_supabase_client()
 
-    cutoff = (datetime.today() - timedelta(days=days)).date().isoformat()
-    resp = (
-        supabase.table("ohlc_data")
-        .select("*")
-        .eq("ticker", ticker)
-        .gte("trade_date", cutoff)
-        .order("trade_date")
-        .execute()
-    )
-    data = getattr(resp, "data", [])
-    if not data:
+    # 📦 Served from the local OHLC store; only bars newer than the last stored one hit Supabase
+    df = fetch_ohlc_window(supabase, [ticker], sessions=sessions)
+    if df.empty:
         st.warning(f"No OHLC data found for {ticker}")
         return
 
-    df = pd.DataFrame(data)
-    df["trade_date"] = pd.to_datetime(df["trade_date"])
-    df["close"] = pd.to_numeric(df["close"], errors="coerce")
-
-    # 🔎 Filter trading days
-    df = filter_trading_days(df)
+    # 🔎 Only NSE sessions
+    df = get_trading_calendar().filter(df)
 
     analyzer = Nifty200RSIAnalyzer()
-    df["rsi"] = analyzer.compute_rsi_wilder(df["close"], period=14)
+    df["rsi"] = compute_rsi_wilder(df["close"], period=14)
     buy_points = analyzer.identify_buy_signals(df)
 
 
@@ -244,8 +144,7 @@ def plot_ticker_chart(ticker: str, days: int = 180):
 # Buttons
 # -------------------------------
 if st.button("📥 Load OHLC Data"):
-    creds_dict = json.loads(st.secrets["GOOGLE_CREDS_JSON"])
-    fetcher = DataFetcher("DMA_Data", creds_dict)
+    fetcher = DataFetcher("DMA_Data")
     tickers_df = fetcher.fetch("Nifty_200")
 
     if tickers_df.empty or "Ticker" not in tickers_df.columns:
@@ -253,7 +152,7 @@ if st.button("📥 Load OHLC Data"):
         st.stop()
 
     tickers = tickers_df["Ticker"].dropna().tolist()
-    load_ohlc_to_supabase(tickers, days=180)
+    load_ohlc_to_supabase(tickers, sessions=120)
 
 if st.button("▶️ Run Strategy"):
     runner = StrategyRunner("Nifty200_RSI", STRATEGY_CONFIG["Nifty200_RSI"])
@@ -263,21 +162,8 @@ if st.button("▶️ Run Strategy"):
     if not summary_df.empty:
         st.subheader("📋 Nifty200 RSI Summary")
         summary_df["RSI"] = pd.to_numeric(summary_df["RSI"], errors="coerce")
-        
-        # Add PEG ratio column
-        pegs = []
-        for t in summary_df["Ticker"]:
-            # Normalize ticker to Yahoo format
-            symbol = t.strip().upper()
-            if symbol.startswith("NSE:"):
-                symbol = symbol.split("NSE:")[1] + ".NS"
-            elif not symbol.endswith(".NS"):
-                symbol = symbol + ".NS"
-
-            analyzer = runner.analyzer
-            pegs.append(analyzer.fetch_peg_ratio(symbol))
-
-        summary_df["PEG"] = pegs
+        # PEG already comes from the shared PEG cache filled during analyze_buy
+        summary_df["PEG"] = pd.to_numeric(summary_df["PEG"], errors="coerce")
 
         st.dataframe(
             summary_df[["Ticker", "RSI", "PEG", "Signal", "Status", "Last date"]]
@@ -296,9 +182,14 @@ if st.button("🧹 Prune OHLC Data"):
 st.markdown("---")
 st.subheader("📊 Chart Active Tickers")
 
-runner = StrategyRunner("Nifty200_RSI", STRATEGY_CONFIG["Nifty200_RSI"])
-runner.run()
-summary_df = runner.analyzer.get_sheet_summary()
+# 📦 Active tickers of the precomputed run, else of a live one
+snapshot = load_results(STRATEGY_CONFIG)
+if snapshot is not None:
+    summary_df = snapshot.summaries["Nifty200_RSI"]
+else:
+    runner = StrategyRunner("Nifty200_RSI", STRATEGY_CONFIG["Nifty200_RSI"])
+    runner.run()
+    summary_df = runner.analyzer.get_sheet_summary()
 
 active_tickers = summary_df[summary_df["Status"] == "Active"]["Ticker"].dropna().tolist()
 
@@ -312,7 +203,7 @@ if active_tickers:
         elif not symbol.endswith(".NS"):
             symbol = symbol + ".NS"
 
-        plot_ticker_chart(symbol, days=180)
+        plot_ticker_chart(symbol, sessions=120)
 else:
     st.info("No Active tickers at the moment.")
 
@@ -320,4 +211,18 @@ else:
 
 with st.container():
     st.markdown("---")
-    st.page_link("main.py", label="⬅️ Back to Home", icon="🏠")
\ No newline at end of file
+    st.page_link("main.py", label="⬅️ Back to Home", icon="🏠")
+
+# -------------------------------
+# Signal History
+# -------------------------------
+with st.expander("📜 Signal history"):
+    history = get_signal_store().transitions(strategy="Nifty200_RSI", limit=200)
+    if history.empty:
+        st.info("No signal changes recorded yet.")
+    else:
+        st.dataframe(history.drop(columns=["strategy"]), width="stretch")
+
+# ⏱️ Render timing
+render.end()
+timing_panel()
@@ -0,0 +1,77 @@
+"""
+Shared fixtures: every test runs offline, on tmp-dir stores and in-process
+stand-ins for Supabase (core.ohlc_reader.LocalPostgREST), with telemetry files off.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import core.telemetry
+from core.ohlc_reader import LocalPostgREST
+from core.ohlc_store import OHLC_COLUMNS, OHLCStore
+from core.signal_state import SignalStateStore
+from core.trading_calendar import get_trading_calendar
+
+
+class UpsertPostgREST(LocalPostgREST):
+    """LocalPostgREST that also takes table().upsert(rows, on_conflict=...).execute(), as the ingestor sends."""
+
+    def __init__(self, tables: dict = None, **kwargs):
+        super().__init__(tables or {"ohlc_data": pd.DataFrame(columns=OHLC_COLUMNS)}, **kwargs)
+        self.upserted = []
+
+    def table(self, name: str):
+        query = super().table(name)
+        query.upsert = lambda rows, on_conflict: _Upsert(self, name, rows, on_conflict.split(","))
+        return query
+
+
+class _Upsert:
+    def __init__(self, server: UpsertPostgREST, name: str, rows: list, keys: list):
+        self._server, self._name, self._rows, self._keys = server, name, rows, keys
+
+    def execute(self):
+        server = self._server
+        with server._lock:
+            server.upserted.extend(self._rows)
+            merged = pd.concat([server.tables[self._name], pd.DataFrame(self._rows)], ignore_index=True)
+            server.tables[self._name] = merged.drop_duplicates(self._keys, keep="last").reset_index(drop=True)
+            server._results.clear()
+
+
+def make_ohlc(tickers, sessions: int = 80, end=None, seed: int = 0) -> pd.DataFrame:
+    """Random-walk daily bars of ``tickers`` on the last ``sessions`` NSE sessions up to ``end``."""
+    calendar = get_trading_calendar()
+    end = end or calendar.last_session(pd.Timestamp.today().date())
+    dates = calendar.sessions(calendar.window_start(sessions, end), end)
+    rng = np.random.default_rng(seed)
+    frames = []
+    for ticker in tickers:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+        frames.append(pd.DataFrame({
+            "ticker": ticker,
+            "trade_date": pd.to_datetime(dates).strftime("%Y-%m-%d"),
+            "open": close * (1 + rng.normal(0, 0.005, len(dates))),
+            "high": close * 1.01,
+            "low": close * 0.99,
+            "close": close,
+            "volume": rng.integers(100_000, 900_000, len(dates)).astype(float),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.fixture(autouse=True)
+def quiet_telemetry(monkeypatch):
+    monkeypatch.setattr(core.telemetry, "_default_telemetry", core.telemetry.Telemetry(log_path=None, prom_path=None))
+    # no span left open by an earlier test (an abandoned page render) parents this test's spans
+    core.telemetry._current.set(None)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return OHLCStore(str(tmp_path / "ohlc"))
+
+
+@pytest.fixture
+def signals(tmp_path):
+    return SignalStateStore(str(tmp_path / "signal_state.sqlite"))
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_ohlc
+from core.backtest import pad_ohlc, run_backtest, simulate_exits, trade_log, trade_stats
+
+NAN = np.nan
+
+
+def test_simulate_exits_takes_profit_and_reenters():
+    close = np.array([
+        [100, 105, 113, 90, 95, 107],     # exit at 113 (>= 112), re-enter at 90, exit at 107 (>= 100.8)
+        [100, 100, 101, 102, 103, 104],   # entered on bar 1, never reaches 112
+        [100, 112, 120, NAN, NAN, NAN],   # an entry signal on a padded bar is ignored
+    ], dtype=float)
+    entries = np.array([
+        [1, 1, 1, 1, 0, 0],               # signals while in a position, or on the exit bar, are ignored
+        [0, 1, 1, 0, 0, 0],
+        [0, 0, 0, 1, 0, 0],
+    ], dtype=bool)
+    lengths = np.array([6, 6, 3])
+
+    trades = sorted(zip(*(a.tolist() for a in simulate_exits(entries, close, lengths, sell_threshold_pct=12))))
+    assert trades == [(0, 0, 2), (0, 3, 5), (1, 1, -1)]
+
+
+def test_trade_log_marks_open_trades_to_the_last_close():
+    close = np.array([[100, 113, 90, 95], [50, 51, 52, NAN]], dtype=float)
+    dates = np.arange("2024-01-01", "2024-01-05", dtype="datetime64[D]")
+    arrays = {"close": close, "dates": np.tile(dates, (2, 1)), "lengths": np.array([4, 3]),
+              "tickers": np.array(["AAA.NS", "BBB.NS"], dtype=object)}
+    log = trade_log("Nifty200_RSI", arrays, np.array([0, 0, 1]), np.array([0, 2, 0]), np.array([1, -1, -1]))
+
+    assert list(log["Status"]) == ["Closed", "Open", "Open"]
+    assert list(log["Exit Price"]) == [113, 95, 52]
+    assert log["Exit Date"].isna().tolist() == [False, True, True]
+    assert list(log["Holding Days"]) == [1, 1, 2]
+    np.testing.assert_allclose(log["Return %"], [13, 95 / 90 * 100 - 100, 4])
+
+
+def test_trade_stats():
+    trades = pd.DataFrame({
+        "Strategy": "EarningsGap",
+        "Entry Date": pd.to_datetime(["2020-01-01", "2020-02-01", "2020-06-01"]),
+        "Holding Days": [100, 50, 30],
+        "Return %": [12.0, 12.0, -6.0],
+        "Status": ["Closed", "Closed", "Open"],
+    })
+    [stats] = trade_stats(trades, "2020-01-01", "2021-01-01").to_dict("records")
+
+    assert (stats["Trades"], stats["Closed"], stats["Open"]) == (3, 2, 1)
+    assert stats["Hit Rate %"] == pytest.approx(200 / 3)
+    assert stats["Avg Holding Days"] == 75
+    # both January/February trades are open at once before either exits
+    assert stats["Peak Open Trades"] == 2
+    assert stats["CAGR %"] == pytest.approx(((1 + 0.18 / 2) ** (365.25 / 366) - 1) * 100)
+
+
+def test_sharded_run_matches_in_process():
+    ohlc = make_ohlc([f"T{i:02d}.NS" for i in range(8)], sessions=250, seed=3)
+    serial, serial_stats = run_backtest(ohlc, workers=1)
+    sharded, sharded_stats = run_backtest(ohlc, workers=2, shards=3)
+
+    assert len(serial) and set(serial["Strategy"]) >= {"Nifty200_RSI"}
+    # shards without trades come back as object columns
+    pd.testing.assert_frame_equal(serial, sharded, check_dtype=False)
+    pd.testing.assert_frame_equal(serial_stats, sharded_stats)
+
+
+def test_pad_ohlc_from_a_frame_is_left_aligned():
+    ohlc = make_ohlc(["AAA.NS", "BBB.NS"], sessions=5)
+    ohlc = ohlc.drop(index=[5, 6]).sample(frac=1, random_state=0)
+    arrays = pad_ohlc(ohlc, columns=("close",))
+
+    assert list(arrays["tickers"]) == ["AAA.NS", "BBB.NS"] and list(arrays["lengths"]) == [5, 3]
+    assert np.isnan(arrays["close"][1, 3:]).all()
+    assert (np.diff(arrays["dates"][0]) > np.timedelta64(0)).all()
+
+
+def _gappy(tickers, bars=80):
+    """A steady climb that gaps up 3% on heavy volume every tenth bar."""
+    dates = pd.bdate_range("2024-01-01", periods=bars)
+    frames = []
+    for ticker in tickers:
+        close = 100 * 1.004 ** np.arange(bars)
+        gap = np.arange(bars) % 10 == 9
+        open_ = np.where(gap, np.r_[close[0], close[:-1]] * 1.03, close * 0.999)
+        frames.append(pd.DataFrame({
+            "ticker": ticker, "trade_date": dates, "open": open_, "high": np.maximum(open_, close) * 1.01,
+            "low": np.minimum(open_, close) * 0.99, "close": np.maximum(close, open_ * 1.001),
+            "volume": np.where(gap, 2_000_000.0, 1_000_000.0),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_earnings_gap_applies_the_peg_ceiling():
+    ohlc = _gappy(["AAA.NS", "BBB.NS", "CCC.NS"])
+    trades, _ = run_backtest(ohlc, strategies=["EarningsGap"], workers=1)
+    assert set(trades["Ticker"]) == {"AAA.NS", "BBB.NS", "CCC.NS"}
+
+    # as live: above max_peg, or no PEG at all, never enters
+    trades, _ = run_backtest(ohlc, strategies=["EarningsGap"], workers=1, peg={"AAA.NS": 1.2, "BBB.NS": 9.0})
+    assert set(trades["Ticker"]) == {"AAA.NS"}
+
+
+def test_cli_backtests_with_the_peg_cache(monkeypatch, capsys):
+    import core.analyzers
+    import core.backtest
+    import core.clients
+    import core.fundamentals
+    from core.fundamentals import PEGCache, StaticPEGSource
+
+    ohlc = _gappy(["AAA.NS", "BBB.NS"])
+    pegs = PEGCache(StaticPEGSource({"AAA.NS": 1.2, "BBB.NS": 9.0}), path=None)
+    monkeypatch.setattr(core.analyzers, "fetch_ohlc_window", lambda client, tickers, sessions: ohlc)
+    monkeypatch.setattr(core.clients, "get_supabase_client", lambda: None)
+    monkeypatch.setattr(core.fundamentals, "get_peg_cache", lambda: pegs)
+    written = []
+    monkeypatch.setattr(pd.DataFrame, "to_csv", lambda self, path, index: written.append(self))
+
+    core.backtest.main(["AAA.NS", "BBB.NS", "--workers", "1", "--trades", "trades.csv"])
+    [trades] = written
+    assert set(trades.loc[trades["Strategy"] == "EarningsGap", "Ticker"]) == {"AAA.NS"}
+    assert "EarningsGap" in capsys.readouterr().out
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.fd_benchmark import FD_METHODS, FD_RATES, FDGrid, fd_growth, group_xirr
+
+
+@pytest.fixture
+def lots():
+    rng = np.random.default_rng(4)
+    n = 40
+    buy = np.datetime64("2022-01-03") + rng.integers(0, 500, n).astype("timedelta64[D]")
+    sell = buy + rng.integers(0, 400, n).astype("timedelta64[D]")
+    invested = rng.uniform(5_000, 50_000, n)
+    realized = invested * rng.uniform(0.8, 1.6, n)
+    realized[[3, 17]] = np.nan
+    tickers = rng.choice(["AAA.NS", "BBB.NS", "CCC.NS", "DDD.NS"], n).astype(object)
+    tickers[5] = None
+    return pd.DataFrame({"Ticker": tickers, "Buy Date": buy, "Sell Date": sell,
+                         "Investment": invested, "Realized": realized})
+
+
+def _grid(lots):
+    return FDGrid(lots["Ticker"].to_numpy(), lots["Buy Date"].to_numpy(), lots["Sell Date"].to_numpy(),
+                  lots["Investment"].to_numpy(), lots["Realized"].to_numpy())
+
+
+def test_fd_growth():
+    days = np.array([365, 730])
+    np.testing.assert_allclose(fd_growth(days, [10], "simple")[:, 0], [1.1, 1.2])
+    np.testing.assert_allclose(fd_growth(days, [10], "compound")[:, 0], [1.025 ** 4, 1.025 ** 8])
+    np.testing.assert_allclose(fd_growth(days, [10], "xirr")[:, 0], [1.1, 1.21])
+    with pytest.raises(ValueError):
+        fd_growth(days, [10], "monthly")
+
+
+def test_group_xirr():
+    code = np.array([0, 1, 1, 2])
+    buy = np.array([0.0, 0.0, 1.0, 0.0])
+    sell = np.array([2.0, 1.0, 2.0, 1.0])
+    invested = np.array([100.0, 100.0, 100.0, 100.0])
+    realized = np.array([121.0, 105.0, 115.0, 0.0])
+    rates = group_xirr(code, 3, buy, sell, invested, realized)
+
+    assert rates[0] == pytest.approx(0.10, abs=1e-9)
+    # the two-lot group's NPV is zero at its rate
+    r = rates[1]
+    npv = sum(realized[i] * (1 + r) ** -sell[i] - invested[i] * (1 + r) ** -buy[i] for i in (1, 2))
+    assert npv == pytest.approx(0, abs=1e-6)
+    # nothing came back: no rate solves it
+    assert np.isnan(rates[2])
+
+
+def test_per_ticker_sums_match_groupby(lots):
+    grid = _grid(lots)
+    days = np.clip((lots["Sell Date"] - lots["Buy Date"]).dt.days, 1, None)
+    by_ticker = lots.assign(Days=days).groupby("Ticker")
+
+    assert list(grid.tickers) == list(by_ticker.groups)
+    np.testing.assert_allclose(grid.ticker_invested, by_ticker["Investment"].sum())
+    np.testing.assert_allclose(grid.ticker_realized, by_ticker["Realized"].sum())
+    for rate in (FD_RATES[0], 7.5, 7.3):
+        simple = lots["Investment"] * (1 + rate / 100 * days / 365)
+        np.testing.assert_allclose(grid.lot_return(rate), simple)
+        np.testing.assert_allclose(grid.ticker_return(rate), simple.groupby(lots["Ticker"]).sum())
+    for method in FD_METHODS:
+        assert grid.ticker_fd[method].shape == (len(grid.tickers), len(FD_RATES))
+
+
+def test_lot_and_ticker_xirr(lots):
+    grid = _grid(lots)
+    days = np.clip((lots["Sell Date"] - lots["Buy Date"]).dt.days.to_numpy(), 1, None)
+    np.testing.assert_allclose(grid.lot_xirr, (lots["Realized"] / lots["Investment"]) ** (365 / days) - 1)
+    # a lot beats an FD at r exactly when its XIRR is above r
+    j = grid.rate_index(8.0)
+    beats = lots["Realized"].to_numpy() > grid.lot_fd["xirr"][:, j]
+    np.testing.assert_array_equal(beats, grid.lot_xirr > 0.08)
+    assert grid.rate_index(8.1) is None
+    assert grid.ticker_xirr.shape == (len(grid.tickers),)
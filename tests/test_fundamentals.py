@@ -0,0 +1,84 @@
+import json
+from datetime import datetime, timedelta
+
+from core.fundamentals import PEGCache, StaticPEGSource
+
+
+class FlakySource(StaticPEGSource):
+    def fetch_peg(self, ticker):
+        if ticker == "ERR.NS":
+            self.calls += 1
+            raise ConnectionError("yfinance down")
+        return super().fetch_peg(ticker)
+
+
+def _age(cache, ticker, days):
+    """Backdate a cached entry, in memory and on disk."""
+    entry = cache._entries[ticker]
+    entry["fetched_at"] = (datetime.fromisoformat(entry["fetched_at"]) - timedelta(days=days)).isoformat()
+    cache._write(merge=False)
+
+
+def test_fresh_entries_are_not_fetched_again(tmp_path):
+    source = StaticPEGSource({"AAA.NS": 1.2, "BBB.NS": 0.8})
+    cache = PEGCache(source, path=str(tmp_path / "peg.json"))
+    assert cache.get_many(["AAA.NS", "BBB.NS", "NOP.NS"]) == {"AAA.NS": 1.2, "BBB.NS": 0.8, "NOP.NS": None}
+    assert cache.get_many(["AAA.NS", "BBB.NS", "NOP.NS"])["AAA.NS"] == 1.2
+    assert source.calls == 3
+    # and after a restart, from the file
+    restarted = PEGCache(source, path=str(tmp_path / "peg.json"))
+    restarted.get_many(["AAA.NS", "NOP.NS"])
+    assert source.calls == 3 and restarted.stats()["hits"] == 2
+
+
+def test_ttl_and_missing_ttl(tmp_path):
+    source = StaticPEGSource({"AAA.NS": 1.2})
+    cache = PEGCache(source, path=str(tmp_path / "peg.json"), ttl_days=90, missing_ttl_days=1)
+    cache.get_many(["AAA.NS", "NOP.NS"])
+
+    # a day and a bit later only the ticker without a PEG is retried
+    _age(cache, "AAA.NS", 1.5)
+    _age(cache, "NOP.NS", 1.5)
+    cache.get_many(["AAA.NS", "NOP.NS"])
+    assert source.calls == 3
+
+    # past the TTL the PEG is looked up again
+    _age(cache, "AAA.NS", 90)
+    source.pegs["AAA.NS"] = 1.4
+    assert cache.get("AAA.NS") == 1.4 and source.calls == 4
+
+
+def test_failed_lookups_are_not_cached(tmp_path):
+    source = FlakySource({"AAA.NS": 1.2})
+    cache = PEGCache(source, path=str(tmp_path / "peg.json"))
+    assert cache.get_many(["ERR.NS", "AAA.NS"]) == {"ERR.NS": None, "AAA.NS": 1.2}
+    cache.get_many(["ERR.NS"])
+    assert source.calls == 3 and cache.stats()["errors"] == 2
+    assert "ERR.NS" not in cache.snapshot()
+
+
+def test_two_processes_keep_each_others_entries(tmp_path):
+    path = str(tmp_path / "peg.json")
+    app = PEGCache(StaticPEGSource({"AAA.NS": 1.2, "BBB.NS": 0.9}), path=path)
+    job = PEGCache(StaticPEGSource({"AAA.NS": 1.3, "BBB.NS": 0.8}), path=path)
+    app.get_many(["AAA.NS"])
+    job.get_many(["BBB.NS"])
+    with open(path) as f:
+        assert set(json.load(f)) == {"AAA.NS", "BBB.NS"}
+
+    # the app finds the job's fresh entry on disk instead of fetching it again
+    assert app.get("BBB.NS") == 0.8 and app.source.calls == 1
+    # the later fetch of a ticker wins, whichever process saves last
+    _age(job, "BBB.NS", 100)
+    job.source.pegs["BBB.NS"] = 0.7
+    job.get_many(["BBB.NS"])
+    app.get_many(["CCC.NS"])
+    assert PEGCache(StaticPEGSource({}), path=path).snapshot() == {"AAA.NS": 1.2, "BBB.NS": 0.7, "CCC.NS": None}
+
+
+def test_clear_empties_the_file(tmp_path):
+    path = str(tmp_path / "peg.json")
+    cache = PEGCache(StaticPEGSource({"AAA.NS": 1.2}), path=path)
+    cache.get("AAA.NS")
+    cache.clear()
+    assert PEGCache(StaticPEGSource({}), path=path).snapshot() == {}
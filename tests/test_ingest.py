@@ -0,0 +1,113 @@
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import UpsertPostgREST, make_ohlc
+from core.ingest import OHLCIngestor
+from core.sources import LocalSource, use_data_source
+
+TICKERS = ["AAA.NS", "BBB.NS", "CCC.NS"]
+
+
+class Market:
+    """yf.download stand-in: the bars of ``ohlc`` up to ``through``, from ``start`` on."""
+
+    def __init__(self, ohlc: pd.DataFrame):
+        self.ohlc = ohlc
+        self.through = ohlc["trade_date"].max()
+        self.calls = []
+        self.failing = set()
+
+    def __call__(self, symbols, start):
+        self.calls.append((tuple(symbols), start))
+        if self.failing & set(symbols):
+            raise ConnectionError("download failed")
+        rows = self.ohlc[self.ohlc["ticker"].isin(symbols) & (self.ohlc["trade_date"] >= start)
+                         & (self.ohlc["trade_date"] <= self.through)]
+        return rows.reset_index(drop=True)
+
+
+@pytest.fixture
+def market():
+    return Market(make_ohlc(TICKERS, sessions=30))
+
+
+@pytest.fixture
+def ingestor(store, tmp_path, market):
+    def build(**kwargs):
+        return OHLCIngestor(UpsertPostgREST(), store=store, checkpoint_path=str(tmp_path / "checkpoint.json"),
+                            download=market, **kwargs)
+    return build
+
+
+def _start(market):
+    return market.ohlc["trade_date"].min()
+
+
+def test_same_day_rerun_picks_up_the_new_session(ingestor, market, store):
+    dates = sorted(market.ohlc["trade_date"].unique())
+    ingest = ingestor()
+
+    # morning run: the last session has not landed yet
+    market.through = dates[-2]
+    summary = ingest.run(TICKERS, start=_start(market))
+    assert summary["rows"] == len(TICKERS) * (len(dates) - 1) and not summary["failed"]
+    assert not os.path.exists(ingest.checkpoint_path)
+
+    # the 16:00 run the same day
+    market.through = dates[-1]
+    market.calls.clear()
+    summary = ingest.run(TICKERS, start=_start(market))
+    assert summary["rows"] == len(TICKERS) and summary["skipped"] == 0
+    [(symbols, start)] = market.calls
+    assert symbols == tuple(TICKERS) and dates[-2] < start <= dates[-1]
+    assert store.last_dates(TICKERS) == {t: dates[-1] for t in TICKERS}
+    assert len(ingest.client.tables["ohlc_data"]) == len(market.ohlc)
+
+
+def test_rerun_without_new_bars_upserts_nothing(ingestor, market):
+    ingest = ingestor()
+    ingest.run(TICKERS, start=_start(market))
+    upserted = len(ingest.client.upserted)
+    market.calls.clear()
+
+    summary = ingest.run(TICKERS, start=_start(market))
+    assert summary["rows"] == 0 and not summary["failed"]
+    # only the days after the last stored session are asked for
+    last = market.ohlc["trade_date"].max()
+    assert all(start > last for _, start in market.calls)
+    assert len(ingest.client.upserted) == upserted
+    assert not os.path.exists(ingest.checkpoint_path)
+
+
+def test_failed_batch_is_resumed_from_the_checkpoint(ingestor, market):
+    ingest = ingestor(batch_size=1)
+    market.failing = {"BBB.NS"}
+    summary = ingest.run(TICKERS, start=_start(market))
+    assert summary["failed"] == ["BBB.NS"]
+    assert ingest._load_checkpoint() == {"AAA.NS", "CCC.NS"}
+
+    market.failing = set()
+    market.calls.clear()
+    summary = ingest.run(TICKERS, start=_start(market))
+    assert summary["skipped"] == 2 and not summary["failed"]
+    assert [symbols for symbols, _ in market.calls] == [("BBB.NS",)]
+    assert not os.path.exists(ingest.checkpoint_path)
+
+
+def test_volume_is_upserted_as_integers(ingestor, market):
+    ingest = ingestor()
+    ingest.run(TICKERS, start=_start(market))
+    volumes = [row["volume"] for row in ingest.client.upserted]
+    assert volumes and all(type(v) is int for v in volumes)
+
+
+def test_checkpoint_lives_with_the_data_source(store, tmp_path, market):
+    (tmp_path / "src").mkdir()
+    use_data_source(LocalSource(str(tmp_path / "src"), cache_dir=str(tmp_path / "cache")))
+    try:
+        ingest = OHLCIngestor(UpsertPostgREST(), store=store, download=market)
+    finally:
+        use_data_source(None)
+    assert ingest.checkpoint_path == str(tmp_path / "cache" / "ingest_checkpoint.json")
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from conftest import make_ohlc
+from core.backtest import pad_ohlc
+from core.ohlc_bars import MISSING_VOLUME, OHLCBars
+from core.ohlc_store import OHLC_SCHEMA
+
+TICKERS = ["CCC.NS", "AAA.NS", "BBB.NS"]
+
+
+@pytest.fixture
+def frame():
+    df = make_ohlc(TICKERS, sessions=40, seed=2)
+    df = df.drop(index=[3, 50]).sample(frac=1, random_state=0, ignore_index=True)
+    df.loc[5, "volume"] = np.nan
+    df.loc[7, "close"] = np.nan
+    df["trade_date"] = pd.to_datetime(df["trade_date"])
+    return df
+
+
+def _sorted(df):
+    return df.sort_values(["ticker", "trade_date"], ignore_index=True)
+
+
+def _as_frame(bars):
+    df = bars.to_frame()
+    df["ticker"] = df["ticker"].astype(str)
+    return df
+
+
+def test_from_frame_round_trips(frame):
+    bars = OHLCBars.from_frame(frame, dtype=np.float64)
+    assert list(bars.symbols) == sorted(TICKERS)
+    assert (np.diff(bars.code) >= 0).all() and len(bars) == len(frame)
+    expected = _sorted(frame)
+    got = _as_frame(bars)
+    pd.testing.assert_frame_equal(got, expected[got.columns], check_dtype=False)
+    assert (bars.volume == MISSING_VOLUME).sum() == 1
+
+
+def test_from_arrow_matches_from_frame(frame):
+    table = pa.Table.from_pandas(frame.assign(trade_date=frame["trade_date"].dt.date),
+                                 schema=OHLC_SCHEMA, preserve_index=False)
+    a, b = OHLCBars.from_arrow(table), OHLCBars.from_frame(frame)
+    pd.testing.assert_frame_equal(_as_frame(a), _as_frame(b))
+
+
+@pytest.mark.parametrize("tickers,start,end", [
+    (None, None, None),
+    (["AAA.NS", "CCC.NS"], None, None),
+    (None, 10, 30),
+    (["BBB.NS"], 0, 5),
+    (["ZZZ.NS"], None, None),
+])
+def test_select_matches_frame_filtering(frame, tickers, start, end):
+    dates = sorted(frame["trade_date"].unique())
+    start = None if start is None else dates[start]
+    end = None if end is None else dates[end]
+    bars = OHLCBars.from_frame(frame, dtype=np.float64).select(tickers, start, end)
+
+    mask = pd.Series(True, index=frame.index)
+    if tickers is not None:
+        mask &= frame["ticker"].isin(tickers)
+    if start is not None:
+        mask &= frame["trade_date"] >= start
+    if end is not None:
+        mask &= frame["trade_date"] <= end
+    expected = _sorted(frame[mask])
+    got = _as_frame(bars)
+    pd.testing.assert_frame_equal(got, expected[got.columns], check_dtype=False)
+    # symbols and dates only hold what is left
+    assert list(bars.symbols) == sorted(expected["ticker"].unique())
+    assert len(bars.dates) == expected["trade_date"].nunique()
+
+
+def test_take_keeps_views_consistent(frame):
+    bars = OHLCBars.from_frame(frame)
+    kept = bars.take(bars.close > 100)
+    assert np.array_equal(kept.trade_date, bars.trade_date[bars.close > 100])
+    aaa = kept.ticker("AAA.NS")
+    assert (aaa["close"] > 100).all() and (np.diff(aaa["trade_date"]) > np.timedelta64(0)).all()
+    assert bars.take(np.ones(len(bars), dtype=bool)) is bars
+
+
+def test_padded_matches_pad_ohlc(frame):
+    expected = pad_ohlc(frame)
+    got = OHLCBars.from_frame(frame, dtype=np.float64).padded()
+    assert list(got["tickers"]) == list(expected["tickers"])
+    np.testing.assert_array_equal(got["lengths"], expected["lengths"])
+    np.testing.assert_array_equal(got["dates"], expected["dates"])
+    for c in ("open", "high", "low", "close", "volume"):
+        np.testing.assert_allclose(got[c], expected[c], equal_nan=True)
+
+
+def test_last_rows(frame):
+    bars = OHLCBars.from_frame(frame).select(["AAA.NS", "BBB.NS"])
+    bars = bars.take(~((bars.code == 1) & (np.arange(len(bars)) > bars.offsets[1])))
+    rows, present = bars.last_rows(lag=1)
+    assert list(present) == [True, False]
+    assert bars.code[rows[0]] == 0 and rows[0] == bars.offsets[1] - 2
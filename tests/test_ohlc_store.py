@@ -0,0 +1,116 @@
+import pandas as pd
+
+from conftest import UpsertPostgREST, make_ohlc
+from core.ohlc_store import OHLCStore
+from core.trading_calendar import get_trading_calendar
+
+TICKERS = ["AAA.NS", "BBB.NS", "CCC.NS"]
+
+
+def _sessions_ago(n):
+    return get_trading_calendar().window_start(n)
+
+
+def _read(store):
+    return store.read(TICKERS).sort_values(["ticker", "trade_date"], ignore_index=True)
+
+
+def test_incremental_sync_matches_full_sync(tmp_path):
+    ohlc = make_ohlc(TICKERS, sessions=60)
+    dates = sorted(ohlc["trade_date"].unique())
+    start = dates[0]
+
+    # day by day: the first 50 sessions, then one new session per sync
+    server = UpsertPostgREST({"ohlc_data": ohlc[ohlc["trade_date"] <= dates[49]]})
+    incremental = OHLCStore(str(tmp_path / "incremental"))
+    incremental.sync(server, TICKERS, start=start)
+    revisions = {t: m["revision"] for t, m in incremental.meta(TICKERS).items()}
+    for day in dates[50:]:
+        server = UpsertPostgREST({"ohlc_data": ohlc[ohlc["trade_date"] <= day]})
+        assert incremental.sync(server, TICKERS, start=start) == len(TICKERS)
+
+    full = OHLCStore(str(tmp_path / "full"))
+    full.sync(UpsertPostgREST({"ohlc_data": ohlc}), TICKERS, start=start)
+
+    pd.testing.assert_frame_equal(_read(incremental), _read(full))
+    # appending new bars keeps the revision
+    assert {t: m["revision"] for t, m in incremental.meta(TICKERS).items()} == revisions
+    assert incremental.last_dates(TICKERS) == {t: dates[-1] for t in TICKERS}
+
+
+def test_sync_without_new_bars_fetches_nothing(store):
+    server = UpsertPostgREST({"ohlc_data": make_ohlc(TICKERS, sessions=30)})
+    store.sync(server, TICKERS, start=_sessions_ago(30))
+    assert store.sync(server, TICKERS, start=_sessions_ago(30)) == 0
+
+
+def test_deeper_window_replaces_history_and_bumps_revision(store):
+    ohlc = make_ohlc(TICKERS, sessions=120)
+    server = UpsertPostgREST({"ohlc_data": ohlc})
+    store.sync(server, TICKERS, start=_sessions_ago(60))
+    before = store.meta(TICKERS)
+
+    store.sync(server, TICKERS, start=_sessions_ago(120))
+    after = store.meta(TICKERS)
+    for t in TICKERS:
+        assert after[t]["first"] < before[t]["first"]
+        assert after[t]["revision"] == before[t]["revision"] + 1
+    assert len(store.read(TICKERS)) == len(ohlc)
+
+
+def test_corrected_bar_bumps_revision(store):
+    ohlc = make_ohlc(TICKERS, sessions=20)
+    store.sync(UpsertPostgREST({"ohlc_data": ohlc}), TICKERS, start=_sessions_ago(20))
+    revision = store.meta(["AAA.NS"])["AAA.NS"]["revision"]
+
+    old = ohlc[ohlc["ticker"] == "AAA.NS"].iloc[[3]].assign(close=1.0)
+    store.write("AAA.NS", old)
+    assert store.meta(["AAA.NS"])["AAA.NS"]["revision"] == revision + 1
+    stored = store.read(["AAA.NS"])
+    assert stored.loc[stored["trade_date"] == pd.Timestamp(old["trade_date"].iloc[0]), "close"].tolist() == [1.0]
+    assert len(stored) == 20
+
+
+def test_write_many_saves_the_manifest_once(store, monkeypatch):
+    ohlc = make_ohlc(TICKERS, sessions=10)
+    saves = []
+    original = store._write_manifest
+    monkeypatch.setattr(store, "_write_manifest", lambda: (saves.append(1), original()))
+
+    store.write_many((t, rows, True, None) for t, rows in ohlc.groupby("ticker"))
+    assert len(saves) == 1
+    # the manifest on disk covers every ticker
+    assert set(OHLCStore(store.root).last_dates()) == set(TICKERS)
+
+
+def test_two_processes_keep_each_others_manifest_entries(tmp_path):
+    ohlc = make_ohlc(TICKERS, sessions=30)
+    server = UpsertPostgREST({"ohlc_data": ohlc})
+    app, job = OHLCStore(str(tmp_path / "ohlc")), OHLCStore(str(tmp_path / "ohlc"))
+    app.sync(server, TICKERS[:1], start=_sessions_ago(30))
+    job.sync(server, TICKERS[1:], start=_sessions_ago(30))
+
+    # neither save dropped the other's tickers, on disk or in either process
+    for store in (app, job, OHLCStore(str(tmp_path / "ohlc"))):
+        assert set(store.meta(TICKERS)) == set(TICKERS)
+    # and the app sees the job's bars as current: nothing to fetch
+    assert app.sync(server, TICKERS, start=_sessions_ago(30)) == 0
+
+
+def test_bars_another_process_stored_first_keep_the_revision(tmp_path):
+    ohlc = make_ohlc(TICKERS, sessions=30)
+    dates = sorted(ohlc["trade_date"].unique())
+    root = str(tmp_path / "ohlc")
+    OHLCStore(root).sync(UpsertPostgREST({"ohlc_data": ohlc[ohlc["trade_date"] < dates[-1]]}),
+                         TICKERS, start=_sessions_ago(30))
+    app, job = OHLCStore(root), OHLCStore(root)
+    revisions = app.meta(TICKERS)
+
+    job.sync(UpsertPostgREST({"ohlc_data": ohlc}), TICKERS, start=_sessions_ago(30))
+    # the app planned its sync before the job's landed: it writes the same last bars again
+    last = [(t, rows.tail(1), False, None) for t, rows in ohlc.groupby("ticker")]
+    app.write_many(last)
+    job.write_many(last)
+    for store in (app, job):
+        assert store.meta(TICKERS) == {t: {**m, "last": dates[-1]} for t, m in revisions.items()}
+    assert len(app.read(TICKERS)) == len(ohlc)
@@ -0,0 +1,14 @@
+import logging
+import sys
+
+from core.precompute import read_snapshot
+
+
+def test_unreadable_snapshot_is_logged_not_printed(tmp_path, caplog, capsys, monkeypatch):
+    # headless: core.ui.warning goes to the logger (another test may have loaded streamlit)
+    monkeypatch.delitem(sys.modules, "streamlit", raising=False)
+    (tmp_path / "latest.pkl").write_bytes(b"not a pickle")
+    with caplog.at_level(logging.WARNING, logger="stockstrategies"):
+        assert read_snapshot(str(tmp_path)) is None
+    assert "Could not read results snapshot" in caplog.text
+    assert capsys.readouterr().out == ""
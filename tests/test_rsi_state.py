@@ -0,0 +1,219 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import UpsertPostgREST, make_ohlc
+from core.indicators import wilder_rsi_2d
+from core.rsi_state import RSIStateStore, new_state, replay_2d, step
+from core.signal_state import SignalStateStore
+from core.rules import RSI_RULE, rsi_active_2d
+from core.trading_calendar import get_trading_calendar
+
+TICKERS = ["AAA.NS", "BBB.NS", "CCC.NS", "DDD.NS"]
+
+
+@pytest.fixture
+def closes():
+    """(n, width) random walks, left-aligned and NaN-padded to random lengths."""
+    rng = np.random.default_rng(7)
+    n, width = 60, 250
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.025, (n, width)), axis=1))
+    lengths = rng.integers(3, width + 1, n)
+    lengths[:3] = [width, 15, 16]
+    for i, length in enumerate(lengths):
+        close[i, length:] = np.nan
+    return close, lengths
+
+
+def _stepped(close, length):
+    state, rsi, active = new_state(RSI_RULE), [], []
+    for t in range(length):
+        step(state, str(t), float(close[t]), RSI_RULE)
+        rsi.append(np.nan if state["rsi"] is None or t <= RSI_RULE["period"] else state["rsi"])
+        active.append(state["active"])
+    return state, np.array(rsi), np.array(active)
+
+
+def test_step_matches_wilder_rsi_and_active_kernel(closes):
+    close, lengths = closes
+    rsi = wilder_rsi_2d(close, lengths, RSI_RULE["period"])
+    active = rsi_active_2d(rsi, **{k: RSI_RULE[k] for k in ("dip", "cross", "block", "lookback", "clear")})
+    for i, length in enumerate(lengths):
+        _, stepped_rsi, stepped_active = _stepped(close[i], length)
+        np.testing.assert_allclose(stepped_rsi, rsi[i, :length], rtol=1e-12, equal_nan=True)
+        np.testing.assert_array_equal(stepped_active, active[i, :length])
+    assert active.any()
+
+
+def test_replay_matches_step(closes):
+    close, lengths = closes
+    final = replay_2d(close, lengths, RSI_RULE)
+    for i, length in enumerate(lengths):
+        state, _, _ = _stepped(close[i], length)
+        for field in ("rsi", "avg_gain", "avg_loss", "peak_since_dip"):
+            expected = np.nan if state[field] is None else state[field]
+            np.testing.assert_allclose(final[field][i], expected, rtol=1e-12, equal_nan=True)
+        assert final["bars_since_dip"][i] == state["bars_since_dip"]
+        assert final["triggered"][i] == state["triggered"]
+        assert final["active"][i] == state["active"]
+
+
+def _sync(store, ohlc, sessions):
+    store.sync(UpsertPostgREST({"ohlc_data": ohlc}), TICKERS, start=get_trading_calendar().window_start(sessions))
+    return store.meta(TICKERS)
+
+
+def _update(states, store, start=None):
+    """What Nifty200RSIAnalyzer does each run: plan, then recompute and/or extend from the store."""
+    sources = store.meta(TICKERS)
+    recompute, extend = states.plan(sources)
+    if recompute:
+        seeds = states.seeds(recompute).values()
+        since = min([str(start), *seeds]) if start is not None else None
+        states.recompute(store.read_bars(recompute, start=since), sources, start=start)
+    if extend:
+        states.extend(store.read_bars(list(extend), start=min(extend.values())))
+    states.save()
+    return recompute, extend
+
+
+def test_extend_matches_full_recompute(store, signals, tmp_path):
+    ohlc = make_ohlc(TICKERS, sessions=90)
+    dates = sorted(ohlc["trade_date"].unique())
+    start = dates[0]
+
+    states = RSIStateStore(signals=signals)
+    _sync(store, ohlc[ohlc["trade_date"] <= dates[70]], 90)
+    assert _update(states, store, start) == (TICKERS, {})
+    for day in dates[71:]:
+        _sync(store, ohlc[ohlc["trade_date"] <= day], 90)
+        recompute, extend = _update(states, store, start)
+        assert recompute == [] and set(extend) == set(TICKERS)
+
+    full = RSIStateStore(signals=type(signals)(str(tmp_path / "full.sqlite")))
+    full.recompute(store.read_bars(TICKERS), store.meta(TICKERS), start=start)
+    incremental, rebuilt = states.get_many(TICKERS), full.get_many(TICKERS)
+    for t in TICKERS:
+        assert incremental[t]["last_date"] == rebuilt[t]["last_date"] == dates[-1]
+        assert incremental[t]["rsi"] == pytest.approx(rebuilt[t]["rsi"], rel=1e-9)
+        assert incremental[t]["active"] == rebuilt[t]["active"]
+
+
+def test_plan_is_a_hit_when_nothing_changed(store, signals):
+    _sync(store, make_ohlc(TICKERS, sessions=60), 60)
+    states = RSIStateStore(signals=signals)
+    _update(states, store)
+    assert states.plan(store.meta(TICKERS)) == ([], {})
+    # and after a restart, from the persisted states
+    assert RSIStateStore(signals=signals).plan(store.meta(TICKERS)) == ([], {})
+
+
+def test_deeper_store_does_not_move_the_seed(store, signals):
+    ohlc = make_ohlc(TICKERS, sessions=120)
+    start = get_trading_calendar().window_start(60)
+    _sync(store, ohlc, 60)
+    states = RSIStateStore(signals=signals)
+    _update(states, store, start)
+    before = states.get_many(TICKERS)
+    transitions = len(signals.transitions(states.strategy))
+
+    # a chart or the precompute job syncs 120 sessions: the history is replaced, the revision bumps
+    _sync(store, ohlc, 120)
+    recompute, _ = _update(states, store, start)
+    assert recompute == TICKERS
+    after = states.get_many(TICKERS)
+    for t in TICKERS:
+        assert after[t]["seed"] == before[t]["seed"] == start.isoformat()
+        assert after[t]["rsi"] == pytest.approx(before[t]["rsi"], rel=1e-12)
+        assert after[t]["active"] == before[t]["active"]
+    assert len(signals.transitions(states.strategy)) == transitions
+
+
+def test_corrected_bar_recomputes_only_that_ticker(store, signals):
+    ohlc = make_ohlc(TICKERS, sessions=60)
+    _sync(store, ohlc, 60)
+    states = RSIStateStore(signals=signals)
+    _update(states, store)
+
+    store.write("BBB.NS", ohlc[ohlc["ticker"] == "BBB.NS"].iloc[[40]].assign(close=1.0))
+    assert states.plan(store.meta(TICKERS)) == (["BBB.NS"], {})
+
+
+def test_flips_are_logged_as_transitions(signals):
+    # a slide that dips RSI, then a slow climb through the trigger band and on past the clear level
+    close = np.r_[np.linspace(100, 60, 20), 60 * np.cumprod(np.full(40, 1.005))]
+    calendar = get_trading_calendar()
+    dates = calendar.sessions(calendar.window_start(len(close)), calendar.last_session(np.datetime64("today").item()))
+    bars = pd.DataFrame({"ticker": "AAA.NS", "trade_date": pd.to_datetime(dates), "close": close})
+    days = np.datetime_as_string(dates, unit="D")
+
+    state, flips = new_state(RSI_RULE), []
+    for day, c in zip(days, close):
+        was = state["active"]
+        step(state, day, c, RSI_RULE)
+        if state["active"] != was:
+            flips.append((day, "Active" if state["active"] else "Inactive"))
+    assert [to for _, to in flips] == ["Active", "Inactive"]
+
+    # warm-up by recompute (no position yet), the rest bar by bar
+    states = RSIStateStore(signals=signals)
+    states.recompute(bars.iloc[:20], {"AAA.NS": {"first": days[0], "revision": 0}})
+    states.extend(bars.iloc[20:])
+    states.save()
+    log = signals.transitions(states.strategy, "AAA.NS").iloc[::-1]
+    assert list(zip(log["bar_date"], log["to_state"])) == flips
+    assert signals.load(states.strategy)["AAA.NS"]["state"] == "Inactive"
+
+
+def test_app_and_precompute_job_log_each_flip_once(store, tmp_path):
+    # two processes on one signal state file: both plan, then extend, then save the same new bar
+    ohlc = make_ohlc(TICKERS, sessions=80, seed=1)
+    dates = sorted(ohlc["trade_date"].unique())
+    start = dates[0]
+    shared = str(tmp_path / "shared.sqlite")
+    app, job = RSIStateStore(signals=SignalStateStore(shared)), RSIStateStore(signals=SignalStateStore(shared))
+    alone = RSIStateStore(signals=SignalStateStore(str(tmp_path / "alone.sqlite")))
+
+    _sync(store, ohlc[ohlc["trade_date"] <= dates[40]], 80)
+    for states in (job, app, alone):
+        _update(states, store, start)
+    for day in dates[41:]:
+        _sync(store, ohlc[ohlc["trade_date"] <= day], 80)
+        _update(alone, store, start)
+        plans = [states.plan(store.meta(TICKERS)) for states in (app, job)]
+        for states, (_, extend) in zip((app, job), plans):
+            assert set(extend) == set(TICKERS)
+            states.extend(store.read_bars(TICKERS, start=day))
+        job.save()
+        app.save()
+
+    def flips(states):
+        log = states.signals.transitions(states.strategy)
+        return sorted(zip(log["ticker"], log["bar_date"], log["from_state"].fillna(""), log["to_state"]))
+
+    assert flips(alone) and flips(app) == flips(alone)
+    expected = alone.get_many(TICKERS)
+    assert {t: row["payload"]["rsi"] for t, row in app.signals.load(app.strategy).items()} == expected
+
+
+def test_stale_process_picks_up_the_other_ones_states(store, tmp_path):
+    ohlc = make_ohlc(TICKERS, sessions=80)
+    dates = sorted(ohlc["trade_date"].unique())
+    shared = str(tmp_path / "shared.sqlite")
+    _sync(store, ohlc[ohlc["trade_date"] <= dates[60]], 80)
+    app = RSIStateStore(signals=SignalStateStore(shared))
+    _update(app, store, dates[0])
+
+    # the precompute job runs the rest of the sessions while the app sits idle
+    job = RSIStateStore(signals=SignalStateStore(shared))
+    for day in dates[61:]:
+        _sync(store, ohlc[ohlc["trade_date"] <= day], 80)
+        _update(job, store, dates[0])
+    transitions = len(job.signals.transitions(job.strategy))
+
+    assert app.plan(store.meta(TICKERS)) == ([], {})
+    assert app.get_many(TICKERS) == job.get_many(TICKERS)
+    # nothing left to write, and the job's newer rows are not overwritten
+    app.save()
+    assert len(app.signals.transitions(app.strategy)) == transitions
+    assert {t: row["last_bar"] for t, row in app.signals.load(app.strategy).items()} == dict.fromkeys(TICKERS, dates[-1])
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from config import STRATEGY_CONFIG
+from core.runner import StrategyRunner, clear_result_cache
+
+BUY = pd.DataFrame({"Ticker": ["AAA", "BBB"], "Current Price": [100.0, 250.0], "Final Rank": [1, 2]})
+PORTFOLIO = pd.DataFrame(columns=["Ticker"])
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_result_cache()
+    yield
+    clear_result_cache()
+
+
+def test_hits_do_not_share_the_analyzer():
+    first = StrategyRunner("GARP", STRATEGY_CONFIG["GARP"])
+    first.run(inputs=(BUY, PORTFOLIO), version="v1")
+
+    # two sessions hit the cache
+    a, b = (StrategyRunner("GARP", STRATEGY_CONFIG["GARP"]) for _ in range(2))
+    a.run(inputs=(BUY, PORTFOLIO), version="v1")
+    b.run(inputs=(BUY, PORTFOLIO), version="v1")
+    assert a.analyzer is not b.analyzer and a.analyzer is not first.analyzer
+    pd.testing.assert_frame_equal(a.analyzer.analysis_df, BUY)
+    pd.testing.assert_frame_equal(b.analyzer.get_sheet_summary(), first.analyzer.get_sheet_summary())
+
+    # one session re-runs (or edits what it shows): the others keep theirs, and so does the cache
+    a.run(use_cache=False, inputs=(BUY.head(1), PORTFOLIO))
+    a.analyzer.analysis_df.loc[0, "Final Rank"] = 99
+    pd.testing.assert_frame_equal(b.analyzer.analysis_df, BUY)
+    c = StrategyRunner("GARP", STRATEGY_CONFIG["GARP"])
+    c.run(inputs=(BUY, PORTFOLIO), version="v1")
+    pd.testing.assert_frame_equal(c.analyzer.analysis_df, BUY)
+
+
+def test_signal_log_is_copied_per_hit():
+    config = STRATEGY_CONFIG["GARP"]
+    first = StrategyRunner("GARP", config)
+    first.run(inputs=(BUY, PORTFOLIO), version="v1")
+    first.analyzer.signal_log.append({"Ticker": "AAA"})
+
+    hit = StrategyRunner("GARP", config)
+    assert hit.run(inputs=(BUY, PORTFOLIO), version="v1").empty
+    assert hit.analyzer.signal_log == []
+    # a new data version misses
+    assert StrategyRunner("GARP", config).cached("v2") is None
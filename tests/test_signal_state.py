@@ -0,0 +1,105 @@
+import logging
+import sqlite3
+
+from core.signal_state import _SCHEMA, SignalStateStore
+
+
+class Mirror:
+    """Supabase client stand-in recording upserts/inserts, or failing every call."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def table(self, name):
+        mirror = self
+
+        class Query:
+            def upsert(self, rows, on_conflict):
+                mirror.calls.append(("upsert", name, rows))
+                return self
+
+            def insert(self, rows):
+                mirror.calls.append(("insert", name, rows))
+                return self
+
+            def execute(self):
+                if mirror.fail:
+                    raise ConnectionError("mirror down")
+
+        return Query()
+
+
+def test_record_and_load_round_trip(signals):
+    signals.record("RSI", {"AAA.NS": ("Active", "2024-06-14", {"rsi": {"bars": 3}})},
+                   [("AAA.NS", "2024-06-14", None, "Active", {"rsi": 41.2})])
+    signals.record("RSI", {"BBB.NS": ("Inactive", "2024-06-14", {})})
+    signals.record("Gap", {"AAA.NS": ("Inactive", "2024-06-13", {"key": 1})})
+
+    assert signals.load("RSI") == {
+        "AAA.NS": {"state": "Active", "last_bar": "2024-06-14", "payload": {"rsi": {"bars": 3}}},
+        "BBB.NS": {"state": "Inactive", "last_bar": "2024-06-14", "payload": {}},
+    }
+    assert set(signals.load("RSI", ["BBB.NS", "ZZZ.NS"])) == {"BBB.NS"}
+    # a later record of the same ticker replaces its row
+    signals.record("RSI", {"AAA.NS": ("Inactive", "2024-06-17", {})})
+    assert signals.load("RSI")["AAA.NS"]["state"] == "Inactive"
+
+
+def test_transitions_newest_first_and_filtered(signals):
+    signals.record("RSI", {}, [("AAA.NS", "2024-06-10", None, "Active", None),
+                               ("BBB.NS", "2024-06-11", None, "Active", None)])
+    signals.record("RSI", {}, [("AAA.NS", "2024-06-12", "Active", "Inactive", {"rsi": 56.0})])
+    signals.record("Gap", {}, [("AAA.NS", "2024-06-12", None, "Active", None)])
+
+    log = signals.transitions("RSI")
+    assert list(zip(log["ticker"], log["bar_date"])) == [
+        ("AAA.NS", "2024-06-12"), ("BBB.NS", "2024-06-11"), ("AAA.NS", "2024-06-10")]
+    assert list(signals.transitions("RSI", "AAA.NS")["to_state"]) == ["Inactive", "Active"]
+    assert len(signals.transitions(ticker="AAA.NS")) == 3
+
+
+def test_clear_keeps_the_history(signals):
+    signals.record("RSI", {"AAA.NS": ("Active", "2024-06-14", {})}, [("AAA.NS", "2024-06-14", None, "Active", None)])
+    signals.clear("RSI")
+    assert signals.load("RSI") == {}
+    assert len(signals.transitions("RSI")) == 1
+
+
+def test_mirror_gets_states_and_transitions(tmp_path):
+    mirror = Mirror()
+    store = SignalStateStore(str(tmp_path / "s.sqlite"), mirror=mirror)
+    store.record("RSI", {"AAA.NS": ("Active", "2024-06-14", {})}, [("AAA.NS", "2024-06-14", None, "Active", None)])
+    assert [(kind, name, len(rows)) for kind, name, rows in mirror.calls] == [
+        ("upsert", "signal_state", 1), ("insert", "signal_transitions", 1)]
+
+
+def test_mirror_failure_is_logged_not_raised(tmp_path, caplog):
+    store = SignalStateStore(str(tmp_path / "s.sqlite"), mirror=Mirror(fail=True))
+    with caplog.at_level(logging.WARNING, logger="core.signal_state"):
+        store.record("RSI", {"AAA.NS": ("Active", "2024-06-14", {})})
+    assert "mirror down" in caplog.text
+    assert store.load("RSI")["AAA.NS"]["state"] == "Active"
+
+
+def test_a_flip_recorded_twice_is_logged_once(tmp_path):
+    # the app and the precompute job evaluate the same bar, each through its own store
+    path = str(tmp_path / "s.sqlite")
+    mirror = Mirror()
+    app, job = SignalStateStore(path, mirror=mirror), SignalStateStore(path)
+    flip = ("AAA.NS", "2024-06-14", "Inactive", "Active", {"rsi": 41.2})
+    job.record("Gap", {"AAA.NS": ("Active", "2024-06-14", {})}, [flip])
+    app.record("Gap", {"AAA.NS": ("Active", "2024-06-14", {})}, [flip])
+    assert len(app.transitions("Gap")) == 1
+    # and the mirror is not sent the duplicate either
+    assert [kind for kind, *_ in mirror.calls] == ["upsert"]
+
+
+def test_duplicates_in_an_older_file_are_dropped(tmp_path):
+    path = str(tmp_path / "s.sqlite")
+    with sqlite3.connect(path) as conn:
+        conn.executescript(_SCHEMA)
+        conn.executemany(
+            "INSERT INTO signal_transitions (strategy, ticker, bar_date, to_state, recorded_at) VALUES (?, ?, ?, ?, ?)",
+            [("Gap", "AAA.NS", "2024-06-14", "Active", "x")] * 3 + [("Gap", "AAA.NS", "2024-06-17", "Inactive", "x")])
+    assert list(SignalStateStore(path).transitions("Gap")["bar_date"]) == ["2024-06-17", "2024-06-14"]
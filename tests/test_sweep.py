@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_ohlc
+from test_backtest import _gappy
+from core.backtest import run_backtest
+from core.sweep import STAT_COLUMNS, SharedArrays, param_grid, param_sample, run_sweep
+
+SPACE = {"dip": [25, 30, 35], "cross": [38, 40, 42], "sell_threshold_pct": [5, 8, 12]}
+
+
+@pytest.fixture(scope="module")
+def ohlc():
+    return make_ohlc([f"T{i:02d}.NS" for i in range(10)], sessions=250, seed=5)
+
+
+def test_param_grid_and_sample():
+    grid = param_grid(SPACE)
+    assert len(grid) == 27 and grid[0] == {"dip": 25, "cross": 38, "sell_threshold_pct": 5}
+
+    sample = param_sample(SPACE, 10, seed=1)
+    assert len(sample) == 10 and all(p in grid for p in sample)
+    assert len({tuple(p.values()) for p in sample}) == 10
+    assert sample == param_sample(SPACE, 10, seed=1)
+    # asking for at least the whole grid returns the whole grid
+    assert param_sample(SPACE, 27) == grid
+
+
+def test_sweep_ranks_by_metric_with_too_few_trades_last(ohlc):
+    ranked = run_sweep(ohlc, "Nifty200_RSI", SPACE, workers=1, min_trades=3)
+
+    assert list(ranked["Rank"]) == list(range(1, 28))
+    eligible = ranked["Trades"] >= 3
+    # every eligible set ahead of every ineligible one, each block by CAGR
+    assert not (~eligible.iloc[:-1].to_numpy() & eligible.iloc[1:].to_numpy()).any()
+    for block in (ranked[eligible], ranked[~eligible]):
+        assert block["CAGR %"].is_monotonic_decreasing
+    assert ranked[eligible]["Trades"].sum() > 0
+
+
+def test_sweep_row_matches_a_backtest_of_that_set(ohlc):
+    ranked = run_sweep(ohlc, "Nifty200_RSI", SPACE, workers=1)
+    best = ranked.iloc[0]
+    rule = {"dip": best["dip"], "cross": best["cross"]}
+    _, stats = run_backtest(ohlc, strategies=["Nifty200_RSI"], rules={"Nifty200_RSI": rule},
+                            sell_threshold_pct=best["sell_threshold_pct"], workers=1)
+    expected = stats.iloc[0]
+    for column in STAT_COLUMNS:
+        assert best[column] == pytest.approx(expected[column], nan_ok=True)
+
+
+def test_parallel_sweep_matches_serial(ohlc):
+    serial = run_sweep(ohlc, "Nifty200_RSI", SPACE, samples=8, workers=1)
+    parallel = run_sweep(ohlc, "Nifty200_RSI", SPACE, samples=8, workers=2)
+    pd.testing.assert_frame_equal(serial, parallel)
+
+
+def test_shared_arrays_attach_read_only():
+    values = {"close": np.arange(6, dtype=float).reshape(2, 3), "lengths": np.array([3, 2])}
+    with SharedArrays(values) as shared:
+        arrays, blocks = SharedArrays.attach(shared.spec)
+        np.testing.assert_array_equal(arrays["close"], values["close"])
+        assert not arrays["lengths"].flags.writeable
+        for block in blocks:
+            block.close()
+
+
+def test_sweeping_max_peg_needs_peg(ohlc):
+    with pytest.raises(ValueError, match="max_peg"):
+        run_sweep(ohlc, "EarningsGap", {"max_peg": [1.0, 4.5]}, workers=1)
+
+    gappy = _gappy(["AAA.NS", "BBB.NS"])
+    ranked = run_sweep(gappy, "EarningsGap", {"max_peg": [1.0, 2.0, 4.5]}, workers=1,
+                       peg={"AAA.NS": 1.2, "BBB.NS": 3.0})
+    trades = ranked.set_index("max_peg")["Trades"]
+    assert trades[1.0] == 0 < trades[2.0] < trades[4.5]
+
+
+def test_cli_sweeps_earnings_gap_with_the_peg_cache(monkeypatch, capsys):
+    import core.analyzers
+    import core.clients
+    import core.fundamentals
+    import core.ohlc_store
+    import core.sweep
+    from core.fundamentals import PEGCache, StaticPEGSource
+
+    tickers = ["AAA.NS", "BBB.NS"]
+    pegs = PEGCache(StaticPEGSource({"AAA.NS": 1.2, "BBB.NS": 3.0}), path=None)
+    calls = []
+
+    class Store:
+        def last_dates(self):
+            return dict.fromkeys(tickers)
+
+    monkeypatch.setattr(core.ohlc_store, "get_ohlc_store", Store)
+    monkeypatch.setattr(core.analyzers, "fetch_ohlc_window", lambda client, tickers, sessions: make_ohlc(tickers))
+    monkeypatch.setattr(core.clients, "get_supabase_client", lambda: None)
+    monkeypatch.setattr(core.fundamentals, "get_peg_cache", lambda: pegs)
+    monkeypatch.setattr(core.sweep, "run_sweep", lambda *args, **kwargs: calls.append(kwargs) or pd.DataFrame())
+
+    core.sweep.main(["EarningsGap", "max_peg=1.5,4.5", "--workers", "1"])
+    [kwargs] = calls
+    assert kwargs["peg"] == {"AAA.NS": 1.2, "BBB.NS": 3.0}
@@ -0,0 +1,44 @@
+import json
+
+import core.telemetry
+from core.telemetry import Telemetry, page_span, span
+
+
+def test_spans_nest_into_one_run():
+    with span("outer", rows=2) as outer:
+        with span("inner") as inner:
+            inner.set(cache="hit")
+    [records] = core.telemetry.get_telemetry().recent_runs(1)
+    by_name = {r["name"]: r for r in records}
+    assert by_name["inner"]["parent"] == outer.id and by_name["inner"]["run"] == outer.id
+    assert by_name["outer"]["rows"] == 2 and by_name["inner"]["cache"] == "hit"
+
+
+def test_abandoned_page_renders_do_not_pile_up():
+    telemetry = core.telemetry.get_telemetry()
+    for _ in range(20):
+        page_span("pages/7_Nifty200_RSI.py")
+        with span("analyzer.fetch_ohlc"):
+            pass
+        # st.stop(): the render never ends its span
+    assert telemetry.open_runs() == 1
+
+    abandoned = telemetry.recent_runs(1)[0]
+    root = next(r for r in abandoned if r["parent"] is None)
+    assert root["error"] == "Abandoned" and len(abandoned) == 2
+
+
+def test_flush_writes_log_and_prometheus(tmp_path, monkeypatch):
+    telemetry = Telemetry(log_path=str(tmp_path / "spans.jsonl"), prom_path=str(tmp_path / "s.prom"),
+                          flush_seconds=3600)
+    monkeypatch.setattr(core.telemetry, "_default_telemetry", telemetry)
+    for _ in range(5):
+        with span("precompute.run"):
+            pass
+    # within flush_seconds nothing is written yet
+    assert not (tmp_path / "spans.jsonl").exists()
+
+    telemetry.flush()
+    with open(tmp_path / "spans.jsonl") as f:
+        assert [json.loads(line)["name"] for line in f] == ["precompute.run"] * 5
+    assert 'stockstrategies_span_count_total{span="precompute.run"} 5' in (tmp_path / "s.prom").read_text()
@@ -0,0 +1,73 @@
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from core.ohlc_bars import OHLCBars
+from core.trading_calendar import TradingCalendar
+
+# Republic Day 2024 fell on a Friday
+HOLIDAYS = ["2024-01-26", "2024-03-25"]
+
+
+def test_session_arithmetic_skips_weekends_and_holidays():
+    cal = TradingCalendar(HOLIDAYS)
+    assert cal.window_start(5, end="2024-01-30") == date(2024, 1, 23)
+    assert cal.window_start(1, end="2024-01-28") == date(2024, 1, 25)
+    assert cal.last_session("2024-01-26") == date(2024, 1, 25)
+    assert cal.count("2024-01-22", "2024-01-30") == 6
+    assert list(cal.sessions("2024-01-25", "2024-01-29").astype(str)) == ["2024-01-25", "2024-01-29"]
+    assert list(cal.is_session(["2024-01-26", "2024-01-27", "2024-01-29"])) == [False, False, True]
+    # window_start and count agree
+    for n in (1, 10, 60, 250):
+        start = cal.window_start(n, end="2024-06-28")
+        assert cal.count(start, "2024-06-28") == n
+
+
+def test_filter_frames_and_bars():
+    cal = TradingCalendar(HOLIDAYS)
+    df = pd.DataFrame({"ticker": "AAA.NS", "trade_date": ["2024-01-25", "2024-01-26", "2024-01-27", "2024-01-29"],
+                       "close": [1.0, 2.0, 3.0, 4.0]})
+    assert list(cal.filter(df)["close"]) == [1.0, 4.0]
+    assert list(cal.filter(OHLCBars.from_frame(df)).close) == [1.0, 4.0]
+
+
+def test_infer_extend_and_persist(tmp_path):
+    path = tmp_path / "holidays.json"
+    cal = TradingCalendar(path=str(path))
+    observed = pd.bdate_range("2025-01-01", "2025-01-31").drop(pd.Timestamp("2025-01-14"))
+    missing = cal.infer_holidays(observed)
+    assert list(missing.astype(str)) == ["2025-01-14"]
+    assert not cal.covers(2025)
+
+    cal.extend(missing, persist=True)
+    assert cal.covers(2025) and not cal.is_session("2025-01-14")[()]
+    reloaded = TradingCalendar.from_file(str(path))
+    np.testing.assert_array_equal(reloaded.holidays, cal.holidays)
+
+    path.write_text('{"2026": ["2026-01-26"]}')
+    cal.refresh()
+    assert cal.covers(2026) and not cal.covers(2025)
+
+
+def test_readers_never_see_a_half_built_calendar():
+    cal = TradingCalendar()
+    years = range(2030, 2130)
+    done = threading.Event()
+
+    def extend():
+        for year in years:
+            cal.extend([f"{year}-01-01"])
+        done.set()
+
+    writer = threading.Thread(target=extend)
+    writer.start()
+    torn = 0
+    while not done.is_set():
+        for year in years:
+            # a covered year's holiday is never a session
+            if cal.covers(year) and cal.is_session(f"{year}-01-01")[()]:
+                torn += 1
+    writer.join()
+    assert torn == 0 and all(cal.covers(y) for y in years)